@@ -1,8 +1,30 @@
 import sqlite3
 import os
-import shutil
 from datetime import datetime
 import logging
+from contextlib import contextmanager
+
+def get_connection(db):
+    """获取底层sqlite连接，兼容Database封装和原生sqlite3连接"""
+    return getattr(db, 'conn', db)
+
+@contextmanager
+def temp_table(conn, name: str, columns: list, rows):
+    """将上传数据批量写入临时表，供JOIN/EXCEPT等集合查询使用，退出时自动删除
+    
+    不改变调用方的事务状态：调用前没有未提交事务时，退出时提交临时表的写入
+    """
+    in_transaction = conn.in_transaction
+    conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+    conn.execute(f"CREATE TEMP TABLE {name} ({', '.join(columns)})")
+    try:
+        placeholders = ', '.join('?' * len(columns))
+        conn.executemany(f"INSERT INTO temp.{name} VALUES ({placeholders})", rows)
+        yield name
+    finally:
+        conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+        if not in_transaction and conn.in_transaction:
+            conn.commit()
 
 class Database:
     def __init__(self):
@@ -18,6 +40,7 @@ class Database:
     def connect(self):
         """连接到数据库"""
         try:
+            # 连接只在创建它的线程中使用，后台导入线程另开连接（见ImportWorker）
             self.conn = sqlite3.connect(self.db_path)
             self.cursor = self.conn.cursor()
             self._create_tables()
@@ -47,6 +70,10 @@ class Database:
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        self._ensure_columns('employees', {
+            'salary_group': 'TEXT',           # 所属薪资组
+            'special_deduction': 'DECIMAL(10,2)'  # 每月专项附加扣除
+        })
         
         # 考勤记录表
         self.cursor.execute('''
@@ -57,10 +84,23 @@ class Database:
                 check_in TIME,               -- 上班时间
                 check_out TIME,              -- 下班时间
                 status TEXT,                 -- 考勤状态
+                attendance_days REAL,        -- 出勤天数
+                overtime_hours REAL,         -- 加班时长
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (emp_id) REFERENCES employees(emp_id)
             )
         ''')
+        self._ensure_columns('attendance', {
+            'attendance_days': 'REAL',
+            'overtime_hours': 'REAL'
+        })
+        # 按月份范围读取考勤（增量重新导入）时使用
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_attendance_date
+            ON attendance (date)
+        ''')
+        # 同一员工同一天只能有一条考勤
+        self._ensure_unique_index('idx_attendance_emp_date', 'attendance', 'emp_id, date')
         
         # 绩效记录表
         self.cursor.execute('''
@@ -74,6 +114,11 @@ class Database:
                 UNIQUE(emp_id, month)
             )
         ''')
+        # 按月份查询某月全部员工（人员变动检查）时使用
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_performance_month_emp
+            ON performance (month, emp_id)
+        ''')
         
         # 用户表
         self.cursor.execute('''
@@ -106,6 +151,9 @@ class Database:
                 FOREIGN KEY (emp_id) REFERENCES employees(emp_id)
             )
         ''')
+        # 奖惩记录的自然键，原因为空视为相同
+        self._ensure_unique_index('idx_rewards_natural_key', 'rewards_punishments',
+                                  "emp_id, month, type, amount, IFNULL(reason, '')")
         
         # 薪酬项表
         self.cursor.execute('''
@@ -145,8 +193,112 @@ class Database:
             )
         ''')
         
+        # 薪资组表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS salary_groups (
+                group_id TEXT PRIMARY KEY,    -- 薪资组编号
+                group_name TEXT NOT NULL,     -- 薪资组名称
+                base_salary DECIMAL(10,2),    -- 基本工资
+                performance_rule TEXT,        -- 绩效规则(JSON: base绩效工资基数, full_score满分)
+                social_security_base DECIMAL(10,2), -- 社保缴纳基数
+                insurance_group_id INTEGER,   -- 社保配置组ID，个人缴纳比例取该组各项目之和
+                formula TEXT,                 -- 薪资计算公式
+                create_time TIMESTAMP,
+                FOREIGN KEY (insurance_group_id) REFERENCES insurance_groups(id)
+            )
+        ''')
+        
+        # 工资记录表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS salary_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                emp_id TEXT NOT NULL,         -- 工号
+                year INTEGER NOT NULL,        -- 年份
+                month INTEGER NOT NULL,       -- 月份
+                base_salary DECIMAL(10,2),    -- 基本工资
+                performance DECIMAL(10,2),    -- 绩效工资
+                overtime_pay DECIMAL(10,2),   -- 加班工资
+                rewards DECIMAL(10,2),        -- 奖励
+                deductions DECIMAL(10,2),     -- 惩罚扣款
+                social_security DECIMAL(10,2),-- 社保个人部分
+                tax DECIMAL(10,2),            -- 个税
+                net_salary DECIMAL(10,2),     -- 实发工资
+                special_deduction DECIMAL(10,2), -- 专项附加扣除
+                calculate_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (emp_id) REFERENCES employees(emp_id),
+                UNIQUE(emp_id, year, month)
+            )
+        ''')
+        self._ensure_columns('salary_records', {
+            'special_deduction': 'DECIMAL(10,2)'  # 专项附加扣除
+        })
+        
+        # 个税累计预扣表：每人每个纳税年度一行，记录截至已结算月份的累计数
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tax_ytd (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                emp_id TEXT NOT NULL,         -- 工号
+                tax_year INTEGER NOT NULL,    -- 纳税年度
+                last_month INTEGER NOT NULL,  -- 已累计到的月份
+                income DECIMAL(12,2),         -- 累计收入
+                deductions DECIMAL(12,2),     -- 累计减除费用及社保个人部分
+                special_deductions DECIMAL(12,2), -- 累计专项附加扣除
+                tax_withheld DECIMAL(12,2),   -- 累计已预扣税额
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (emp_id) REFERENCES employees(emp_id),
+                UNIQUE(emp_id, tax_year)
+            )
+        ''')
+        
+        # 导入台账表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_ledger (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_hash TEXT NOT NULL,      -- 文件内容SHA-256
+                importer TEXT NOT NULL,       -- 导入类型(attendance/performance/rewards)
+                month TEXT NOT NULL,          -- 月份(YYYY-MM)
+                file_name TEXT,               -- 文件名
+                total_rows INTEGER,           -- 总行数
+                success_rows INTEGER,         -- 成功行数
+                failed_rows INTEGER,          -- 失败行数
+                elapsed REAL,                 -- 导入耗时(秒)
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(file_hash, importer, month)
+            )
+        ''')
+        
+        # 导入断点表：大文件分批提交时记录已提交的位置，中断后重新导入同一文件从断点继续
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_checkpoints (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_hash TEXT NOT NULL,      -- 文件内容SHA-256
+                importer TEXT NOT NULL,       -- 导入类型(attendance/performance)
+                month TEXT NOT NULL,          -- 月份(YYYY-MM)
+                rows_done INTEGER NOT NULL,   -- 已处理的文件数据行数
+                total_rows INTEGER NOT NULL,  -- 其中清洗后的有效行数
+                success_rows INTEGER NOT NULL,-- 已写入的行数
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(file_hash, importer, month)
+            )
+        ''')
+        
         self.conn.commit()
         
+    def _ensure_columns(self, table: str, columns: dict):
+        """为已存在的旧表补充新增字段"""
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in self.cursor.fetchall()}
+        for name, definition in columns.items():
+            if name not in existing:
+                self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        
+    def _ensure_unique_index(self, name: str, table: str, columns: str):
+        """创建唯一索引；旧库中已有重复数据时只记录警告，待清理后下次启动再创建"""
+        try:
+            self.cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        except sqlite3.IntegrityError:
+            logging.warning(f"{table}表中存在重复记录，未能创建唯一索引{name}")
+        
     def _create_default_admin(self):
         """创建默认管理员账户"""
         try:
@@ -179,18 +331,14 @@ class Database:
                 f'xinchou_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
             )
             
-            # 关闭当前连接
-            self.close()
-            
-            # 复制数据库文件
-            shutil.copy2(self.db_path, backup_file)
-            
-            # 重新连接数据库
-            self.connect()
+            # 在线备份只复制已提交的数据，不关闭当前连接，后台导入的连接也不受影响
+            target = sqlite3.connect(backup_file)
+            try:
+                self.conn.backup(target)
+            finally:
+                target.close()
             
             return True
         except Exception as e:
             logging.error(f"数据库备份失败: {str(e)}")
-            # 确保数据库重新连接
-            self.connect()
             return False
\ No newline at end of file
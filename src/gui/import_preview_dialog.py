@@ -0,0 +1,77 @@
+from typing import Dict
+import pandas as pd
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                           QLabel, QTableWidget, QTableWidgetItem)
+
+class ImportPreviewDialog(QDialog):
+    """导入前预览：显示字段对应关系、类型转换情况和抽样数据，确认后再导入"""
+    def __init__(self, preview: Dict, parent=None):
+        super().__init__(parent)
+        self.confirmed = False
+
+        self.setWindowTitle("导入预览")
+        self.setMinimumWidth(700)
+
+        layout = QVBoxLayout()
+
+        # 字段对应关系
+        layout.addWidget(QLabel("字段对应关系："))
+        mapping_table = QTableWidget()
+        mapping_table.setColumnCount(2)
+        mapping_table.setHorizontalHeaderLabels(["文件列", "导入字段"])
+        mapping_table.setRowCount(len(preview['mapping']))
+        for i, (column, name) in enumerate(preview['mapping'].items()):
+            mapping_table.setItem(i, 0, QTableWidgetItem(column))
+            mapping_table.setItem(i, 1, QTableWidgetItem(name or "（不导入）"))
+        layout.addWidget(mapping_table)
+
+        if preview['missing']:
+            layout.addWidget(QLabel(f"缺少必要字段：{'、'.join(preview['missing'])}，无法导入"))
+
+        # 类型转换情况
+        layout.addWidget(QLabel("类型转换（基于预览行）："))
+        types_table = QTableWidget()
+        types_table.setColumnCount(5)
+        types_table.setHorizontalHeaderLabels(["导入字段", "类型", "无效值", "空值", "无效值示例"])
+        types_table.setRowCount(len(preview['types']))
+        for i, item in enumerate(preview['types']):
+            types_table.setItem(i, 0, QTableWidgetItem(item['column']))
+            types_table.setItem(i, 1, QTableWidgetItem("数值" if item['dtype'] == 'number' else "文本"))
+            types_table.setItem(i, 2, QTableWidgetItem(str(item['invalid'])))
+            types_table.setItem(i, 3, QTableWidgetItem(str(item['empty'])))
+            types_table.setItem(i, 4, QTableWidgetItem("、".join(item['examples'])))
+        layout.addWidget(types_table)
+
+        # 开头数据和随机抽样
+        layout.addWidget(QLabel(f"开头 {len(preview['head'])} 行及随机抽样 {len(preview['sample'])} 行："))
+        rows = [("开头", row) for row in preview['head'].itertuples(index=False, name=None)]
+        rows += [("抽样", row) for row in preview['sample'].itertuples(index=False, name=None)]
+        data_table = QTableWidget()
+        data_table.setColumnCount(len(preview['columns']) + 1)
+        data_table.setHorizontalHeaderLabels([""] + preview['columns'])
+        data_table.setRowCount(len(rows))
+        for i, (source, row) in enumerate(rows):
+            data_table.setItem(i, 0, QTableWidgetItem(source))
+            for j, value in enumerate(row):
+                data_table.setItem(i, j + 1, QTableWidgetItem("" if pd.isna(value) else str(value)))
+        layout.addWidget(data_table)
+
+        # 按钮布局
+        button_layout = QHBoxLayout()
+
+        confirm_btn = QPushButton("确认导入")
+        confirm_btn.setEnabled(not preview['missing'])
+        confirm_btn.clicked.connect(self.accept_preview)
+
+        cancel_btn = QPushButton("取消导入")
+        cancel_btn.clicked.connect(self.reject)
+
+        button_layout.addWidget(confirm_btn)
+        button_layout.addWidget(cancel_btn)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def accept_preview(self):
+        self.confirmed = True
+        self.accept()
@@ -0,0 +1,50 @@
+from typing import Callable, Dict
+from PyQt6.QtCore import QObject, pyqtSignal
+import threading
+from src.db.database import Database
+
+class ImportWorker(QObject):
+    """在后台线程中运行导入任务，避免界面在解析和写库期间卡死
+
+    导入在工作线程中使用单独打开的数据库连接，界面线程的提交、备份等操作
+    不会影响导入中未提交的事务，取消时能完整回滚
+    """
+    progress = pyqtSignal(dict)  # 进度: {'stage', 'rows_read', 'rows_written'}
+    finished = pyqtSignal(dict)  # 导入结果
+
+    def __init__(self, importer, task: Callable[[], Dict], db_path: str, parent=None):
+        super().__init__(parent)
+        self.importer = importer
+        self.task = task
+        self.db_path = db_path
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        """执行导入任务（在工作线程中调用）"""
+        db = Database()
+        db.db_path = self.db_path
+        if not db.connect():
+            self.finished.emit({'status': 'error', 'message': '数据库连接失败'})
+            return
+        
+        # 导入期间导入器改用本线程的连接，结束后恢复
+        shared_db, self.importer.db = self.importer.db, db
+        self.importer.progress_callback = self.progress.emit
+        self.importer.cancel_event = self.cancel_event
+        try:
+            result = self.task()
+        except Exception as e:
+            result = {'status': 'error', 'message': str(e)}
+        finally:
+            self.importer.progress_callback = None
+            self.importer.cancel_event = None
+            self.importer.db = shared_db
+            db.close()
+        self.finished.emit(result or {'status': 'error', 'message': '导入未返回结果'})
+
+    def cancel(self):
+        """请求取消，导入器在处理完当前批次后停止
+
+        工作线程的事件循环被run()占用，该方法需由界面线程直接调用
+        """
+        self.cancel_event.set()
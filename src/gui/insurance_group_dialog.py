@@ -2,6 +2,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                             QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
                             QMessageBox, QDoubleSpinBox)
 from PyQt6.QtCore import Qt
+from src.modules.config_cache import config_cache
 
 class InsuranceGroupDialog(QDialog):
     def __init__(self, db, group_id=None, parent=None):
@@ -125,7 +126,8 @@ class InsuranceGroupDialog(QDialog):
             return
             
         try:
-            self.db.conn.begin()
+            if not self.db.conn.in_transaction:
+                self.db.conn.execute("BEGIN")
             
             if self.group_id:
                 # 更新配置组
@@ -157,6 +159,7 @@ class InsuranceGroupDialog(QDialog):
                 ''', (self.group_id, item_name, company_rate, personal_rate))
                 
             self.db.conn.commit()
+            config_cache.invalidate('insurance_groups')
             self.accept()
             
         except Exception as e:
@@ -6,9 +6,10 @@ import pandas as pd
 current_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 sys.path.append(current_dir)
 
-from PyQt6 import QtWidgets
-from PyQt6.QtWidgets import QDialog, QFileDialog, QMessageBox, QInputDialog
-from PyQt6.QtCore import QTimer, QSettings
+from PyQt6 import QtCore, QtWidgets
+from PyQt6.QtWidgets import QDialog, QFileDialog, QMessageBox, QInputDialog, QProgressDialog
+from PyQt6.QtCore import QTimer, QSettings, QThread, QUrl
+from PyQt6.QtGui import QDesktopServices
 from src.gui.ui_main import Ui_Dialog
 from src.modules.attendance_import import AttendanceImporter
 from src.modules.performance_import import PerformanceImporter
@@ -20,7 +21,17 @@ from src.gui.login_dialog import LoginDialog
 from src.gui.user_settings_dialog import UserSettingsDialog
 from src.db.database import Database
 from src.modules.reward_import import RewardImporter
+from src.modules.employee_import import EmployeeImporter
+from src.modules.import_ledger import ImportLedger
+from src.modules.file_cache import parsed_file_cache
+from src.modules.staging_cache import StagingCache
+from src.modules.readers import sheet_names
+from src.modules.import_preview import preview_file
+from src.modules.error_report import ErrorReport
+from src.modules.config_cache import config_cache
 from src.gui.insurance_group_dialog import InsuranceGroupDialog
+from src.gui.import_worker import ImportWorker
+from src.gui.import_preview_dialog import ImportPreviewDialog
 
 class MainWindow(QDialog):
     def __init__(self):
@@ -28,6 +39,9 @@ class MainWindow(QDialog):
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
         
+        # 批量导入考勤按钮
+        self.setup_batch_import_ui()
+        
         # 初始化当前用户名
         self.current_username = None
         
@@ -47,10 +61,29 @@ class MainWindow(QDialog):
         # 初始化奖惩导入器
         self.reward_importer = RewardImporter(self.db)
         
+        # 初始化花名册导入器
+        self.employee_importer = EmployeeImporter(self.db)
+        
+        # 上传文件的列式暂存副本放在数据库同级目录下
+        parsed_file_cache.staging = StagingCache(
+            os.path.join(os.path.dirname(self.db.db_path), 'staging')
+        )
+        # 导入错误报告同样放在数据库同级目录下
+        ErrorReport.default_dir = os.path.join(os.path.dirname(self.db.db_path), 'import_errors')
+        
+        # 后台导入任务（同一时间只运行一个）
+        self.import_thread = None
+        self.import_worker = None
+        self.import_callback = None
+        self.import_progress_dialog = None
+        self.last_import_task = None
+        self.pending_performance_import = None
+        
         # 连接信号和槽
         self.ui.upload.clicked.connect(self.import_attendance)
         self.ui.upload2.clicked.connect(self.import_performance)
         self.ui.uploadReward.clicked.connect(self.import_reward)
+        self.ui.importRoster.clicked.connect(self.import_roster)
         self.ui.backupDatabase.clicked.connect(self.show_backup_settings)
         self.ui.selectPath.clicked.connect(self.select_backup_path)
         self.ui.backupNow.clicked.connect(self.backup_now)
@@ -65,6 +98,329 @@ class MainWindow(QDialog):
         # 初始化薪酬项表格
         self.init_salary_items_table()
         
+    def setup_batch_import_ui(self):
+        """设置批量导入考勤按钮和重复记录处理方式"""
+        self.ui.uploadBatch = QtWidgets.QPushButton(parent=self.ui.groupBox_2)
+        self.ui.uploadBatch.setText("批量导入考勤")
+        self.ui.uploadBatch.setGeometry(20, 480, 160, 40)
+        self.ui.uploadBatch.clicked.connect(self.import_attendance_batch)
+        
+        # 考勤、奖惩导入遇到重复记录时的处理方式
+        self.ui.duplicateMode = QtWidgets.QComboBox(parent=self.ui.groupBox_2)
+        self.ui.duplicateMode.setGeometry(200, 480, 160, 40)
+        for text, mode in (("重复记录：跳过", 'skip'), ("重复记录：覆盖", 'overwrite'), ("重复记录：拒绝导入", 'reject')):
+            self.ui.duplicateMode.addItem(text, mode)
+        
+    def import_attendance_batch(self):
+        """批量导入多个考勤文件（各分支机构各一个文件）"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "选择考勤文件",
+            "",
+            "考勤文件 (*.xlsx *.xls *.csv)"
+        )
+        if not file_paths:
+            return
+            
+        month = self.ask_month("批量导入考勤")
+        if not month:
+            return
+            
+        importer = self.attendance_importer
+        on_duplicate = self.ui.duplicateMode.currentData()
+        self.run_import_task(
+            importer,
+            lambda: importer.import_attendance_files(file_paths, month=month, on_duplicate=on_duplicate),
+            self.show_batch_import_result
+        )
+        
+    def show_batch_import_result(self, result):
+        """显示批量导入考勤（多个文件或多工作表工作簿）的结果"""
+        if 'files' not in result and 'sheets' not in result:
+            self.show_import_result(result)
+            return
+            
+        # 汇总每个文件或工作表的导入结果
+        lines = []
+        for file_result in result.get('files') or result['sheets']:
+            name = os.path.basename(file_result['file']) if 'file' in file_result else file_result['sheet']
+            if file_result['status'] == 'success':
+                rejected = f"，拒绝 {file_result['rejected']} 行" if file_result.get('rejected') else ""
+                lines.append(f"{name}：成功 {file_result['success']} 条，失败 {file_result['failed']} 条{rejected}")
+            elif file_result['status'] == 'skipped':
+                lines.append(f"{name}：{'已导入过' if 'file' in file_result else file_result['message']}，跳过")
+            else:
+                lines.append(f"{name}：导入失败，{file_result['message']}")
+        summary = f"共导入 {result['success']} 条记录{self.describe_duplicates(result)}\n\n" + "\n".join(lines)
+        
+        if result['status'] == 'success':
+            QMessageBox.information(self, "导入完成", summary)
+        elif result['status'] == 'cancelled':
+            QMessageBox.information(self, "导入已取消", summary)
+        else:
+            QMessageBox.warning(self, "部分文件导入失败" if 'files' in result else "部分工作表导入失败", summary)
+        self.offer_error_report(result)
+            
+    def describe_duplicates(self, result):
+        """导入结果中的重复记录说明"""
+        duplicates = result.get('duplicates') or {}
+        if not duplicates.get('in_file') and not duplicates.get('existing'):
+            return ""
+        return (f"\n文件内重复 {duplicates.get('in_file', 0)} 条，与已导入记录重复 {duplicates.get('existing', 0)} 条，"
+                f"未写入 {duplicates.get('skipped', 0)} 条")
+        
+    def offer_error_report(self, result):
+        """有被拒绝的行时提示行数，并可打开错误报告"""
+        if not result.get('error_report'):
+            return
+        reply = QMessageBox.question(
+            self,
+            "错误报告",
+            f"共有 {result['rejected']} 行被拒绝，逐行原因已写入错误报告：\n{result['error_report']}\n\n是否打开错误报告？",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(result['error_report']))
+        
+    def confirm_preview(self, file_path, schema):
+        """导入前预览文件开头和抽样数据，确认字段对应关系"""
+        try:
+            preview = preview_file(file_path, schema)
+        except Exception as e:
+            QMessageBox.warning(self, "预览失败", f"无法读取文件: {str(e)}")
+            return False
+        dialog = ImportPreviewDialog(preview, parent=self)
+        dialog.exec()
+        return dialog.confirmed
+        
+    def ask_month(self, title):
+        """输入导入数据所属月份"""
+        month, ok = QInputDialog.getText(self, title, "所属月份(YYYY-MM):",
+                                         text=datetime.now().strftime('%Y-%m'))
+        if not ok or not month:
+            return None
+        return month.strip()
+        
+    def import_attendance(self):
+        """导入考勤数据"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择考勤文件", "", "考勤文件 (*.xlsx *.xls *.csv)"
+        )
+        if not file_path:
+            return
+        month = self.ask_month("导入考勤数据")
+        if not month:
+            return
+        if not self.confirm_preview(file_path, self.attendance_importer.schema):
+            return
+            
+        importer = self.attendance_importer
+        on_duplicate = self.ui.duplicateMode.currentData()
+        
+        def task(force=False):
+            # 每个班组一个工作表的工作簿，各工作表并行解析后合并导入
+            if not file_path.lower().endswith('.csv') and len(sheet_names(file_path)) > 1:
+                return importer.import_attendance_workbook(file_path, month=month, force=force,
+                                                           on_duplicate=on_duplicate)
+            if not importer.validate_file(file_path):
+                return {'status': 'error', 'message': '文件格式不支持或缺少必要字段'}
+            return importer.import_attendance(file_path, month=month, force=force, on_duplicate=on_duplicate)
+            
+        self.run_import_task(importer, task, self.show_batch_import_result)
+        
+    def import_performance(self):
+        """导入绩效数据：先核对人员信息，确认后再导入"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择绩效文件", "", "绩效文件 (*.xlsx *.xls)"
+        )
+        if not file_path:
+            return
+        month = self.ask_month("导入绩效数据")
+        if not month:
+            return
+        if not self.confirm_preview(file_path, self.performance_importer.schema):
+            return
+            
+        importer = self.performance_importer
+        
+        def task(force=False):
+            # 在工作线程中运行，导入台账须使用导入器当前（工作线程）的连接
+            previous = None if force else ImportLedger(importer.db).find(file_path, 'performance', month)
+            if previous:
+                return ImportLedger.skipped_result(previous)
+            if not importer.validate_file(file_path):
+                return {'status': 'error', 'message': '文件格式不支持或缺少必要字段'}
+            importer.report_progress('核对人员信息')
+            employees = importer.read_employee_columns(file_path)
+            mismatched = importer.validate_employee_info(employees) if '姓名' in employees.columns else []
+            new_employees, removed_employees = importer.check_personnel_changes(employees, month) or ([], [])
+            return {
+                'status': 'checked',
+                'mismatched': mismatched or [],
+                'new_employees': new_employees,
+                'removed_employees': removed_employees
+            }
+            
+        self.pending_performance_import = (file_path, month)
+        self.run_import_task(importer, task, self.on_performance_checked)
+        
+    def on_performance_checked(self, result):
+        """人员核对完成后确认并开始导入绩效"""
+        if result['status'] != 'checked':
+            self.show_import_result(result)
+            return
+            
+        if result['mismatched']:
+            EmployeeMismatchDialog(result['mismatched'], parent=self).exec()
+            return
+            
+        dialog = PerformanceConfirmDialog(result['new_employees'], result['removed_employees'], parent=self)
+        dialog.exec()
+        if not dialog.confirmed:
+            return
+            
+        file_path, month = self.pending_performance_import
+        importer = self.performance_importer
+        # 重复文件已在核对阶段检查过
+        self.run_import_task(
+            importer,
+            lambda force=False: importer.import_performance(file_path, month, force=True),
+            self.show_import_result
+        )
+        
+    def import_reward(self):
+        """导入奖惩数据"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择奖惩文件", "", "奖惩文件 (*.xlsx)"
+        )
+        if not file_path:
+            return
+        month = self.ask_month("导入奖惩数据")
+        if not month:
+            return
+            
+        importer = self.reward_importer
+        on_duplicate = self.ui.duplicateMode.currentData()
+        
+        def task(force=False):
+            if not importer.validate_file(file_path):
+                return {'status': 'error', 'message': '文件格式不正确或缺少必要字段'}
+            return importer.import_rewards(file_path, month, force=force, on_duplicate=on_duplicate)
+            
+        self.run_import_task(importer, task, self.show_import_result)
+        
+    def import_roster(self):
+        """批量导入花名册：按工号新增或更新员工信息"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择花名册文件", "", "花名册文件 (*.xlsx *.xls *.csv)"
+        )
+        if not file_path:
+            return
+        if not self.confirm_preview(file_path, self.employee_importer.schema):
+            return
+            
+        importer = self.employee_importer
+        
+        def task(force=False):
+            if not importer.validate_file(file_path):
+                return {'status': 'error', 'message': '文件格式不支持或缺少必要字段'}
+            return importer.import_employees(file_path, force=force)
+            
+        self.run_import_task(importer, task, self.show_import_result)
+        
+    def run_import_task(self, importer, task, callback):
+        """在后台线程运行导入任务，界面保持响应，完成后在界面线程回调callback(result)"""
+        if self.import_thread is not None:
+            QMessageBox.warning(self, "提示", "已有导入任务正在进行，请稍候")
+            return
+            
+        self.import_callback = callback
+        self.last_import_task = (importer, task, callback)
+        self.set_import_buttons_enabled(False)
+        
+        # 非模态进度窗口，导入期间仍可操作其他页面
+        self.import_progress_dialog = QProgressDialog("正在准备导入...", "取消", 0, 0, self)
+        self.import_progress_dialog.setWindowTitle("导入数据")
+        self.import_progress_dialog.setWindowModality(QtCore.Qt.WindowModality.NonModal)
+        self.import_progress_dialog.setMinimumDuration(0)
+        self.import_progress_dialog.canceled.connect(self.cancel_import)
+        self.import_progress_dialog.show()
+        
+        self.import_thread = QThread(self)
+        self.import_worker = ImportWorker(importer, task, self.db.db_path)
+        self.import_worker.moveToThread(self.import_thread)
+        self.import_thread.started.connect(self.import_worker.run)
+        self.import_worker.progress.connect(self.update_import_progress)
+        self.import_worker.finished.connect(self.on_import_task_finished)
+        self.import_thread.start()
+        
+    def update_import_progress(self, progress):
+        """更新导入进度"""
+        if self.import_progress_dialog is None:
+            return
+        self.import_progress_dialog.setLabelText(
+            f"{progress['stage']}：已读取 {progress['rows_read']} 行，已写入 {progress['rows_written']} 行"
+        )
+        
+    def cancel_import(self):
+        """取消正在进行的导入"""
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+            
+    def on_import_task_finished(self, result):
+        """后台导入任务结束"""
+        self.import_thread.quit()
+        self.import_thread.wait()
+        self.import_thread.deleteLater()
+        self.import_worker.deleteLater()
+        self.import_thread = None
+        self.import_worker = None
+        
+        self.import_progress_dialog.canceled.disconnect(self.cancel_import)
+        self.import_progress_dialog.close()
+        self.import_progress_dialog = None
+        self.set_import_buttons_enabled(True)
+        
+        callback, self.import_callback = self.import_callback, None
+        callback(result)
+        
+    def set_import_buttons_enabled(self, enabled):
+        """导入期间禁用各导入按钮"""
+        self.ui.upload.setEnabled(enabled)
+        self.ui.upload2.setEnabled(enabled)
+        self.ui.uploadReward.setEnabled(enabled)
+        self.ui.uploadBatch.setEnabled(enabled)
+        self.ui.importRoster.setEnabled(enabled)
+        
+    def show_import_result(self, result):
+        """显示导入结果"""
+        if result['status'] == 'success':
+            resumed = f"\n（从第 {result['resumed_rows']} 行后的断点继续导入）" if result.get('resumed_rows') else ""
+            upserted = f"\n新增 {result['inserted']} 人，更新 {result['updated']} 人" if 'inserted' in result else ""
+            QMessageBox.information(
+                self, "导入完成",
+                f"共 {result.get('total', result['success'])} 条记录，成功 {result['success']} 条，"
+                f"失败 {result.get('failed', 0)} 条{upserted}{self.describe_duplicates(result)}{resumed}"
+            )
+        elif result['status'] == 'cancelled':
+            resume_hint = "，再次导入该文件将从断点继续" if result.get('success') else ""
+            QMessageBox.information(self, "导入已取消",
+                                    f"取消前已写入 {result.get('success', 0)} 条记录{resume_hint}")
+        elif result['status'] == 'skipped':
+            reply = QMessageBox.question(
+                self,
+                "重复文件",
+                f"{result['message']}\n\n是否仍要重新导入？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                importer, task, callback = self.last_import_task
+                self.run_import_task(importer, lambda: task(force=True), callback)
+        else:
+            QMessageBox.warning(self, "导入失败", result.get('message', '未知错误'))
+        self.offer_error_report(result)
+            
+
     def show_backup_settings(self):
         """显示备份设置页面"""
         self.ui.stackedWidget.setCurrentWidget(self.ui.backupPage)
@@ -129,6 +485,11 @@ class MainWindow(QDialog):
     def closeEvent(self, event):
         """窗口关闭时的处理"""
         self.settings.sync()  # 保存设置
+        if self.import_thread is not None:
+            # 先取消导入并等待后台线程回滚、关闭其连接
+            self.import_worker.cancel()
+            self.import_thread.quit()
+            self.import_thread.wait()
         self.db.close()
         event.accept()
 
@@ -136,6 +497,7 @@ class MainWindow(QDialog):
         """禁用所有功能按钮"""
         self.ui.upload.setEnabled(False)
         self.ui.upload2.setEnabled(False)
+        self.ui.uploadBatch.setEnabled(False)
         self.ui.importRoster.setEnabled(False)
         self.ui.addEmployee.setEnabled(False)
         self.ui.backupDatabase.setEnabled(False)
@@ -147,6 +509,7 @@ class MainWindow(QDialog):
         """启用所有功能按钮"""
         self.ui.upload.setEnabled(True)
         self.ui.upload2.setEnabled(True)
+        self.ui.uploadBatch.setEnabled(True)
         self.ui.importRoster.setEnabled(True)
         self.ui.addEmployee.setEnabled(True)
         self.ui.backupDatabase.setEnabled(True)
@@ -159,6 +522,7 @@ class MainWindow(QDialog):
         """启用所有功能按钮"""
         self.ui.upload.setEnabled(True)
         self.ui.upload2.setEnabled(True)
+        self.ui.uploadBatch.setEnabled(True)
         self.ui.importRoster.setEnabled(True)
         self.ui.addEmployee.setEnabled(True)
         self.ui.backupDatabase.setEnabled(True)
@@ -230,12 +594,14 @@ class MainWindow(QDialog):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                self.db.conn.begin()
+                if not self.db.conn.in_transaction:
+                    self.db.conn.execute("BEGIN")
                 # 删除相关的社保项目
                 self.db.cursor.execute('DELETE FROM insurance_items WHERE group_id = ?', (group_id,))
                 # 删除配置组
                 self.db.cursor.execute('DELETE FROM insurance_groups WHERE id = ?', (group_id,))
                 self.db.conn.commit()
+                config_cache.invalidate('insurance_groups')
                 self.load_insurance_groups()
                 QMessageBox.information(self, "成功", "社保配置组删除成功")
             except Exception as e:
@@ -309,6 +675,7 @@ class MainWindow(QDialog):
                 VALUES (?, ?, ?, ?)
             ''', (name, level, amount, remark))
             self.db.conn.commit()
+            config_cache.invalidate('salary_items')
             self.load_salary_items()
             QMessageBox.information(self, "成功", "薪酬项添加成功")
         except Exception as e:
@@ -345,6 +712,7 @@ class MainWindow(QDialog):
                 WHERE id = ?
             ''', (name, level, amount, remark, item_id))
             self.db.conn.commit()
+            config_cache.invalidate('salary_items')
             self.load_salary_items()
             QMessageBox.information(self, "成功", "薪酬项更新成功")
         except Exception as e:
@@ -363,6 +731,7 @@ class MainWindow(QDialog):
             try:
                 self.db.cursor.execute('DELETE FROM salary_items WHERE id = ?', (item_id,))
                 self.db.conn.commit()
+                config_cache.invalidate('salary_items')
                 self.load_salary_items()
                 QMessageBox.information(self, "成功", "薪酬项删除成功")
             except Exception as e:
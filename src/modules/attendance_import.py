@@ -1,12 +1,46 @@
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
+from datetime import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import logging
 import os
+from src.db.database import get_connection
+from src.modules.file_cache import parsed_file_cache
+from src.modules.readers import sniff_csv, sheet_names
+from src.modules.import_progress import ImportProgress, ImportCancelled
+from src.modules.import_ledger import ImportLedger
+from src.modules.import_checkpoint import ImportCheckpoint, split_rows, skip_rows
+from src.modules.duplicates import DuplicateRecordError, resolve_duplicates, merge_stats
+from src.modules.incremental_import import diff_records, apply_diff, summarize_diff
+from src.modules.import_schema import Column, ImportSchema
+from src.modules.error_report import ErrorReport, row_labels
 
-class AttendanceImporter:
-    def __init__(self, db_connection):
+class AttendanceImporter(ImportProgress):
+    # 文件字段与attendance表字段的对应关系
+    db_columns = {
+        '员工编号': 'emp_id',
+        '日期': 'date',
+        '出勤天数': 'attendance_days',
+        '加班时长': 'overtime_hours'
+    }
+    # attendance表的唯一键
+    key = ['emp_id', 'date']
+    
+    # 上传文件的字段声明
+    schema = ImportSchema([
+        Column('员工编号', 'str', aliases=['工号']),
+        Column('姓名', 'str'),
+        Column('出勤天数', 'number'),
+        Column('日期', 'date', required=False, nullable=True),
+        Column('加班时长', 'number', required=False, nullable=True, default=0)
+    ])
+    
+    def __init__(self, db_connection, chunk_size: int = 10000):
         self.db = db_connection
         self.supported_formats = ['.xlsx', '.xls', '.csv']
+        # CSV流式导入时每批读取的行数，决定导入过程的内存上限
+        self.chunk_size = chunk_size
         
     def validate_file(self, file_path: str) -> bool:
         """验证文件格式和基本结构"""
@@ -19,13 +53,13 @@ class AttendanceImporter:
                 
             # 读取文件头验证必要字段
             if ext == '.csv':
-                df = pd.read_csv(file_path, nrows=0)
+                # CSV采用流式导入，这里只读表头
+                df = pd.read_csv(file_path, nrows=0, **sniff_csv(file_path))
             else:
-                # 使用openpyxl引擎读取Excel文件，并指定sheet_name
-                df = pd.read_excel(file_path, nrows=0, engine='openpyxl', sheet_name=0)
+                # Excel解析结果进入共享缓存，导入时直接复用
+                df = parsed_file_cache.read(file_path, sheet_name=0)
                 
-            required_fields = ['员工编号', '姓名', '出勤天数']
-            missing_fields = [field for field in required_fields if field not in df.columns]
+            missing_fields = self.schema.missing_columns(df.columns)
             
             if missing_fields:
                 logging.error(f"缺少必要字段: {', '.join(missing_fields)}")
@@ -37,77 +71,493 @@ class AttendanceImporter:
             logging.error(f"文件验证失败: {str(e)}")
             return False
     
-    def import_attendance(self, file_path: str, mapping: Dict = None) -> Dict:
-        """导入考勤数据"""
+    def import_attendance(self, file_path: str, mapping: Dict = None, month: str = None,
+                          chunk_size: int = None, force: bool = False, on_duplicate: str = 'skip') -> Dict:
+        """导入考勤数据
+        
+        CSV文件按chunk_size分块读取，每块清洗后立即写入数据库，
+        内存占用只与块大小有关，与文件大小无关。
+        每块与断点位置在同一事务内提交，导入中断或取消后再次导入同一文件时从断点继续。
+        同一员工同一日期的重复记录按on_duplicate处理（skip/overwrite/reject），
+        reject时先检查整个文件，有重复则不写入任何数据。
+        校验不合格、重复跳过和写入失败的行逐行写入错误报告，结果中给出拒绝行数和报告路径。
+        同一文件已导入过该月份时直接跳过，force=True时强制重新导入
+        """
+        month = month or datetime.now().strftime('%Y-%m')
+        chunk_size = chunk_size or self.chunk_size
+        rows_read = 0
+        total = 0
+        success_count = 0
+        duplicates = {}
+        report = ErrorReport.for_import('attendance', file_path, self.error_report_dir)
         try:
-            # 读取文件
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path, engine='openpyxl')
+            # 重复文件只需计算哈希，不做任何解析
+            ledger = ImportLedger(self.db)
+            previous = None if force else ledger.find(file_path, 'attendance', month)
+            if previous:
+                return ledger.skipped_result(previous)
+            started = time.perf_counter()
             
-            # 数据验证和清洗
-            df = self.clean_data(df)
+            # 上次中断时已提交的部分不再清洗和写入
+            checkpoint = ImportCheckpoint(self.db, file_path, 'attendance', month)
+            resumed = checkpoint.load()
+            if resumed:
+                rows_read, total, success_count = resumed['rows'], resumed['total'], resumed['success']
             
-            # 应用字段映射
-            if mapping:
-                # 确保所有必要字段都在映射中
-                required_fields = ['员工编号', '姓名', '出勤天数']
-                for field in required_fields:
-                    if field not in mapping and field not in df.columns:
-                        raise ValueError(f"缺少必要字段: {field}")
-                df = df.rename(columns=mapping)
+            self.report_progress('读取文件', rows_read, success_count)
             
-            # 保存到数据库
-            success_count = self.save_to_database(df)
+            if on_duplicate == 'reject' and not resumed:
+                self.report_progress('检查重复记录')
+                self.check_duplicates(file_path, month, mapping, chunk_size)
             
-            return {
+            for chunk in skip_rows(self.read_chunks(file_path, chunk_size), rows_read):
+                # 索引统一为数据行序号，错误报告据此给出行号
+                chunk = chunk.set_axis(pd.RangeIndex(rows_read, rows_read + len(chunk)))
+                rows_read += len(chunk)
+                
+                # 数据验证和清洗
+                df = self.clean_data(chunk, report)
+                
+                # 应用字段映射
+                df = self.apply_mapping(df, mapping)
+                
+                # 保存到数据库；total为文件中的数据行数，被拒绝的行计入失败
+                total += len(chunk)
+                success_count += self.save_to_database(df, month, checkpoint, (rows_read, total, success_count),
+                                                       on_duplicate, duplicates, report)
+                self.report_progress('写入数据库', rows_read, success_count)
+            
+            skipped = duplicates.get('skipped', 0)
+            result = {
                 'status': 'success',
-                'total': len(df),
+                'total': total,
                 'success': success_count,
-                'failed': len(df) - success_count
+                'failed': total - success_count - skipped,
+                'duplicates': duplicates
             }
+            result.update(report.summary())
+            if resumed:
+                result['resumed_rows'] = resumed['rows']
+            checkpoint.clear()
+            ledger.record(file_path, 'attendance', month, result, time.perf_counter() - started)
+            return result
             
+        except ImportCancelled:
+            # 已提交的分块保留在数据库中，断点供下次继续导入
+            return dict({
+                'status': 'cancelled',
+                'total': total,
+                'success': success_count,
+                'failed': total - success_count - duplicates.get('skipped', 0),
+                'duplicates': duplicates
+            }, **report.summary())
         except Exception as e:
             logging.error(f"考勤导入失败: {str(e)}")
             return {
                 'status': 'error',
                 'message': str(e)
             }
+        finally:
+            report.close()
+    
+    def read_chunks(self, file_path: str, chunk_size: int):
+        """按块读取文件：CSV流式分块读取，Excel整表解析后切分"""
+        if file_path.endswith('.csv'):
+            # 编码和分隔符只根据文件开头识别一次，整个文件按识别结果读取一遍
+            return pd.read_csv(
+                file_path,
+                dtype=self.schema.dtypes,
+                **sniff_csv(file_path),
+                chunksize=chunk_size
+            )
+        return split_rows(parsed_file_cache.read(file_path, sheet_name=0), chunk_size)
+    
+    def check_duplicates(self, file_path: str, month: str, mapping: Dict = None, chunk_size: int = None):
+        """写入前检查整个文件的重复记录，有重复时抛出DuplicateRecordError
+        
+        只保留各块的键列，文件内重复和库中已有记录各一次向量化判断
+        """
+        keys = [
+            self.to_records(self.apply_mapping(self.clean_data(chunk), mapping), month)[self.key]
+            for chunk in self.read_chunks(file_path, chunk_size or self.chunk_size)
+        ]
+        keys = pd.concat(keys, ignore_index=True) if keys else pd.DataFrame(columns=self.key)
+        conn = get_connection(self.db) if self.db is not None else None
+        resolve_duplicates(conn, 'attendance', self.key, keys, 'reject')
+    
+    def reimport_attendance(self, file_path: str, month: str, mapping: Dict = None,
+                            delete_missing: bool = False, dry_run: bool = False) -> Dict:
+        """增量重新导入某月考勤
+        
+        以(emp_id, date)为键、行哈希比较新文件与库中该月已有数据，
+        只对新增、修改、删除的记录写库，并返回差异报告。
+        考勤按分支机构分文件上传，默认只与文件中出现的员工的已有记录比较，
+        其他员工的考勤不受影响；delete_missing=True时与该月全部考勤比较，
+        文件中没有的记录都会删除。dry_run=True时只返回差异报告（含将删除的记录），不写库。
+        文件内重复的键保留最后一条，其余计入duplicates并写入错误报告。
+        不按导入台账跳过：之前导入过的文件也重新比较，可用于把该月恢复为旧文件的内容
+        """
+        key = ['emp_id', 'date']
+        values = ['attendance_days', 'overtime_hours']
+        conn = get_connection(self.db)
+        report = ErrorReport.for_import('attendance', file_path, self.error_report_dir)
+        try:
+            ledger = ImportLedger(self.db)
+            started = time.perf_counter()
+            
+            self.report_progress('读取文件')
+            raw = parsed_file_cache.read(file_path)
+            df = self.apply_mapping(self.clean_data(raw, report), mapping)
+            new = self.to_records(df, month)
+            write, duplicates = resolve_duplicates(None, 'attendance', key, new, 'overwrite', report)
+            new = new[write]
+            duplicates['skipped'] = int((~write).sum())
+            
+            # 只读取该月已有记录，走attendance(date)索引
+            self.report_progress('比较差异', len(new))
+            start_date = f"{month}-01"
+            end_date = (datetime.strptime(start_date, '%Y-%m-%d') + pd.DateOffset(months=1)).strftime('%Y-%m-%d')
+            old = pd.read_sql_query(
+                "SELECT emp_id, date, attendance_days, overtime_hours FROM attendance "
+                "WHERE date >= ? AND date < ?",
+                conn, params=(start_date, end_date)
+            ).astype({'emp_id': str, 'date': str, 'attendance_days': float, 'overtime_hours': float})
+            if not delete_missing:
+                old = old[old['emp_id'].isin(new['emp_id'])]
+            diff = diff_records(new, old, key, values)
+            
+            result = dict(summarize_diff(diff, key), status='preview' if dry_run else 'success', total=len(raw),
+                          success=len(new), failed=len(raw) - len(new) - duplicates['skipped'],
+                          duplicates=duplicates, **report.summary())
+            if dry_run:
+                return result
+            
+            apply_diff(conn, 'attendance', key, values, diff)
+            conn.commit()
+            ledger.record(file_path, 'attendance', month, result, time.perf_counter() - started)
+            return result
+            
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"考勤增量导入失败: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+        finally:
+            report.close()
     
-    def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """数据清洗和验证"""
-        # 创建副本避免警告
-        df = df.copy()
+    def import_attendance_files(self, paths: Union[str, List[str]], mapping: Dict = None,
+                                month: str = None, max_workers: int = None, force: bool = False,
+                                on_duplicate: str = 'skip') -> Dict:
+        """并行导入多个考勤文件
         
-        # 移除空行
-        df = df.dropna(subset=['员工编号', '姓名'])
+        paths可以是目录或文件列表。各文件在工作进程中并行解析和清洗，
+        结果由当前进程统一写入数据库（SQLite只允许单个写入者），每个文件提交一次。
+        各文件被拒绝的行汇总到同一份错误报告，行号形如"文件名!行号"。
+        已导入过的文件不再解析，在结果中标记为skipped
+        """
+        month = month or datetime.now().strftime('%Y-%m')
+        if isinstance(paths, str):
+            paths = [
+                os.path.join(paths, name) for name in sorted(os.listdir(paths))
+                if os.path.splitext(name.lower())[1] in self.supported_formats
+            ]
         
-        # 数据类型转换
-        # 使用astype进行强制类型转换
-        df['出勤天数'] = pd.to_numeric(df['出勤天数'], errors='coerce')
-        if '加班时长' in df.columns:
-            df['加班时长'] = pd.to_numeric(df['加班时长'], errors='coerce').fillna(0)
+        files = []
+        ledger = ImportLedger(self.db)
+        pending = []
+        for path in paths:
+            previous = None if force else ledger.find(path, 'attendance', month)
+            if previous:
+                files.append(dict(ledger.skipped_result(previous), file=path))
+            else:
+                pending.append(path)
+        paths = pending
         
-        # 删除无效的数值记录
-        df = df.dropna(subset=['出勤天数'])
+        rows_read = 0
+        rows_written = 0
+        cancelled = False
+        report = ErrorReport.for_import('attendance', '批量导入', self.error_report_dir)
+        with report, ProcessPoolExecutor(max_workers=max_workers) as pool:
+            # 文件哈希在本进程计算一次（台账也要用），传给工作进程读取暂存副本时复用
+            futures = [pool.submit(parse_attendance_file, path, mapping, report.part_path(i),
+                                   ImportLedger.hash_file(path))
+                       for i, path in enumerate(paths)]
+            try:
+                # 按提交顺序依次写入，解析慢的文件不会阻塞其他文件的解析
+                for path, future in zip(paths, futures):
+                    try:
+                        started = time.perf_counter()
+                        rejected = report.rows
+                        rows, df, rejections = future.result()
+                        report.absorb(rejections)
+                        rows_read += rows
+                        duplicates = {}
+                        success_count = self.save_to_database(df, month, on_duplicate=on_duplicate,
+                                                              duplicates=duplicates, report=report)
+                        rows_written += success_count
+                        file_result = {
+                            'file': path,
+                            'status': 'success',
+                            'total': rows,
+                            'success': success_count,
+                            'failed': rows - success_count - duplicates.get('skipped', 0),
+                            'duplicates': duplicates,
+                            'rejected': report.rows - rejected
+                        }
+                        ledger.record(path, 'attendance', month, file_result, time.perf_counter() - started)
+                        files.append(file_result)
+                    except Exception as e:
+                        logging.error(f"考勤导入失败 {path}: {str(e)}")
+                        files.append({'file': path, 'status': 'error', 'message': str(e)})
+                    self.report_progress(f"已导入 {os.path.basename(path)}", rows_read, rows_written)
+            except ImportCancelled:
+                # 尚未开始解析的文件不再处理，已写入的文件保留
+                cancelled = True
+                for future in futures:
+                    future.cancel()
         
-        return df
+        succeeded = [f for f in files if f['status'] in ('success', 'skipped')]
+        total = sum(f['total'] for f in succeeded)
+        success_count = sum(f['success'] for f in succeeded)
+        duplicates = {}
+        for f in succeeded:
+            merge_stats(duplicates, f.get('duplicates', {}))
+        return dict({
+            'status': 'cancelled' if cancelled else 'success' if len(succeeded) == len(files) else 'partial',
+            'total': total,
+            'success': success_count,
+            'failed': total - success_count - duplicates.get('skipped', 0),
+            'duplicates': duplicates,
+            'files': files
+        }, **report.summary())
     
-    def save_to_database(self, df: pd.DataFrame) -> int:
-        """保存考勤数据到数据库"""
+    def import_attendance_workbook(self, file_path: str, mapping: Dict = None, month: str = None,
+                                   max_workers: int = None, force: bool = False,
+                                   on_duplicate: str = 'skip') -> Dict:
+        """导入每个班组一个工作表的考勤工作簿
+        
+        各工作表在工作进程中并行校验表头、解析和清洗，总耗时接近最大的一个工作表；
+        合并后一次写入数据库，结果中按工作表列出统计。缺少必要字段的工作表不导入，
+        不含任何内容的工作表跳过。被拒绝的行汇总到同一份错误报告，行号形如"工作表!行号"
+        """
+        month = month or datetime.now().strftime('%Y-%m')
+        report = ErrorReport.for_import('attendance', file_path, self.error_report_dir)
+        try:
+            ledger = ImportLedger(self.db)
+            previous = None if force else ledger.find(file_path, 'attendance', month)
+            if previous:
+                return ledger.skipped_result(previous)
+            started = time.perf_counter()
+            
+            self.report_progress('读取工作表')
+            names = sheet_names(file_path)
+            sheets = {}
+            frames = {}
+            rows_read = 0
+            parts = {}
+            # 各工作表的工作进程复用本进程算出的文件哈希，不再各自计算整个工作簿的哈希
+            file_hash = ImportLedger.hash_file(file_path)
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    pool.submit(parse_attendance_sheet, file_path, name, mapping, report.part_path(i), file_hash): name
+                    for i, name in enumerate(names)
+                }
+                try:
+                    for future in as_completed(futures):
+                        name = futures[future]
+                        try:
+                            rows, df, parts[name] = future.result()
+                            rows_read += rows
+                            if df is None:
+                                sheets[name] = {'sheet': name, 'status': 'skipped', 'message': '空工作表',
+                                                'total': 0, 'success': 0, 'failed': 0}
+                            else:
+                                frames[name] = df
+                                sheets[name] = {'sheet': name, 'status': 'success', 'total': rows,
+                                                'success': len(df), 'failed': rows - len(df),
+                                                'rejected': parts[name]['rejected']}
+                        except Exception as e:
+                            logging.error(f"考勤工作表解析失败 {name}: {str(e)}")
+                            sheets[name] = {'sheet': name, 'status': 'error', 'message': str(e)}
+                        self.report_progress(f"已解析工作表 {name}", rows_read)
+                except ImportCancelled:
+                    # 尚未开始解析的工作表不再处理，此时还没有写入任何数据
+                    for future in futures:
+                        future.cancel()
+                    raise
+            
+            # 按工作表顺序合并部分报告和数据，所有工作表一次写入
+            self.report_progress('写入数据库', rows_read)
+            for name in names:
+                if name in parts:
+                    report.absorb(parts[name])
+            merged = [frames[name] for name in names if name in frames]
+            records = pd.concat(merged) if merged else pd.DataFrame()
+            duplicates = {}
+            success_count = self.save_to_database(records, month, on_duplicate=on_duplicate,
+                                                  duplicates=duplicates, report=report)
+            if success_count + duplicates.get('skipped', 0) < len(records):
+                return {'status': 'error', 'message': '保存到数据库失败',
+                        'sheets': [sheets[name] for name in names]}
+            self.report_progress('写入数据库', rows_read, success_count)
+            
+            succeeded = [sheet for sheet in sheets.values() if sheet['status'] != 'error']
+            total = sum(sheet['total'] for sheet in succeeded)
+            result = {
+                'status': 'success' if len(succeeded) == len(names) else 'partial',
+                'total': total,
+                'success': success_count,
+                'failed': total - success_count - duplicates.get('skipped', 0),
+                'duplicates': duplicates,
+                'sheets': [sheets[name] for name in names]
+            }
+            result.update(report.summary())
+            if result['status'] == 'success':
+                ledger.record(file_path, 'attendance', month, result, time.perf_counter() - started)
+            return result
+            
+        except ImportCancelled:
+            return {'status': 'cancelled', 'total': 0, 'success': 0, 'failed': 0}
+        except Exception as e:
+            logging.error(f"考勤导入失败: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+        finally:
+            report.close()
+    
+    def apply_mapping(self, df: pd.DataFrame, mapping: Dict = None) -> pd.DataFrame:
+        """应用字段映射"""
+        if not mapping:
+            return df
+            
+        # 确保所有必要字段都在映射中
+        for field in self.schema.required:
+            if field not in mapping and field not in df.columns:
+                raise ValueError(f"缺少必要字段: {field}")
+        return df.rename(columns=mapping)
+    
+    def clean_data(self, df: pd.DataFrame, report: ErrorReport = None) -> pd.DataFrame:
+        """数据清洗和验证：按schema转换类型，去掉员工编号、姓名为空或出勤天数无效的行
+
+        传入report时去掉的行写入错误报告，行号由df的索引得出
+        """
+        return self.schema.clean(df, report)
+    
+    def to_records(self, df: pd.DataFrame, month: str = None) -> pd.DataFrame:
+        """将清洗后的数据转换为attendance表的字段和类型"""
+        records = df.rename(columns=self.db_columns)
+        # 月度汇总考勤没有日期列（或日期为空），按所属月份的第一天记录；
+        # 日期已由schema统一为YYYY-MM-DD，不同格式的文件得到相同的键
+        first_day = f"{month or datetime.now().strftime('%Y-%m')}-01"
+        records['date'] = records['date'].fillna(first_day) if 'date' in records.columns else first_day
+        if 'overtime_hours' not in records.columns:
+            records['overtime_hours'] = 0
+            
+        return pd.DataFrame({
+            'emp_id': records['emp_id'].astype(str),
+            'date': records['date'].astype(str),
+            'attendance_days': records['attendance_days'].astype(float),
+            'overtime_hours': records['overtime_hours'].astype(float)
+        })
+    
+    def save_to_database(self, df: pd.DataFrame, month: str = None,
+                         checkpoint: ImportCheckpoint = None, position: tuple = (0, 0, 0),
+                         on_duplicate: str = 'skip', duplicates: Dict = None,
+                         report: ErrorReport = None) -> int:
+        """保存考勤数据到数据库，返回写入的行数
+        
+        同一员工同一日期的重复记录按on_duplicate处理，统计累加到duplicates；
+        传入report时跳过的重复行和写入失败的行写入错误报告。
+        传入checkpoint时，本批数据与断点位置(已处理行数, 有效行数, 此前已写入行数)
+        在同一个SAVEPOINT内提交，断点总是与已写入的数据一致
+        """
         try:
             if self.db is None:
                 # 测试模式，直接返回行数
                 return len(df)
+            
+            if df.empty and checkpoint is None:
+                return 0
                 
-            # TODO: 实现实际的数据库保存逻辑
-            # cursor = self.db.cursor()
-            # for _, row in df.iterrows():
-            #     cursor.execute(...)
-            # self.db.commit()
+            conn = get_connection(self.db)
+            conn.execute("SAVEPOINT attendance_batch")
+            written = 0
+            try:
+                if not df.empty:
+                    records = self.to_records(df, month)
+                    write, stats = resolve_duplicates(conn, 'attendance', self.key, records, on_duplicate, report)
+                    if duplicates is not None:
+                        merge_stats(duplicates, dict(stats, skipped=int((~write).sum())))
+                    records = records[write]
+                    records = records.astype(object).where(records.notna(), None)
+                    conn.executemany(
+                        "INSERT INTO attendance (emp_id, date, attendance_days, overtime_hours) "
+                        "VALUES (?, ?, ?, ?)",
+                        records.itertuples(index=False, name=None)
+                    )
+                    written = len(records)
+                if checkpoint is not None:
+                    rows_read, total, success_count = position
+                    checkpoint.save(conn, rows_read, total, success_count + written)
+                conn.execute("RELEASE attendance_batch")
+            except Exception:
+                conn.execute("ROLLBACK TO attendance_batch")
+                conn.execute("RELEASE attendance_batch")
+                raise
+            conn.commit()
             
-            return len(df)
+            return written
+        except DuplicateRecordError:
+            raise
         except Exception as e:
             logging.error(f"保存到数据库失败: {str(e)}")
-            return 0
\ No newline at end of file
+            get_connection(self.db).rollback()
+            if report is not None:
+                report.add_rows((row, '', f"保存到数据库失败: {str(e)}", None) for row in row_labels(df.index))
+            return 0
+
+parsed_file_cache.register_schema(AttendanceImporter.schema)
+
+def parse_attendance_file(file_path: str, mapping: Dict, report_path: str,
+                          file_hash: str = None) -> Tuple[int, pd.DataFrame, Dict]:
+    """在工作进程中验证、解析并清洗单个考勤文件
+
+    索引为(文件名, 数据行序号)；去掉的行写入report_path处的部分报告，
+    返回原始行数、清洗后的数据和报告统计。file_hash为主进程已算出的文件哈希
+    """
+    if file_hash:
+        ImportLedger.remember_hash(file_path, file_hash)
+    importer = AttendanceImporter(None)
+    if not importer.validate_file(file_path):
+        raise ValueError("文件格式不支持或缺少必要字段")
+    raw = parsed_file_cache.read(file_path)
+    raw = raw.set_axis(pd.MultiIndex.from_product([[os.path.basename(file_path)], range(len(raw))]))
+    with ErrorReport(report_path) as report:
+        df = importer.clean_data(raw, report)
+    return len(raw), importer.apply_mapping(df, mapping), report.summary()
+
+def parse_attendance_sheet(file_path: str, sheet_name, mapping: Dict,
+                           report_path: str, file_hash: str = None) -> Tuple[int, pd.DataFrame, Dict]:
+    """在工作进程中校验表头、解析并清洗工作簿中的一个工作表
+
+    索引为(工作表名, 数据行序号)；去掉的行写入report_path处的部分报告。
+    返回原始行数、清洗后的数据和报告统计，空工作表返回(0, None, 报告统计)。
+    file_hash为主进程已算出的文件哈希
+    """
+    if file_hash:
+        ImportLedger.remember_hash(file_path, file_hash)
+    importer = AttendanceImporter(None)
+    with ErrorReport(report_path) as report:
+        raw = parsed_file_cache.read(file_path, sheet_name=sheet_name)
+        if raw.empty and len(raw.columns) == 0:
+            return 0, None, report.summary()
+        missing_fields = importer.schema.missing_columns(raw.columns)
+        if missing_fields:
+            raise ValueError(f"缺少必要字段: {', '.join(missing_fields)}")
+        raw = raw.set_axis(pd.MultiIndex.from_product([[sheet_name], range(len(raw))]))
+        df = importer.clean_data(raw, report)
+    return len(raw), importer.apply_mapping(df, mapping), report.summary()
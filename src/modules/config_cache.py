@@ -0,0 +1,97 @@
+from collections import OrderedDict
+from typing import Dict
+import threading
+import json
+import pandas as pd
+
+def parse_performance_rule(rule) -> Dict:
+    """解析薪资组的绩效规则JSON，缺省时绩效工资基数为0、满分为100"""
+    rule = json.loads(rule) if isinstance(rule, str) and rule else (rule or {})
+    return {'performance_base': float(rule.get('base', 0)), 'full_score': float(rule.get('full_score', 100))}
+
+class ConfigCache:
+    """薪资配置表的进程内缓存
+
+    薪资组、社保配置组（含社保项目）和薪酬项各在首次使用时整表读取一次，
+    之后直接返回同一份结果，计算薪资时不再按员工查询配置。
+    写入这些表的地方在提交后调用invalidate清除对应部分，下次使用时重新读取。
+    按数据库连接分别缓存，超过容量时淘汰最久未使用的连接；
+    返回的DataFrame和字典是共享对象，调用方不得原地修改。
+    """
+    SECTIONS = ('salary_groups', 'insurance_groups', 'salary_items')
+
+    def __init__(self, max_connections: int = 4):
+        self.max_connections = max_connections
+        # id(连接) -> (连接, {部分: 数据})，保留连接的引用以免id被新连接复用
+        self._entries = OrderedDict()
+        # 各部分被清除的次数；读取期间被清除过的结果已过时，不放入缓存
+        self._generations = dict.fromkeys(self.SECTIONS, 0)
+        self._lock = threading.Lock()
+
+    def salary_groups(self, conn) -> pd.DataFrame:
+        """全部薪资组，绩效规则解析为performance_base和full_score两列"""
+        return self._get(conn, 'salary_groups', self._load_salary_groups)
+
+    def insurance_groups(self, conn) -> pd.DataFrame:
+        """全部社保配置组及其各项目公司、个人缴纳比例之和"""
+        return self._get(conn, 'insurance_groups', self._load_insurance_groups)
+
+    def salary_items(self, conn) -> Dict:
+        """薪酬项名称到金额的映射"""
+        return self._get(conn, 'salary_items', self._load_salary_items)
+
+    def invalidate(self, *sections: str):
+        """清除所有连接上指定部分的缓存，不指定时全部清除"""
+        sections = sections or self.SECTIONS
+        with self._lock:
+            for section in sections:
+                self._generations[section] += 1
+            for _, data in self._entries.values():
+                for section in sections:
+                    data.pop(section, None)
+
+    def _get(self, conn, section: str, load):
+        with self._lock:
+            entry = self._entries.get(id(conn))
+            if entry is not None and entry[0] is conn:
+                self._entries.move_to_end(id(conn))
+                if section in entry[1]:
+                    return entry[1][section]
+            generation = self._generations[section]
+
+        value = load(conn)
+
+        with self._lock:
+            if self._generations[section] != generation:
+                return value
+            entry = self._entries.get(id(conn))
+            if entry is None or entry[0] is not conn:
+                entry = self._entries[id(conn)] = (conn, {})
+            entry[1][section] = value
+            while len(self._entries) > self.max_connections:
+                self._entries.popitem(last=False)
+        return value
+
+    def _load_salary_groups(self, conn) -> pd.DataFrame:
+        groups = pd.read_sql_query('''
+            SELECT group_id, base_salary, performance_rule, social_security_base, insurance_group_id, formula
+            FROM salary_groups
+        ''', conn)
+        # 薪资组数量很少，逐组解析绩效规则
+        rules = pd.DataFrame([parse_performance_rule(rule) for rule in groups.pop('performance_rule')],
+                             columns=['performance_base', 'full_score'], index=groups.index)
+        return groups.join(rules)
+
+    def _load_insurance_groups(self, conn) -> pd.DataFrame:
+        return pd.read_sql_query('''
+            SELECT g.id, g.name, g.location, g.base_amount,
+                   SUM(i.company_rate) AS company_rate, SUM(i.personal_rate) AS personal_rate
+            FROM insurance_groups g LEFT JOIN insurance_items i ON i.group_id = g.id
+            GROUP BY g.id
+        ''', conn)
+
+    def _load_salary_items(self, conn) -> Dict:
+        return {name: float(amount or 0) for name, amount in
+                conn.execute("SELECT name, amount FROM salary_items").fetchall()}
+
+config_cache = ConfigCache()
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+from src.db.database import temp_table
+from src.modules.error_report import row_labels
+
+# 重复记录的处理方式：跳过新记录、覆盖已有记录、拒绝导入
+DUPLICATE_MODES = ('skip', 'overwrite', 'reject')
+
+class DuplicateRecordError(ValueError):
+    """on_duplicate='reject'时发现重复记录
+
+    positions为重复行在传入数据中的位置，row_message为逐行报告时的说明
+    """
+    def __init__(self, message: str, positions: List[int], row_message: str):
+        super().__init__(message)
+        self.positions = positions
+        self.row_message = row_message
+
+def file_duplicates(df: pd.DataFrame, key: List[str], keep='first') -> np.ndarray:
+    """按键列的行哈希标记文件内的重复行
+
+    keep='first'/'last'保留第一条/最后一条，keep=False时标记所有重复的行
+    """
+    hashes = pd.util.hash_pandas_object(df[key], index=False)
+    return hashes.duplicated(keep=keep).to_numpy()
+
+def resolve_duplicates(conn, table: str, key: List[str], df: pd.DataFrame,
+                       on_duplicate: str = 'skip', report=None, row_numbers=None) -> Tuple[np.ndarray, Dict]:
+    """处理文件内和库中已有的重复记录，返回需要写入的行的标记及重复统计
+
+    skip保留文件中第一条并跳过库中已有的键；overwrite保留文件中最后一条，
+    并在调用方的事务内删除库中的旧记录；reject发现任何重复即抛出DuplicateRecordError。
+    库中是否已有相同键通过临时表一次查询得出，不逐行查询。
+    传入report（ErrorReport）时未写入的重复行写入错误报告，行号默认由索引得出（见row_labels）
+    """
+    if on_duplicate not in DUPLICATE_MODES:
+        raise ValueError(f"不支持的重复处理方式: {on_duplicate}")
+
+    keep = {'skip': 'first', 'overwrite': 'last', 'reject': False}[on_duplicate]
+    in_file = file_duplicates(df, key, keep)
+    if on_duplicate == 'reject' and in_file.any():
+        raise DuplicateRecordError(
+            f"文件中有 {int(in_file.sum())} 条重复记录: {_describe(df[in_file], key)}",
+            np.flatnonzero(in_file).tolist(),
+            '与文件中其他行重复'
+        )
+
+    existing = np.zeros(len(df), dtype=bool)
+    positions = np.flatnonzero(~in_file)
+    if conn is not None and len(positions):
+        keys = df[key].iloc[positions]
+        keys = keys.astype(object).where(keys.notna(), None)
+        rows = ((int(position), *values)
+                for position, values in zip(positions, keys.itertuples(index=False, name=None)))
+        match = ' AND '.join(f"t.{column} IS k.{column}" for column in key)
+        with temp_table(conn, 'import_keys', ['position INTEGER'] + key, rows):
+            found = [row[0] for row in conn.execute(f'''
+                SELECT k.position FROM temp.import_keys k
+                WHERE EXISTS (SELECT 1 FROM {table} t WHERE {match})
+            ''')]
+            existing[found] = True
+            if on_duplicate == 'overwrite' and found:
+                conn.execute(f'''
+                    DELETE FROM {table} WHERE rowid IN (
+                        SELECT t.rowid FROM {table} t JOIN temp.import_keys k ON {match}
+                    )
+                ''')
+
+    if on_duplicate == 'reject' and existing.any():
+        raise DuplicateRecordError(
+            f"有 {int(existing.sum())} 条记录已导入过: {_describe(df[existing], key)}",
+            np.flatnonzero(existing).tolist(),
+            '该记录已导入过'
+        )
+
+    write = ~in_file
+    if on_duplicate == 'skip':
+        write &= ~existing
+    if report is not None and not write.all():
+        row_numbers = row_labels(df.index) if row_numbers is None else np.asarray(row_numbers)
+        reasons = np.where(in_file, '与文件中其他行重复，已跳过' if on_duplicate == 'skip'
+                           else '被文件中后面的重复行覆盖', '该记录已导入过，已跳过')
+        positions = np.flatnonzero(~write)
+        keys = df[key].iloc[positions].itertuples(index=False, name=None)
+        report.add_rows(
+            (row_numbers[i], '/'.join(key), reasons[i],
+             '/'.join('' if pd.isna(value) else str(value) for value in values))
+            for i, values in zip(positions, keys)
+        )
+    return write, {'in_file': int(in_file.sum()), 'existing': int(existing.sum())}
+
+def merge_stats(total: Dict, stats: Dict) -> Dict:
+    """累加各批次的重复统计"""
+    for name, count in stats.items():
+        total[name] = total.get(name, 0) + count
+    return total
+
+def _describe(df: pd.DataFrame, key: List[str], limit: int = 5) -> str:
+    """列出前几条重复记录的键"""
+    keys = ['/'.join(str(value) for value in row) for row in df[key].head(limit).itertuples(index=False, name=None)]
+    return '、'.join(keys) + ('等' if len(df) > limit else '')
@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+from typing import Dict
+import logging
+import time
+import os
+from src.db.database import get_connection, temp_table
+from src.modules.file_cache import parsed_file_cache
+from src.modules.readers import sniff_csv
+from src.modules.import_progress import ImportProgress, ImportCancelled
+from src.modules.import_ledger import ImportLedger
+from src.modules.import_schema import Column, ImportSchema
+from src.modules.duplicates import resolve_duplicates, file_duplicates
+from src.modules.error_report import ErrorReport, row_labels
+
+# 身份证号前17位的加权因子，加权和模11后对应的校验码
+ID_CARD_WEIGHTS = np.array([7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2])
+ID_CARD_CHECK_CODES = np.array(list('10X98765432'))
+
+def validate_id_cards(id_cards: pd.Series) -> np.ndarray:
+    """整列校验18位身份证号，返回各行不合格的原因（合格或为空时为None）
+
+    格式、校验码和出生日期都是对整列的向量化运算，不逐行处理
+    """
+    id_cards = id_cards.astype('string').str.strip().str.upper()
+    reasons = np.full(len(id_cards), None, dtype=object)
+    present = id_cards.notna().to_numpy()
+    well_formed = id_cards.str.fullmatch(r'\d{17}[\dX]').fillna(False).to_numpy(dtype=bool)
+    reasons[present & ~well_formed] = '身份证号应为18位数字（末位可为X）'
+
+    positions = np.flatnonzero(well_formed)
+    if len(positions):
+        valid = id_cards.iloc[positions]
+        # 18位字符拼成一个字节矩阵，一次矩阵乘法得出所有加权和
+        digits = np.frombuffer(''.join(valid).encode('ascii'), dtype=np.uint8).reshape(-1, 18)[:, :17] - ord('0')
+        expected = ID_CARD_CHECK_CODES[(digits.astype(np.int64) @ ID_CARD_WEIGHTS) % 11]
+        reasons[positions[expected != valid.str[17].to_numpy(dtype=str)]] = '身份证号校验码不正确'
+
+        birth = pd.to_datetime(valid.str[6:14], format='%Y%m%d', errors='coerce')
+        birth_valid = ((birth >= pd.Timestamp('1900-01-01')) & (birth <= pd.Timestamp.now())).to_numpy(dtype=bool)
+        reasons[positions[~birth_valid]] = '身份证号中的出生日期无效'
+    return reasons
+
+class EmployeeImporter(ImportProgress):
+    # 文件字段与employees表字段的对应关系
+    db_columns = {
+        '工号': 'emp_id',
+        '姓名': 'name',
+        '身份证号': 'id_card',
+        '入职日期': 'hire_date',
+        '员工类型': 'emp_type'
+    }
+    # employees表的唯一键
+    key = ['emp_id']
+
+    # 上传文件的字段声明
+    schema = ImportSchema([
+        Column('工号', 'str', aliases=['员工编号']),
+        Column('姓名', 'str'),
+        Column('身份证号', 'str', required=False, nullable=True, aliases=['身份证号码', '身份证']),
+        Column('入职日期', 'date', required=False, nullable=True, aliases=['入职时间']),
+        Column('员工类型', 'str', required=False, nullable=True, aliases=['用工类型'])
+    ])
+
+    # 已有工号更新员工信息并恢复在职，文件中未填写的身份证号等保留原值
+    upsert_sql = '''
+        INSERT INTO employees (emp_id, name, id_card, hire_date, emp_type)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(emp_id) DO UPDATE SET
+            name = excluded.name,
+            id_card = COALESCE(excluded.id_card, employees.id_card),
+            hire_date = COALESCE(excluded.hire_date, employees.hire_date),
+            emp_type = COALESCE(excluded.emp_type, employees.emp_type),
+            status = 1,
+            updated_at = CURRENT_TIMESTAMP
+    '''
+
+    def __init__(self, db):
+        self.db = db
+        self.supported_formats = ['.xlsx', '.xls', '.csv']
+
+    def validate_file(self, file_path: str) -> bool:
+        """验证文件格式和必要字段"""
+        try:
+            _, ext = os.path.splitext(file_path.lower())
+            if ext not in self.supported_formats:
+                logging.error(f"不支持的文件格式: {ext}")
+                return False
+
+            if ext == '.csv':
+                columns = pd.read_csv(file_path, nrows=0, **sniff_csv(file_path)).columns
+            else:
+                # 解析结果进入共享缓存，导入时直接复用
+                columns = parsed_file_cache.read(file_path).columns
+
+            missing_fields = self.schema.missing_columns(columns)
+            if missing_fields:
+                logging.error(f"缺少必要字段: {', '.join(missing_fields)}")
+                return False
+            return True
+
+        except Exception as e:
+            logging.error(f"文件验证失败: {str(e)}")
+            return False
+
+    def import_employees(self, file_path: str, force: bool = False) -> Dict:
+        """批量导入花名册
+
+        整个文件在一个事务内按工号UPSERT：新工号插入，已有工号更新信息并恢复在职。
+        工号或姓名为空、身份证号或入职日期无效、身份证号与其他员工重复的行不导入，
+        逐行写入错误报告；文件中同一工号出现多次时以最后一行为准。
+        同一文件已导入过时直接跳过，force=True时强制重新导入
+        """
+        conn = get_connection(self.db)
+        report = ErrorReport.for_import('employees', file_path, self.error_report_dir)
+        try:
+            ledger = ImportLedger(self.db)
+            previous = None if force else ledger.find(file_path, 'employees', None)
+            if previous:
+                return ledger.skipped_result(previous)
+            started = time.perf_counter()
+
+            self.report_progress('读取文件')
+            raw = parsed_file_cache.read(file_path)
+
+            self.report_progress('校验数据', len(raw))
+            records = self.prepare_records(raw, report)
+            # 文件中同一工号以最后一行为准
+            write, stats = resolve_duplicates(None, 'employees', self.key, records, 'overwrite', report)
+            records = records[write]
+            duplicates = dict(stats, skipped=int((~write).sum()))
+
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            records, updated = self.check_existing(conn, records, report)
+            conn.executemany(
+                self.upsert_sql,
+                records.astype(object).where(records.notna(), None).itertuples(index=False, name=None)
+            )
+            conn.commit()
+            self.report_progress('写入数据库', len(raw), len(records))
+
+            result = {
+                'status': 'success',
+                'total': len(raw),
+                'success': len(records),
+                'inserted': len(records) - updated,
+                'updated': updated,
+                # 被后面同一工号覆盖的行计入重复，不算失败
+                'failed': len(raw) - len(records) - duplicates['skipped'],
+                'duplicates': duplicates
+            }
+            result.update(report.summary())
+            ledger.record(file_path, 'employees', None, result, time.perf_counter() - started)
+            return result
+
+        except ImportCancelled:
+            # 写入前取消，不写入任何数据
+            conn.rollback()
+            return {'status': 'cancelled', 'total': 0, 'success': 0, 'failed': 0}
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"花名册导入失败: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+        finally:
+            report.close()
+
+    def prepare_records(self, df: pd.DataFrame, report: ErrorReport = None) -> pd.DataFrame:
+        """整表校验并转换为employees表的字段，不合格的行写入错误报告
+
+        行号由df的索引得出（见row_labels），返回的记录保留原索引
+        """
+        df = self.schema.clean(df, report)
+        rejected = np.zeros(len(df), dtype=bool)
+        labels = row_labels(df.index)
+
+        if '身份证号' in df.columns:
+            reasons = validate_id_cards(df['身份证号'])
+            invalid = np.flatnonzero(pd.notna(reasons))
+            if report is not None:
+                report.add_rows((labels[i], '身份证号', reasons[i], df['身份证号'].iat[i]) for i in invalid)
+            rejected[invalid] = True
+            id_cards = df['身份证号'].str.strip().str.upper()
+        else:
+            id_cards = pd.Series(pd.NA, index=df.index, dtype='string')
+
+        records = pd.DataFrame({
+            'emp_id': df['工号'].str.strip(),
+            'name': df['姓名'].str.strip(),
+            'id_card': id_cards,
+            # 入职日期已由schema统一为YYYY-MM-DD，无效日期的行已去掉
+            'hire_date': df['入职日期'] if '入职日期' in df.columns else pd.NA,
+            'emp_type': df['员工类型'] if '员工类型' in df.columns else pd.NA
+        }, index=df.index)
+        return records[~rejected]
+
+    def check_existing(self, conn, records: pd.DataFrame, report: ErrorReport = None):
+        """在调用方的事务内检查身份证号冲突并统计已有工号
+
+        身份证号与文件中其他员工或库中其他工号重复的行不导入并写入错误报告，
+        库中比对通过临时表一次查询完成。返回可写入的记录和其中已有工号的条数
+        """
+        labels = row_labels(records.index)
+        rejected = np.zeros(len(records), dtype=bool)
+
+        # 文件中身份证号重复（工号已去重，说明是不同员工）时保留第一条
+        with_id = np.flatnonzero(records['id_card'].notna().to_numpy())
+        repeated = with_id[file_duplicates(records.iloc[with_id], ['id_card'])]
+        if report is not None:
+            report.add_rows((labels[i], '身份证号', '身份证号与文件中其他员工重复', records['id_card'].iat[i])
+                            for i in repeated)
+        rejected[repeated] = True
+
+        keys = records[['emp_id', 'id_card']].astype(object).where(records[['emp_id', 'id_card']].notna(), None)
+        rows = ((i, *values) for i, values in enumerate(keys.itertuples(index=False, name=None)))
+        with temp_table(conn, 'import_employees', ['position INTEGER', 'emp_id TEXT', 'id_card TEXT'], rows):
+            conflicts = conn.execute('''
+                SELECT k.position, e.emp_id FROM temp.import_employees k
+                JOIN employees e ON e.id_card = k.id_card AND e.emp_id IS NOT k.emp_id
+            ''').fetchall()
+            existing = np.zeros(len(records), dtype=bool)
+            existing[[row[0] for row in conn.execute('''
+                SELECT k.position FROM temp.import_employees k
+                WHERE EXISTS (SELECT 1 FROM employees e WHERE e.emp_id = k.emp_id)
+            ''')]] = True
+
+        for position, emp_id in conflicts:
+            if report is not None and not rejected[position]:
+                report.add(labels[position], '身份证号', f"身份证号与已有员工{emp_id}重复",
+                           records['id_card'].iat[position])
+            rejected[position] = True
+
+        return records[~rejected], int((existing & ~rejected).sum())
+
+parsed_file_cache.register_schema(EmployeeImporter.schema)
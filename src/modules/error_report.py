@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+import tempfile
+import shutil
+import json
+import csv
+import os
+
+def row_labels(index: pd.Index) -> np.ndarray:
+    """DataFrame索引对应的文件行号（索引为从0开始的数据行序号，表头占第1行）
+
+    多文件或多工作表合并的数据以(文件/工作表, 序号)为索引，对应"名称!行号"
+    """
+    if isinstance(index, pd.MultiIndex):
+        return np.array([f"{source}!{row + 2}" for source, row in index], dtype=object)
+    return np.asarray(index + 2)
+
+class ErrorReport:
+    """导入错误报告
+
+    被拒绝的行逐条追加写入磁盘（CSV或JSONL），每条记录行号、列、原因和原始值；
+    内存中只保留计数，拒绝多少行内存占用都不变。一行有多个不合格的单元格时记录多条，
+    rows按行号计数：同一行的各条记录需连续写入（schema.rejections按行生成，
+    各校验步骤之间被拒绝的行已去掉，不会再次写入）。第一次写入时才创建文件，
+    没有被拒绝的行时不产生报告文件。并行导入时各工作进程写出部分报告，由主进程用absorb并入
+    """
+    fields = ['row', 'column', 'reason', 'value']
+    # 未指定目录时报告保存的位置，界面启动时改为数据目录下的import_errors
+    default_dir = os.path.join(tempfile.gettempdir(), 'xinchou_import_errors')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = 'jsonl' if path.lower().endswith('.jsonl') else 'csv'
+        # count为记录条数，rows为被拒绝的行数
+        self.count = 0
+        self.rows = 0
+        self._last_row = None
+        self.reasons = Counter()
+        self._file = None
+        self._writer = None
+
+    @classmethod
+    def for_import(cls, importer: str, file_path: str, report_dir: str = None, fmt: str = 'csv') -> 'ErrorReport':
+        """为一次导入创建报告，文件名包含导入类型、时间和源文件名"""
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        return cls(os.path.join(report_dir or cls.default_dir, f"{importer}_{stamp}_{name}.{fmt}"))
+
+    def part_path(self, index: int) -> str:
+        """第index个工作进程写出部分报告的路径，格式与本报告相同"""
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.part{index}{ext}"
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self.format == 'csv':
+            # 带BOM的UTF-8，Excel直接打开不乱码
+            self._file = open(self.path, 'w', encoding='utf-8-sig', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['行号', '列', '原因', '原始值'])
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+
+    def add_rows(self, rows: Iterable[Tuple]):
+        """追加一批被拒绝的行: (行号, 列, 原因, 原始值)"""
+        for row, column, reason, value in rows:
+            if self._file is None:
+                self._open()
+            row = row if isinstance(row, str) else int(row)
+            value = '' if value is None or (not isinstance(value, str) and pd.isna(value)) else str(value)
+            if self.format == 'csv':
+                self._writer.writerow([row, column, reason, value])
+            else:
+                record = dict(zip(self.fields, (row, column, reason, value)))
+                self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.count += 1
+            if row != self._last_row:
+                self.rows += 1
+                self._last_row = row
+            self.reasons[reason] += 1
+
+    def add(self, row: int, column: str, reason: str, value=None):
+        """追加一条被拒绝的行"""
+        self.add_rows([(row, column, reason, value)])
+
+    def absorb(self, summary: Dict):
+        """并入工作进程写出的部分报告（summary为其统计），逐块复制后删除该部分报告"""
+        if not summary['entries']:
+            return
+        if self._file is None:
+            self._open()
+        self._file.flush()
+        encoding = 'utf-8-sig' if self.format == 'csv' else 'utf-8'
+        with open(summary['error_report'], encoding=encoding, newline='') as part:
+            if self.format == 'csv':
+                part.readline()
+            shutil.copyfileobj(part, self._file)
+        os.remove(summary['error_report'])
+        self.count += summary['entries']
+        self.rows += summary['rejected']
+        self._last_row = None
+        self.reasons.update(summary['reasons'])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def summary(self) -> Dict:
+        """导入结果中的拒绝统计：rejected为被拒绝的行数，entries为报告中的记录条数"""
+        return {
+            'rejected': self.rows,
+            'entries': self.count,
+            'error_report': self.path if self.count else None,
+            'reasons': dict(self.reasons)
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
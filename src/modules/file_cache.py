@@ -0,0 +1,90 @@
+import pandas as pd
+from collections import OrderedDict
+import threading
+import os
+from src.modules.xlsx_reader import iter_xlsx_batches
+from src.modules.readers import read_table
+
+class ParsedFileCache:
+    """已解析上传文件的共享缓存
+
+    以(绝对路径, 文件大小, 修改时间)为键，文件被覆盖或修改后自动失效；
+    超过容量时淘汰最久未使用的条目。validate_file与import_*共用同一份解析结果，
+    返回的DataFrame是共享对象，调用方不得原地修改（clean_data会先复制）。
+    """
+
+    def __init__(self, max_entries: int = 4, staging=None):
+        self.max_entries = max_entries
+        # 可选的磁盘列式暂存(StagingCache)，跨会话复用解析结果
+        self.staging = staging
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 各导入模板的文本列（含别名），解析时按字符串读取
+        self.dtypes = {}
+
+    def register_schema(self, schema):
+        """登记导入模板的文本列，工号、身份证号等按文本读取，避免"001"被推断为数字丢失前导零"""
+        with self._lock:
+            self.dtypes.update(schema.dtypes)
+
+    def _make_key(self, file_path: str, sheet_name) -> tuple:
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, sheet_name)
+
+    def read(self, file_path: str, sheet_name=0) -> pd.DataFrame:
+        """读取文件，命中缓存时直接返回已解析的DataFrame"""
+        key = self._make_key(file_path, sheet_name)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        df = self._load(file_path, sheet_name)
+
+        with self._lock:
+            # 同一文件的旧版本已经失效，直接移除
+            for stale in [k for k in self._entries if k[0] == key[0] and k[3] == sheet_name]:
+                del self._entries[stale]
+            self._entries[key] = df
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return df
+
+    def _load(self, file_path: str, sheet_name) -> pd.DataFrame:
+        """实际解析文件，有暂存副本时直接读取副本"""
+        if self.staging is not None:
+            df = self.staging.load(file_path, sheet_name)
+            if df is not None:
+                return df
+                
+        # 按格式选择已安装的最快后端（calamine / pyarrow / openpyxl）
+        df = read_table(file_path, sheet_name=sheet_name, dtype=self.dtypes)
+            
+        if self.staging is not None:
+            self.staging.store(file_path, df, sheet_name)
+        return df
+    
+    def iter_batches(self, file_path: str, batch_size: int, sheet_name=0):
+        """流式按批次读取大xlsx文件，有暂存副本时从副本读取，否则边解析边写入副本"""
+        batches = iter_xlsx_batches(file_path, batch_size, sheet_name)
+        if self.staging is None:
+            return batches
+        staged = self.staging.iter_batches(file_path, batch_size, sheet_name)
+        if staged is not None:
+            return staged
+        return self.staging.stream_store(file_path, batches, sheet_name)
+
+    def invalidate(self, file_path: str):
+        """移除指定文件的所有缓存条目"""
+        path = os.path.abspath(file_path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                del self._entries[key]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+# 所有导入器共用的缓存实例
+parsed_file_cache = ParsedFileCache()
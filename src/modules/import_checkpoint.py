@@ -0,0 +1,66 @@
+import pandas as pd
+from typing import Dict, Iterable, Iterator, Optional
+from src.db.database import get_connection
+from src.modules.import_ledger import ImportLedger
+
+class ImportCheckpoint:
+    """大文件导入的断点
+
+    导入器每提交一个批次，就在同一事务内记录已处理到文件的第几行；
+    导入中断或被取消后再次导入同一文件（按内容哈希识别）的同一月份时，
+    跳过已提交的行继续导入，全部完成后删除断点
+    """
+
+    def __init__(self, db, file_path: str, importer: str, month: str):
+        self.db = db
+        self.file_path = file_path
+        self.importer = importer
+        self.month = month or ''
+
+    def load(self) -> Optional[Dict]:
+        """读取上次中断时的进度，没有断点时返回None"""
+        if self.db is None:
+            return None
+        row = get_connection(self.db).execute('''
+            SELECT rows_done, total_rows, success_rows FROM import_checkpoints
+            WHERE file_hash = ? AND importer = ? AND month = ?
+        ''', (ImportLedger.hash_file(self.file_path), self.importer, self.month)).fetchone()
+        if row is None:
+            return None
+        return {'rows': row[0], 'total': row[1], 'success': row[2]}
+
+    def save(self, conn, rows: int, total: int, success: int):
+        """记录进度，由调用方在写入批次的同一事务内执行"""
+        conn.execute('''
+            INSERT INTO import_checkpoints (file_hash, importer, month, rows_done, total_rows, success_rows)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(file_hash, importer, month) DO UPDATE SET
+                rows_done = excluded.rows_done,
+                total_rows = excluded.total_rows,
+                success_rows = excluded.success_rows,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (ImportLedger.hash_file(self.file_path), self.importer, self.month, rows, total, success))
+
+    def clear(self):
+        """导入完成后删除断点"""
+        if self.db is None:
+            return
+        conn = get_connection(self.db)
+        conn.execute('''
+            DELETE FROM import_checkpoints WHERE file_hash = ? AND importer = ? AND month = ?
+        ''', (ImportLedger.hash_file(self.file_path), self.importer, self.month))
+        conn.commit()
+
+def split_rows(df: pd.DataFrame, batch_size: int) -> Iterator[pd.DataFrame]:
+    """将整表按批次切分，便于分批提交"""
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size]
+
+def skip_rows(batches: Iterable[pd.DataFrame], rows: int) -> Iterator[pd.DataFrame]:
+    """跳过前rows行（已在上次导入中提交）"""
+    for batch in batches:
+        if rows >= len(batch):
+            rows -= len(batch)
+            continue
+        yield batch.iloc[rows:] if rows else batch
+        rows = 0
@@ -0,0 +1,111 @@
+from typing import Dict, Optional
+import hashlib
+import threading
+import os
+from src.db.database import get_connection
+
+class ImportLedger:
+    """导入台账
+
+    记录每个成功导入文件的SHA-256内容哈希、导入器、月份、行数和耗时。
+    同一文件再次导入同一月份时，只需按字节流计算一次哈希即可识别，无需解析文件。
+    """
+    # (绝对路径, 大小, 修改时间) -> 哈希，同一文件在验证和导入之间只计算一次
+    _hash_cache = {}
+    _hash_lock = threading.Lock()
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _hash_key(file_path: str) -> tuple:
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+    @classmethod
+    def hash_file(cls, file_path: str, block_size: int = 1024 * 1024) -> str:
+        """按块流式计算文件的SHA-256，内存占用与文件大小无关"""
+        key = cls._hash_key(file_path)
+        with cls._hash_lock:
+            if key in cls._hash_cache:
+                return cls._hash_cache[key]
+
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                sha256.update(block)
+        file_hash = sha256.hexdigest()
+
+        cls._remember(key, file_hash)
+        return file_hash
+
+    @classmethod
+    def remember_hash(cls, file_path: str, file_hash: str):
+        """记录已在其他进程算出的哈希：并行导入时由主进程计算一次传给工作进程，
+        工作进程读取暂存副本等处不再重新计算"""
+        cls._remember(cls._hash_key(file_path), file_hash)
+
+    @classmethod
+    def _remember(cls, key: tuple, file_hash: str):
+        with cls._hash_lock:
+            if len(cls._hash_cache) >= 256:
+                cls._hash_cache.clear()
+            cls._hash_cache[key] = file_hash
+
+    def find(self, file_path: str, importer: str, month: str) -> Optional[Dict]:
+        """查找该文件此前是否已导入过同一月份"""
+        if self.db is None:
+            return None
+        row = get_connection(self.db).execute('''
+            SELECT file_name, total_rows, success_rows, created_at
+            FROM import_ledger
+            WHERE file_hash = ? AND importer = ? AND month = ?
+        ''', (self.hash_file(file_path), importer, month or '')).fetchone()
+        if row is None:
+            return None
+        return {
+            'file_name': row[0],
+            'total': row[1],
+            'success': row[2],
+            'imported_at': row[3]
+        }
+
+    def record(self, file_path: str, importer: str, month: str, result: Dict, elapsed: float):
+        """记录一次成功的导入"""
+        if self.db is None:
+            return
+        conn = get_connection(self.db)
+        conn.execute('''
+            INSERT INTO import_ledger
+            (file_hash, importer, month, file_name, total_rows, success_rows, failed_rows, elapsed)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(file_hash, importer, month) DO UPDATE SET
+                file_name = excluded.file_name,
+                total_rows = excluded.total_rows,
+                success_rows = excluded.success_rows,
+                failed_rows = excluded.failed_rows,
+                elapsed = excluded.elapsed,
+                created_at = CURRENT_TIMESTAMP
+        ''', (
+            self.hash_file(file_path),
+            importer,
+            month or '',
+            os.path.basename(file_path),
+            result.get('total', result.get('success', 0)),
+            result.get('success', 0),
+            result.get('failed', 0),
+            elapsed
+        ))
+        conn.commit()
+
+    @staticmethod
+    def skipped_result(previous: Dict) -> Dict:
+        """重复文件的导入结果"""
+        return {
+            'status': 'skipped',
+            'message': f"该文件已于{previous['imported_at']}导入（{previous['success']}条记录），本次未重复导入",
+            'total': 0,
+            'success': 0,
+            'failed': 0,
+            'previous': previous
+        }
@@ -0,0 +1,143 @@
+import pandas as pd
+from typing import Dict, List
+import random
+import codecs
+import time
+import csv
+import os
+from src.modules.import_schema import ImportSchema, normalize_dates
+from src.modules.readers import sniff_csv, get_reader
+from src.modules.xlsx_reader import iter_xlsx_batches, read_xlsx_header
+
+# 预览显示文件开头的行数和随机抽样的行数
+PREVIEW_ROWS = 20
+SAMPLE_ROWS = 20
+# xlsx无法按字节定位行，随机样本取自文件开头这么多行
+SAMPLE_WINDOW = 2000
+# 随机定位到CSV某处后，最多读取这么多字节寻找完整的一行
+LINE_BLOCK = 16 * 1024
+
+def preview_file(file_path: str, schema: ImportSchema, rows: int = PREVIEW_ROWS,
+                 sample: int = SAMPLE_ROWS, seed: int = None) -> Dict:
+    """预览上传文件，供确认字段对应关系后再导入
+
+    只读取表头、开头rows行和sample行随机样本：CSV随机定位到文件中的若干字节位置各读一行，
+    Excel只读取开头的有限行，读取量与文件大小无关。返回自动识别的字段对应关系、
+    缺少的必要字段，以及各字段按导入规则转换后的无效值统计
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    _, ext = os.path.splitext(file_path.lower())
+    if ext == '.csv':
+        head, sampled = _preview_csv(file_path, rows, sample, rng)
+    else:
+        head, sampled = _preview_excel(file_path, ext, rows, sample, rng)
+
+    mapping = schema.match_columns(head.columns)
+    return {
+        'columns': [str(column) for column in head.columns],
+        'head': head,
+        'sample': sampled,
+        'mapping': {str(column): mapping.get(column) for column in head.columns},
+        'missing': schema.missing_columns(head.columns),
+        'types': _type_report(pd.concat([head, sampled], ignore_index=True), schema, mapping),
+        'elapsed': time.perf_counter() - started
+    }
+
+def _preview_csv(file_path: str, rows: int, sample: int, rng: random.Random):
+    dialect = sniff_csv(file_path)
+    head = pd.read_csv(file_path, nrows=rows, dtype=str, **dialect)
+    if len(head) < rows or sample <= 0:
+        # 整个文件已在开头部分读完
+        return head, head.iloc[0:0]
+
+    encoding = dialect['encoding']
+    with open(file_path, 'rb') as f:
+        bom = f.read(4)
+    if encoding == 'utf-16':
+        encoding = 'utf-16-be' if bom.startswith(codecs.BOM_UTF16_BE) else 'utf-16-le'
+    elif encoding == 'utf-8-sig':
+        encoding = 'utf-8'
+    newline = '\n'.encode(encoding)
+    width = len(newline)
+
+    size = os.path.getsize(file_path)
+    records = []
+    seen = set()
+    with open(file_path, 'rb') as f:
+        # 抽样从开头部分之后开始：定位表头和开头rows行的结束位置（即最后一个换行符）
+        block = f.read(LINE_BLOCK)
+        head_end = -width
+        for _ in range(rows + 1):
+            head_end = _find_newline(block, newline, head_end + width)
+            if head_end < 0:
+                break
+        first = head_end if head_end >= 0 else 1
+        candidates = range(first, size)
+        for offset in sorted(rng.sample(candidates, min(sample, len(candidates)))):
+            # 对齐到字符边界，跳过落点所在的不完整行，取下一整行
+            base = offset - offset % width
+            f.seek(base)
+            block = f.read(LINE_BLOCK)
+            start = _find_newline(block, newline)
+            if start < 0:
+                continue
+            end = _find_newline(block, newline, start + width)
+            if end < 0 or base + start in seen:
+                continue
+            seen.add(base + start)
+            line = block[start + width:end].decode(encoding, errors='replace').rstrip('\r')
+            fields = next(csv.reader([line], delimiter=dialect['sep']), [])
+            if len(fields) == len(head.columns):
+                records.append(fields)
+    sampled = pd.DataFrame(records, columns=head.columns, dtype=object)
+    return head, sampled.replace('', None)
+
+def _find_newline(block: bytes, newline: bytes, start: int = 0) -> int:
+    """查找与字符宽度对齐的换行符位置"""
+    width = len(newline)
+    index = block.find(newline, start)
+    while index >= 0 and index % width:
+        index = block.find(newline, index + 1)
+    return index
+
+def _preview_excel(file_path: str, ext: str, rows: int, sample: int, rng: random.Random):
+    if ext == '.xlsx':
+        # 只读流式读取开头的有限行，读够即关闭工作簿
+        batches = iter_xlsx_batches(file_path, max(rows + sample, SAMPLE_WINDOW))
+        try:
+            window = next(batches, None)
+        finally:
+            batches.close()
+        if window is None:
+            window = pd.DataFrame(columns=read_xlsx_header(file_path))
+    else:
+        name, _ = get_reader(file_path)
+        window = pd.read_excel(file_path, engine=name, nrows=max(rows + sample, SAMPLE_WINDOW), dtype=object)
+
+    rest = range(rows, len(window))
+    picked = sorted(rng.sample(rest, min(sample, len(rest))))
+    return window.iloc[:rows], window.iloc[picked]
+
+def _type_report(df: pd.DataFrame, schema: ImportSchema, mapping: Dict) -> List[Dict]:
+    """各已识别字段在预览行中按导入规则转换的结果"""
+    report = []
+    for column, name in mapping.items():
+        spec = schema.columns[name]
+        raw = df[column]
+        blank = raw.isna() | (raw.astype(str).str.strip() == '')
+        if spec.dtype == 'number':
+            invalid = pd.to_numeric(raw, errors='coerce').isna() & ~blank
+        elif spec.dtype == 'date':
+            invalid = normalize_dates(raw).isna() & ~blank
+        else:
+            invalid = pd.Series(False, index=raw.index)
+        report.append({
+            'column': name,
+            'source': str(column),
+            'dtype': spec.dtype,
+            'invalid': int(invalid.sum()),
+            'empty': 0 if spec.nullable else int(blank.sum()),
+            'examples': [str(value) for value in raw[invalid].unique()[:3]]
+        })
+    return report
@@ -0,0 +1,28 @@
+from typing import Callable, Dict
+import threading
+
+class ImportCancelled(Exception):
+    """导入被用户取消"""
+
+class ImportProgress:
+    """导入进度回报与取消支持，由各导入器继承
+
+    后台线程运行导入时，调用方设置progress_callback接收进度，
+    通过cancel_event请求取消；导入器在每个批次处理完后调用report_progress，
+    此时若已请求取消则抛出ImportCancelled。
+    被拒绝的行写入error_report_dir下的错误报告，未设置时使用ErrorReport.default_dir。
+    """
+    progress_callback: Callable[[Dict], None] = None
+    cancel_event: threading.Event = None
+    error_report_dir: str = None
+
+    def report_progress(self, stage: str, rows_read: int = 0, rows_written: int = 0):
+        """回报当前进度，并检查是否已请求取消"""
+        if self.progress_callback is not None:
+            self.progress_callback({
+                'stage': stage,
+                'rows_read': rows_read,
+                'rows_written': rows_written
+            })
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ImportCancelled("导入已取消")
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Iterator, List, Tuple
+import unicodedata
+import re
+from src.modules.error_report import row_labels
+
+class Column:
+    """导入文件中的一列
+
+    dtype为'str'、'number'或'date'；required表示表头中必须有该列，nullable表示该列允许为空值，
+    aliases为该列在上传文件中的其他写法，default用于填充空值（文件中没有该列时整列取默认值）
+    """
+    def __init__(self, name: str, dtype: str = 'str', required: bool = True, nullable: bool = False,
+                 aliases: Iterable[str] = (), default=None):
+        if dtype not in ('str', 'number', 'date'):
+            raise ValueError(f"不支持的字段类型: {dtype}")
+        self.name = name
+        self.dtype = dtype
+        self.required = required
+        self.nullable = nullable
+        self.aliases = tuple(aliases)
+        self.default = default
+
+    @property
+    def error_message(self) -> str:
+        """该列取值不合格时的提示"""
+        if self.dtype == 'number':
+            return f"{self.name}不是有效数字"
+        if self.dtype == 'date':
+            return f"{self.name}不是有效日期"
+        return f"{self.name}为空"
+
+def normalize_column(name) -> str:
+    """列名比较用的规范形式：统一全半角、去掉空白、忽略大小写"""
+    return re.sub(r'\s+', '', unicodedata.normalize('NFKC', str(name))).lower()
+
+def normalize_dates(values: pd.Series) -> pd.Series:
+    """日期统一为YYYY-MM-DD字符串，无法识别的为空
+
+    xlsx读出的datetime、暂存副本中的'2024-01-05 00:00:00'和CSV中的'2024-01-05'结果相同；
+    先按ISO 8601整列解析，其余写法（如2024/1/5）再逐个识别
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        dates = values
+    else:
+        dates = pd.to_datetime(values, errors='coerce', format='ISO8601')
+        retry = (dates.isna() & values.notna()).to_numpy()
+        if retry.any():
+            dates[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed')
+    return dates.dt.strftime('%Y-%m-%d').astype('string')
+
+class ImportSchema:
+    """声明式导入模板
+
+    构造时将各列的声明编译为列名映射、类型分组和校验列表，
+    之后每次清洗只做一次重命名、每种类型一次整表转换和一次整表空值判断，
+    不逐行、不逐列处理
+    """
+    def __init__(self, columns: List[Column]):
+        self.columns = {column.name: column for column in columns}
+        # 规范化后的列名及别名 -> 标准列名
+        self.lookup = {normalize_column(name): column.name
+                       for column in columns for name in (column.name, *column.aliases)}
+        self.required = [column.name for column in columns if column.required]
+        self.numeric = [column.name for column in columns if column.dtype == 'number']
+        self.text = [column.name for column in columns if column.dtype == 'str']
+        self.dates = [column.name for column in columns if column.dtype == 'date']
+        self.not_null = [column.name for column in columns if not column.nullable]
+        self.defaults = {column.name: column.default for column in columns if column.default is not None}
+        # 供pd.read_csv使用，文本和日期列（包括别名）按字符串读取，避免编号前导零丢失
+        self.dtypes = {name: str for column in columns if column.dtype in ('str', 'date')
+                       for name in (column.name, *column.aliases)}
+
+    def match_columns(self, columns: Iterable[str]) -> Dict[str, str]:
+        """识别上传文件各列对应的标准列名，无法识别的列不在结果中
+
+        列名与标准列名或别名一致即可匹配，比较时忽略空白、全半角和大小写；
+        多列对应同一标准列时，与标准列名完全一致的优先，其次取靠前的列
+        """
+        columns = list(columns)
+        matched = {column: column for column in columns if column in self.columns}
+        for column in columns:
+            name = self.lookup.get(normalize_column(column))
+            if name is not None and column not in matched and name not in matched.values():
+                matched[column] = name
+        return {column: matched[column] for column in columns if column in matched}
+
+    def missing_columns(self, columns: Iterable[str]) -> List[str]:
+        """表头中缺少的必要字段（别名视为已提供）"""
+        present = set(self.match_columns(columns).values())
+        return [name for name in self.required if name not in present]
+
+    def convert(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """统一列名、转换类型并填充默认值
+
+        返回转换后的数据，以及各行是否不合格的布尔表：不允许为空的列为空，
+        或日期列有值但无法识别（允许为空的日期列也不合格）
+        """
+        df = df.rename(columns=self.match_columns(df.columns))
+        missing = self.missing_columns(df.columns)
+        if missing:
+            raise ValueError(f"缺少必要字段: {', '.join(missing)}")
+
+        present = set(df.columns)
+        numeric = [name for name in self.numeric if name in present]
+        text = [name for name in self.text if name in present]
+        dates = [name for name in self.dates if name in present]
+        converted = {}
+        if numeric:
+            converted.update(df[numeric].apply(pd.to_numeric, errors='coerce'))
+        if text:
+            converted.update(df[text].astype('string'))
+        converted.update({name: normalize_dates(df[name]) for name in dates})
+        raw, df = df, df.assign(**converted)
+
+        if self.defaults:
+            df = df.assign(**{name: default for name, default in self.defaults.items() if name not in present})
+            df = df.fillna({name: default for name, default in self.defaults.items() if name in present})
+
+        invalid = df[[name for name in self.not_null if name in df.columns]].isna()
+        for name in dates:
+            unparsed = df[name].isna() & raw[name].notna()
+            invalid[name] = invalid[name] | unparsed if name in invalid.columns else unparsed
+        return df, invalid
+
+    def clean(self, df: pd.DataFrame, report=None, row_numbers=None) -> pd.DataFrame:
+        """一次完成转换，并去掉不合格的行
+
+        传入report（ErrorReport）时不合格的单元格写入错误报告；
+        row_numbers为各行在文件中的行号，默认由索引得出（见row_labels）
+        """
+        converted, invalid = self.convert(df)
+        if report is not None:
+            row_numbers = row_labels(df.index) if row_numbers is None else row_numbers
+            report.add_rows(self.rejections(df, invalid, row_numbers))
+        return converted[~invalid.any(axis=1).to_numpy()]
+
+    def rejections(self, raw: pd.DataFrame, invalid: pd.DataFrame, row_numbers) -> Iterator[Tuple]:
+        """逐个生成不合格的单元格(行号, 列, 原因, 原始值)，供写入错误报告
+
+        raw为转换前的数据，用于报告文件中的原始取值
+        """
+        rows, columns = np.nonzero(invalid.to_numpy())
+        row_numbers = np.asarray(row_numbers)[rows]
+        raw = raw.rename(columns=self.match_columns(raw.columns))
+        values = {name: raw[name].to_numpy() for name in invalid.columns if name in raw.columns}
+        for position, row, column in zip(rows, row_numbers, columns):
+            name = invalid.columns[column]
+            value = values[name][position] if name in values else None
+            yield row, name, self.columns[name].error_message, value
@@ -0,0 +1,66 @@
+import pandas as pd
+from typing import Dict, List
+
+def diff_records(new: pd.DataFrame, old: pd.DataFrame, key: List[str], values: List[str]) -> Dict:
+    """按业务主键和行哈希比较新上传记录与库中已有记录
+
+    两边需已统一为相同的列和类型。返回新增、修改、删除的记录及未变化的条数，
+    整个比较只做向量化的哈希和索引运算，不逐行比对。
+    新上传记录中的重复键由调用方先处理并报告（见duplicates.resolve_duplicates），
+    这里仍有重复时只保留最后一条。
+    """
+    new = new.drop_duplicates(subset=key, keep='last').set_index(key)
+    old = old.drop_duplicates(subset=key, keep='last').set_index(key)
+    new_hash = pd.util.hash_pandas_object(new[values], index=False)
+    old_hash = pd.util.hash_pandas_object(old[values], index=False)
+
+    inserted = new.index.difference(old.index)
+    deleted = old.index.difference(new.index)
+    common = new.index.intersection(old.index)
+    changed = common[new_hash.loc[common].to_numpy() != old_hash.loc[common].to_numpy()]
+
+    return {
+        'inserted': new.loc[inserted].reset_index(),
+        'updated': new.loc[changed].reset_index(),
+        'deleted': old.loc[deleted].reset_index(),
+        'unchanged': len(common) - len(changed)
+    }
+
+def apply_diff(conn, table: str, key: List[str], values: List[str], diff: Dict):
+    """只把有变化的记录写入数据库，由调用方负责提交事务"""
+    def rows(df, columns):
+        df = df[columns].astype(object).where(df[columns].notna(), None)
+        return df.itertuples(index=False, name=None)
+
+    where = ' AND '.join(f"{column} = ?" for column in key)
+    if len(diff['inserted']):
+        columns = key + values
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            rows(diff['inserted'], columns)
+        )
+    if len(diff['updated']):
+        assignments = ', '.join(f"{column} = ?" for column in values)
+        conn.executemany(
+            f"UPDATE {table} SET {assignments} WHERE {where}",
+            rows(diff['updated'], values + key)
+        )
+    if len(diff['deleted']):
+        conn.executemany(f"DELETE FROM {table} WHERE {where}", rows(diff['deleted'], key))
+
+def summarize_diff(diff: Dict, key: List[str]) -> Dict:
+    """导入结果中的差异报告"""
+    def keys(df):
+        return [dict(zip(key, row)) for row in df[key].itertuples(index=False, name=None)]
+
+    return {
+        'inserted': len(diff['inserted']),
+        'updated': len(diff['updated']),
+        'deleted': len(diff['deleted']),
+        'unchanged': diff['unchanged'],
+        'changes': {
+            'inserted': keys(diff['inserted']),
+            'updated': keys(diff['updated']),
+            'deleted': keys(diff['deleted'])
+        }
+    }
@@ -3,11 +3,38 @@ from typing import List, Dict, Tuple
 import logging
 import os
 from datetime import datetime
+import time
+from src.db.database import get_connection, temp_table
+from src.modules.file_cache import parsed_file_cache
+from src.modules.xlsx_reader import should_stream, read_xlsx_header
+from src.modules.import_progress import ImportProgress, ImportCancelled
+from src.modules.import_ledger import ImportLedger
+from src.modules.import_checkpoint import ImportCheckpoint, split_rows, skip_rows
+from src.modules.duplicates import resolve_duplicates
+from src.modules.incremental_import import diff_records, apply_diff, summarize_diff
+from src.modules.import_schema import Column, ImportSchema
+from src.modules.error_report import ErrorReport, row_labels
 
-class PerformanceImporter:
-    def __init__(self, db_connection):
+class PerformanceImporter(ImportProgress):
+    # 文件字段与performance表字段的对应关系
+    db_columns = {
+        '员工编号': 'emp_id',
+        '月份': 'month',
+        '绩效得分': 'score'
+    }
+    
+    # 上传文件的字段声明
+    schema = ImportSchema([
+        Column('员工编号', 'str', aliases=['工号']),
+        Column('姓名', 'str', required=False, nullable=True),
+        Column('绩效得分', 'number', aliases=['绩效分数'])
+    ])
+    
+    def __init__(self, db_connection, batch_size: int = 5000):
         self.db = db_connection
         self.supported_formats = ['.xlsx', '.xls']
+        # 大文件流式读取时每批的行数
+        self.batch_size = batch_size
         
     def validate_file(self, file_path: str) -> bool:
         """验证文件格式和基本结构"""
@@ -17,12 +44,14 @@ class PerformanceImporter:
                 logging.error(f"不支持的文件格式: {ext}")
                 return False
                 
-            # 读取文件头验证必要字段
-            df = pd.read_excel(file_path, nrows=0, engine='openpyxl')
+            # 读取文件验证必要字段：大文件只读表头，小文件解析结果进入共享缓存供导入时复用
+            if should_stream(file_path):
+                columns = read_xlsx_header(file_path)
+            else:
+                columns = parsed_file_cache.read(file_path).columns
             
             # 验证必要字段（员工号/身份证号 + 绩效分数）
-            required_fields = ['员工编号', '绩效得分']
-            missing_fields = [field for field in required_fields if field not in df.columns]
+            missing_fields = self.schema.missing_columns(columns)
             
             if missing_fields:
                 logging.error(f"缺少必要字段: {', '.join(missing_fields)}")
@@ -34,73 +63,240 @@ class PerformanceImporter:
             logging.error(f"文件验证失败: {str(e)}")
             return False
     
-    def import_performance(self, file_path: str, month: str, mapping: Dict = None) -> Dict:
-        """导入绩效数据"""
+    def import_performance(self, file_path: str, month: str, mapping: Dict = None, force: bool = False) -> Dict:
+        """导入绩效数据
+        
+        按batch_size分批提交，每批与断点位置在同一事务内提交，
+        导入中断或取消后再次导入同一文件时从断点继续。
+        校验不合格和写入失败的行逐行写入错误报告，结果中给出拒绝行数和报告路径。
+        同一文件已导入过该月份时直接跳过，force=True时强制重新导入
+        """
+        rows_read = 0
+        total = 0
+        success_count = 0
+        report = ErrorReport.for_import('performance', file_path, self.error_report_dir)
         try:
-            # 读取文件
-            df = pd.read_excel(file_path, engine='openpyxl')
+            # 重复文件只需计算哈希，不做任何解析
+            ledger = ImportLedger(self.db)
+            previous = None if force else ledger.find(file_path, 'performance', month)
+            if previous:
+                return ledger.skipped_result(previous)
+            started = time.perf_counter()
             
-            # 数据验证和清洗
-            df = self.clean_data(df)
+            # 上次中断时已提交的部分不再清洗和写入
+            checkpoint = ImportCheckpoint(self.db, file_path, 'performance', month)
+            resumed = checkpoint.load()
+            if resumed:
+                rows_read, total, success_count = resumed['rows'], resumed['total'], resumed['success']
             
-            # 应用字段映射
-            if mapping:
-                df = df.rename(columns=mapping)
+            self.report_progress('读取文件', rows_read, success_count)
             
-            # 添加月份信息
-            df['月份'] = month
+            # 读取文件：大文件按批次流式读取，小文件直接命中validate_file的解析缓存
+            if should_stream(file_path):
+                batches = parsed_file_cache.iter_batches(file_path, self.batch_size)
+            else:
+                batches = split_rows(parsed_file_cache.read(file_path), self.batch_size)
             
-            # 保存到数据库
-            success_count = self.save_to_database(df)
+            for batch in skip_rows(batches, rows_read):
+                # 流式读取的批次各自从0编号，统一为数据行序号，错误报告据此给出行号
+                batch = batch.set_axis(pd.RangeIndex(rows_read, rows_read + len(batch)))
+                rows_read += len(batch)
+                
+                # 数据验证和清洗
+                df = self.clean_data(batch, report)
+                
+                # 应用字段映射
+                if mapping:
+                    df = df.rename(columns=mapping)
+                
+                # 添加月份信息
+                df['月份'] = month
+                
+                # 保存到数据库；total为文件中的数据行数，被拒绝的行计入失败
+                total += len(batch)
+                success_count += self.save_to_database(df, checkpoint, (rows_read, total, success_count), report)
+                self.report_progress('写入数据库', rows_read, success_count)
             
-            return {
+            result = {
                 'status': 'success',
-                'total': len(df),
+                'total': total,
                 'success': success_count,
-                'failed': len(df) - success_count
+                'failed': total - success_count
             }
+            result.update(report.summary())
+            if resumed:
+                result['resumed_rows'] = resumed['rows']
+            checkpoint.clear()
+            ledger.record(file_path, 'performance', month, result, time.perf_counter() - started)
+            return result
             
+        except ImportCancelled:
+            # 已提交的批次保留在数据库中，断点供下次继续导入
+            return dict({
+                'status': 'cancelled',
+                'total': total,
+                'success': success_count,
+                'failed': total - success_count
+            }, **report.summary())
         except Exception as e:
             logging.error(f"绩效导入失败: {str(e)}")
             return {
                 'status': 'error',
                 'message': str(e)
             }
+        finally:
+            report.close()
     
-    def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """数据清洗和验证"""
-        df = df.copy()
-        
-        # 移除空行
-        df = df.dropna(subset=['员工编号', '绩效得分'])
-        
-        # 数据类型转换
-        df['绩效得分'] = pd.to_numeric(df['绩效得分'], errors='coerce')
-        
-        # 删除无效的数值记录
-        df = df.dropna(subset=['绩效得分'])
+    def reimport_performance(self, file_path: str, month: str, mapping: Dict = None,
+                             delete_missing: bool = False, dry_run: bool = False) -> Dict:
+        """增量重新导入某月绩效
         
-        return df
+        以(emp_id, month)为键、行哈希比较新文件与库中该月已有数据，
+        只对新增、修改、删除的记录写库，并返回差异报告。
+        默认只与文件中出现的员工的已有记录比较，其他员工的绩效不受影响；
+        delete_missing=True时文件中没有的员工的该月绩效都会删除。
+        dry_run=True时只返回差异报告（含将删除的记录），不写库。
+        文件内重复的键保留最后一条，其余计入duplicates并写入错误报告。
+        不按导入台账跳过：之前导入过的文件也重新比较，可用于把该月恢复为旧文件的内容
+        """
+        key = ['emp_id', 'month']
+        values = ['score']
+        conn = get_connection(self.db)
+        report = ErrorReport.for_import('performance', file_path, self.error_report_dir)
+        try:
+            ledger = ImportLedger(self.db)
+            started = time.perf_counter()
+            
+            self.report_progress('读取文件')
+            if should_stream(file_path):
+                frames = []
+                total = 0
+                for batch in parsed_file_cache.iter_batches(file_path, self.batch_size):
+                    batch = batch.set_axis(pd.RangeIndex(total, total + len(batch)))
+                    total += len(batch)
+                    frames.append(self.clean_data(batch, report))
+                df = pd.concat(frames)
+            else:
+                raw = parsed_file_cache.read(file_path)
+                total = len(raw)
+                df = self.clean_data(raw, report)
+            if mapping:
+                df = df.rename(columns=mapping)
+            df['月份'] = month
+            new = self.to_records(df)
+            write, duplicates = resolve_duplicates(None, 'performance', key, new, 'overwrite', report)
+            new = new[write]
+            duplicates['skipped'] = int((~write).sum())
+            
+            # 只读取该月已有记录，走performance(month, emp_id)索引
+            self.report_progress('比较差异', len(new))
+            old = pd.read_sql_query(
+                "SELECT emp_id, month, score FROM performance WHERE month = ?",
+                conn, params=(month,)
+            ).astype({'emp_id': str, 'month': str, 'score': float})
+            if not delete_missing:
+                old = old[old['emp_id'].isin(new['emp_id'])]
+            diff = diff_records(new, old, key, values)
+            
+            result = dict(summarize_diff(diff, key), status='preview' if dry_run else 'success', total=total,
+                          success=len(new), failed=total - len(new) - duplicates['skipped'],
+                          duplicates=duplicates, **report.summary())
+            if dry_run:
+                return result
+            
+            apply_diff(conn, 'performance', key, values, diff)
+            conn.commit()
+            ledger.record(file_path, 'performance', month, result, time.perf_counter() - started)
+            return result
+            
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"绩效增量导入失败: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+        finally:
+            report.close()
+    
+    def read_employee_columns(self, file_path: str) -> pd.DataFrame:
+        """只读取员工编号和姓名两列，用于导入前的人员变动和姓名核对"""
+        if should_stream(file_path):
+            rename = self.schema.match_columns(read_xlsx_header(file_path))
+            columns = [c for c in ('员工编号', '姓名') if c in rename.values()]
+            frames = [batch.rename(columns=rename)[columns]
+                      for batch in parsed_file_cache.iter_batches(file_path, self.batch_size)]
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        df = parsed_file_cache.read(file_path)
+        df = df.rename(columns=self.schema.match_columns(df.columns))
+        return df[[c for c in ('员工编号', '姓名') if c in df.columns]]
     
-    def save_to_database(self, df: pd.DataFrame) -> int:
-        """保存绩效数据到数据库"""
+    def clean_data(self, df: pd.DataFrame, report: ErrorReport = None) -> pd.DataFrame:
+        """数据清洗和验证：按schema转换类型，去掉员工编号为空或绩效得分无效的行
+
+        传入report时去掉的行写入错误报告，行号由df的索引得出
+        """
+        return self.schema.clean(df, report)
+    
+    def to_records(self, df: pd.DataFrame) -> pd.DataFrame:
+        """将清洗后的数据转换为performance表的字段和类型"""
+        records = df.rename(columns=self.db_columns)
+        return pd.DataFrame({
+            'emp_id': records['emp_id'].astype(str),
+            'month': records['month'].astype(str),
+            'score': records['score'].astype(float)
+        })
+    
+    def save_to_database(self, df: pd.DataFrame, checkpoint: ImportCheckpoint = None,
+                         position: tuple = (0, 0, 0), report: ErrorReport = None) -> int:
+        """保存绩效数据到数据库
+        
+        传入checkpoint时，本批数据与断点位置(已处理行数, 有效行数, 此前已写入行数)
+        在同一个SAVEPOINT内提交；传入report时写入失败的行写入错误报告
+        """
         try:
             if self.db is None:
                 return len(df)
+            
+            if df.empty and checkpoint is None:
+                return 0
                 
-            # TODO: 实现实际的数据库保存逻辑
-            # cursor = self.db.cursor()
-            # for _, row in df.iterrows():
-            #     cursor.execute(...)
-            # self.db.commit()
+            conn = get_connection(self.db)
+            conn.execute("SAVEPOINT performance_batch")
+            try:
+                if not df.empty:
+                    records = self.to_records(df)
+                    records = records.astype(object).where(records.notna(), None)
+                    # 同一员工同一月份重复导入时以新数据为准
+                    conn.executemany('''
+                        INSERT INTO performance (emp_id, month, score)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT(emp_id, month) DO UPDATE SET score = excluded.score
+                    ''', records.itertuples(index=False, name=None))
+                if checkpoint is not None:
+                    rows_read, total, success_count = position
+                    checkpoint.save(conn, rows_read, total, success_count + len(df))
+                conn.execute("RELEASE performance_batch")
+            except Exception:
+                conn.execute("ROLLBACK TO performance_batch")
+                conn.execute("RELEASE performance_batch")
+                raise
+            conn.commit()
             
             return len(df)
         except Exception as e:
             logging.error(f"保存到数据库失败: {str(e)}")
+            get_connection(self.db).rollback()
+            if report is not None:
+                report.add_rows((row, '', f"保存到数据库失败: {str(e)}", None) for row in row_labels(df.index))
             return 0
     
     def check_personnel_changes(self, current_data: pd.DataFrame, month: str) -> Tuple[List[str], List[str]]:
-        """检查人员变动情况"""
+        """检查人员变动情况
+        
+        本月上传的员工编号写入临时表，与performance表中上月记录做EXCEPT，
+        借助performance(month, emp_id)索引，历史数据再多也只扫描上月的记录
+        """
         try:
             # 获取上月日期
             current_date = datetime.strptime(month, "%Y-%m")
@@ -110,47 +306,61 @@ class PerformanceImporter:
                 # 测试模式，返回模拟数据
                 return ['001', '002'], ['003', '004']
             
-            # TODO: 从数据库获取上月数据
-            # last_month_data = pd.read_sql(f"SELECT 员工编号 FROM performance WHERE month = '{last_month}'", self.db)
-            # 
-            # current_emp_set = set(current_data['员工编号'])
-            # last_month_emp_set = set(last_month_data['员工编号'])
-            # 
-            # new_employees = list(current_emp_set - last_month_emp_set)
-            # removed_employees = list(last_month_emp_set - current_emp_set)
+            emp_ids = current_data['员工编号'].dropna().astype(str)
+            
+            conn = get_connection(self.db)
+            with temp_table(conn, 'current_employees', ['emp_id TEXT PRIMARY KEY'],
+                            ((emp_id,) for emp_id in emp_ids.unique())):
+                new_employees = [row[0] for row in conn.execute('''
+                    SELECT emp_id FROM temp.current_employees
+                    EXCEPT
+                    SELECT emp_id FROM performance WHERE month = ?
+                    ORDER BY emp_id
+                ''', (last_month,))]
+                removed_employees = [row[0] for row in conn.execute('''
+                    SELECT emp_id FROM performance WHERE month = ?
+                    EXCEPT
+                    SELECT emp_id FROM temp.current_employees
+                    ORDER BY emp_id
+                ''', (last_month,))]
             
             # 返回新增和减少的员工编号列表
-            return [], []
+            return new_employees, removed_employees
             
         except Exception as e:
             logging.error(f"检查人员变动失败: {str(e)}")
     
     def validate_employee_info(self, df: pd.DataFrame) -> List[Dict[str, str]]:
-        """验证员工号码和姓名是否匹配"""
-        mismatched_employees = []
+        """验证员工号码和姓名是否匹配
         
+        上传的(员工编号, 姓名)批量写入临时表，与employees表一次JOIN得出不匹配的记录
+        """
         try:
             if self.db is None:
                 return []
                 
-            for _, row in df.iterrows():
-                # 从数据库查询员工信息
-                cursor = self.db.cursor()
-                cursor.execute(
-                    "SELECT name FROM employees WHERE emp_id = ? AND status = 1",
-                    (row['员工编号'],)
-                )
-                result = cursor.fetchone()
+            uploaded = df[['员工编号', '姓名']].dropna(subset=['员工编号'])
+            uploaded = uploaded.astype(object).where(uploaded.notna(), None)
+            uploaded['员工编号'] = uploaded['员工编号'].astype(str)
+            
+            conn = get_connection(self.db)
+            with temp_table(conn, 'uploaded_employees', ['emp_id TEXT', 'name TEXT'],
+                            uploaded.itertuples(index=False, name=None)):
+                # 找到员工但姓名不匹配的记录
+                rows = conn.execute('''
+                    SELECT u.emp_id, u.name, e.name
+                    FROM temp.uploaded_employees u
+                    JOIN employees e ON e.emp_id = u.emp_id AND e.status = 1
+                    WHERE e.name IS NOT u.name
+                    ORDER BY u.rowid
+                ''').fetchall()
                 
-                # 如果找到员工，但姓名不匹配
-                if result and result[0] != row['姓名']:
-                    mismatched_employees.append({
-                        'emp_id': row['员工编号'],
-                        'uploaded_name': row['姓名'],
-                        'db_name': result[0]
-                    })
-                    
-            return mismatched_employees
+            return [
+                {'emp_id': emp_id, 'uploaded_name': uploaded_name, 'db_name': db_name}
+                for emp_id, uploaded_name, db_name in rows
+            ]
             
         except Exception as e:
-            logging.error(f"验证员工信息失败: {str(e)}")
\ No newline at end of file
+            logging.error(f"验证员工信息失败: {str(e)}")
+
+parsed_file_cache.register_schema(PerformanceImporter.schema)
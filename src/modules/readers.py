@@ -0,0 +1,167 @@
+import pandas as pd
+from typing import Callable, Dict, List, Tuple
+from importlib.util import find_spec
+import logging
+import codecs
+import tempfile
+import time
+import sys
+import os
+
+# 读取函数签名: read(file_path, sheet_name, dtype) -> DataFrame
+ReadFunc = Callable[[str, object, Dict], pd.DataFrame]
+
+# 编码和分隔符只根据文件开头这么多字节判断
+SNIFF_BYTES = 64 * 1024
+# 可识别的分隔符，按出现次数取最多者
+DELIMITERS = [',', '\t', ';', '|']
+
+def sniff_csv(file_path: str, sample_size: int = SNIFF_BYTES) -> Dict:
+    """识别CSV的编码和分隔符，返回{'encoding', 'sep'}
+
+    只读取文件开头sample_size字节：先看BOM，没有BOM时按零字节的位置识别UTF-16，
+    再判断是否为合法UTF-8，否则按GB18030（兼容GBK）处理；分隔符取表头行中出现最多的候选。
+    判断在样本上一次完成，之后整个文件只按识别结果读取一遍
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    complete = len(sample) < sample_size
+
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    elif sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = 'utf-16'
+    elif b'\x00' in sample:
+        # 无BOM的UTF-16：ASCII字符（逗号、数字、换行）的零字节在高位
+        even_zeros = sample[0::2].count(0)
+        odd_zeros = sample[1::2].count(0)
+        encoding = 'utf-16-be' if even_zeros > odd_zeros else 'utf-16-le'
+    else:
+        try:
+            # 样本可能截断在多字节字符中间，未读完的文件不要求结尾完整
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=complete)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'gb18030'
+
+    text = codecs.getincrementaldecoder(encoding)(errors='ignore').decode(sample)
+    header = text.lstrip('\ufeff').splitlines()[0] if text.strip() else ''
+    counts = {delimiter: header.count(delimiter) for delimiter in DELIMITERS}
+    sep = max(DELIMITERS, key=lambda delimiter: counts[delimiter])
+    return {'encoding': encoding, 'sep': sep if counts[sep] else ','}
+
+def _read_calamine(file_path, sheet_name, dtype):
+    # 基于Rust的calamine，同时支持xlsx和旧版xls，速度远快于openpyxl
+    return pd.read_excel(file_path, engine='calamine', sheet_name=sheet_name, dtype=dtype)
+
+def _read_openpyxl(file_path, sheet_name, dtype):
+    return pd.read_excel(file_path, engine='openpyxl', sheet_name=sheet_name, dtype=dtype)
+
+def _read_xlrd(file_path, sheet_name, dtype):
+    return pd.read_excel(file_path, engine='xlrd', sheet_name=sheet_name, dtype=dtype)
+
+def _read_pyarrow_csv(file_path, sheet_name, dtype):
+    # pyarrow多线程CSV解析；文本列须在解析时指定类型，事后转换会丢失编号的前导零
+    import pyarrow as pa
+    from pyarrow import csv
+    dialect = sniff_csv(file_path)
+    column_types = {name: pa.string() for name, kind in (dtype or {}).items() if kind is str}
+    return csv.read_csv(
+        file_path,
+        read_options=csv.ReadOptions(encoding=dialect['encoding']),
+        parse_options=csv.ParseOptions(delimiter=dialect['sep']),
+        convert_options=csv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+    ).to_pandas()
+
+def _read_pandas_csv(file_path, sheet_name, dtype):
+    return pd.read_csv(file_path, dtype=dtype, **sniff_csv(file_path))
+
+# 扩展名 -> [(后端名称, 依赖模块, 读取函数)]，按优先级排列，使用第一个已安装的后端
+_registry: Dict[str, List[Tuple[str, str, ReadFunc]]] = {
+    '.xlsx': [('calamine', 'python_calamine', _read_calamine), ('openpyxl', 'openpyxl', _read_openpyxl)],
+    '.xls': [('calamine', 'python_calamine', _read_calamine), ('xlrd', 'xlrd', _read_xlrd)],
+    '.csv': [('pyarrow', 'pyarrow', _read_pyarrow_csv), ('pandas', 'pandas', _read_pandas_csv)]
+}
+_available = {}
+
+def register_reader(ext: str, name: str, module: str, read: ReadFunc, first: bool = False):
+    """注册读取后端，first=True时优先于已有后端"""
+    readers = _registry.setdefault(ext.lower(), [])
+    readers.insert(0 if first else len(readers), (name, module, read))
+
+def _is_available(module: str) -> bool:
+    if module not in _available:
+        _available[module] = find_spec(module) is not None
+    return _available[module]
+
+def available_readers(ext: str) -> List[Tuple[str, ReadFunc]]:
+    """该格式下所有已安装的后端，按优先级排列"""
+    return [(name, read) for name, module, read in _registry.get(ext.lower(), []) if _is_available(module)]
+
+def get_reader(file_path: str) -> Tuple[str, ReadFunc]:
+    """为文件选择最快的已安装后端"""
+    _, ext = os.path.splitext(file_path.lower())
+    if ext not in _registry:
+        raise ValueError(f"不支持的文件格式: {ext}")
+    readers = available_readers(ext)
+    if not readers:
+        modules = '或'.join(module for _, module, _ in _registry[ext])
+        raise ValueError(f"读取{ext}文件需要安装{modules}")
+    return readers[0]
+
+def read_table(file_path: str, sheet_name=0, dtype: Dict = None) -> pd.DataFrame:
+    """用选定的后端读取整张表"""
+    name, read = get_reader(file_path)
+    logging.debug(f"使用{name}读取 {file_path}")
+    return read(file_path, sheet_name, dtype)
+
+def sheet_names(file_path: str) -> List[str]:
+    """列出工作簿中的所有工作表，只读取工作簿目录，不解析单元格"""
+    name, _ = get_reader(file_path)
+    if name in ('pyarrow', 'pandas'):
+        return [0]
+    with pd.ExcelFile(file_path, engine=name) as book:
+        return book.sheet_names
+
+def benchmark(paths: List[str], repeat: int = 3) -> List[Dict]:
+    """对每个文件测试所有已安装后端的读取耗时（取最快一次），并标出实际选用的后端"""
+    results = []
+    for path in paths:
+        _, ext = os.path.splitext(path.lower())
+        chosen = get_reader(path)[0]
+        for name, read in available_readers(ext):
+            elapsed = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = len(read(path, 0, None))
+                elapsed.append(time.perf_counter() - started)
+            results.append({
+                'file': os.path.basename(path),
+                'backend': name,
+                'chosen': name == chosen,
+                'rows': rows,
+                'seconds': min(elapsed)
+            })
+    return results
+
+def _make_samples(directory: str, rows: int) -> List[str]:
+    """生成用于对比的考勤样例文件"""
+    df = pd.DataFrame({
+        '员工编号': [f"{i:06d}" for i in range(rows)],
+        '姓名': [f"员工{i}" for i in range(rows)],
+        '出勤天数': [22 - i % 3 for i in range(rows)],
+        '加班时长': [(i % 17) / 2 for i in range(rows)]
+    })
+    paths = [os.path.join(directory, 'sample.csv'), os.path.join(directory, 'sample.xlsx')]
+    df.to_csv(paths[0], index=False)
+    df.to_excel(paths[1], index=False)
+    return paths
+
+if __name__ == '__main__':
+    # 用法: python -m src.modules.readers [文件...]，不指定文件时生成样例文件
+    with tempfile.TemporaryDirectory() as directory:
+        paths = sys.argv[1:] or _make_samples(directory, 50000)
+        for result in benchmark(paths):
+            mark = '*' if result['chosen'] else ' '
+            print(f"{mark} {result['file']:<24} {result['backend']:<10} "
+                  f"{result['rows']:>8}行 {result['seconds']:.3f}s")
@@ -1,16 +1,44 @@
 import pandas as pd
+import numpy as np
+import sqlite3
 from datetime import datetime
+import time
+from src.db.database import get_connection
+from src.modules.file_cache import parsed_file_cache
+from src.modules.xlsx_reader import should_stream, read_xlsx_header
+from src.modules.import_progress import ImportProgress, ImportCancelled
+from src.modules.import_ledger import ImportLedger
+from src.modules.import_schema import Column, ImportSchema
+from src.modules.duplicates import DuplicateRecordError, resolve_duplicates, merge_stats
+from src.modules.error_report import ErrorReport
 
-class RewardImporter:
-    def __init__(self, db):
+class RewardImporter(ImportProgress):
+    # 上传文件的字段声明
+    schema = ImportSchema([
+        Column('工号', 'str', aliases=['员工编号']),
+        Column('姓名', 'str'),
+        Column('类型', 'str'),
+        Column('金额', 'number'),
+        Column('原因', 'str', nullable=True)
+    ])
+    
+    # 结果中最多列出的出错行，全部出错行见错误报告
+    max_errors = 100
+    
+    def __init__(self, db, batch_size=5000):
         self.db = db
+        # 大文件流式读取时每批的行数
+        self.batch_size = batch_size
         
     def validate_file(self, file_path):
         """验证文件格式"""
         try:
-            df = pd.read_excel(file_path)
-            required_columns = ['工号', '姓名', '类型', '金额', '原因']
-            return all(col in df.columns for col in required_columns)
+            # 大文件只读表头，小文件解析结果进入共享缓存供导入时复用
+            if should_stream(file_path):
+                columns = read_xlsx_header(file_path)
+            else:
+                columns = parsed_file_cache.read(file_path).columns
+            return not self.schema.missing_columns(columns)
         except Exception:
             return False
             
@@ -40,30 +68,175 @@ class RewardImporter:
                 
         return mismatched_employees
         
-    def import_rewards(self, file_path, month):
-        """导入奖惩数据"""
+    def import_rewards(self, file_path, month, batch_size=None, force=False, on_duplicate='skip'):
+        """导入奖惩数据
+        
+        整个文件在一个事务内按批次executemany写入，任一行失败则全部回滚。
+        (工号, 月份, 类型, 金额, 原因)相同的记录视为重复，按on_duplicate处理（skip/overwrite/reject）。
+        出错行和跳过的重复行逐行写入错误报告，结果中只列出前max_errors条出错行。
+        同一文件已导入过该月份时直接跳过（避免奖惩记录翻倍），force=True时强制重新导入
+        """
+        batch_size = batch_size or self.batch_size
+        conn = get_connection(self.db)
+        total = 0
+        success_count = 0
+        errors = []
+        error_count = 0
+        duplicates = {}
+        report = ErrorReport.for_import('rewards', file_path, self.error_report_dir)
+        
+        def add_errors(rows):
+            nonlocal error_count
+            for row, column, message, value in rows:
+                if len(errors) < self.max_errors:
+                    errors.append({'row': int(row), 'message': message})
+                error_count += 1
+                report.add(row, column, message, value)
+        
         try:
-            df = pd.read_excel(file_path)
-            cursor = self.db.cursor
-            success_count = 0
+            # 重复文件只需计算哈希，不做任何解析
+            ledger = ImportLedger(self.db)
+            previous = None if force else ledger.find(file_path, 'rewards', month)
+            if previous:
+                return ledger.skipped_result(previous)
+            started = time.perf_counter()
+            
+            self.report_progress('读取文件')
+            
+            # 大文件按批次流式读取，小文件直接命中validate_file的解析缓存
+            if should_stream(file_path):
+                batches = parsed_file_cache.iter_batches(file_path, batch_size)
+            else:
+                batches = [parsed_file_cache.read(file_path)]
+            
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            for df in batches:
+                records, row_numbers, rejections = self.prepare_records(df, month, first_row=total + 2)
+                total += len(df)
+                add_errors(rejections)
+                # 已出现错误时只继续校验，不再写入
+                if error_count:
+                    self.report_progress('校验数据', total, 0)
+                    continue
+                
+                # 文件内和库中已有的重复记录整批一次判断
+                try:
+                    write, stats = resolve_duplicates(
+                        conn, 'rewards_punishments', self.key,
+                        pd.DataFrame(records, columns=self.record_columns), on_duplicate,
+                        report, row_numbers
+                    )
+                except DuplicateRecordError as e:
+                    add_errors((row_numbers[i], '/'.join(self.key), e.row_message, None) for i in e.positions)
+                    continue
+                merge_stats(duplicates, dict(stats, skipped=int((~write).sum())))
+                keep = np.flatnonzero(write)
+                records = [records[i] for i in keep]
+                row_numbers = [row_numbers[i] for i in keep]
+                    
+                for start in range(0, len(records), batch_size):
+                    rows = records[start:start + batch_size]
+                    conn.execute("SAVEPOINT reward_batch")
+                    try:
+                        conn.executemany(self.insert_sql, rows)
+                    except sqlite3.Error as e:
+                        # 撤销本批次已写入的部分记录后再定位出错行
+                        conn.execute("ROLLBACK TO reward_batch")
+                        index = self._locate_failed_row(conn, rows)
+                        add_errors([(row_numbers[start + index], '', str(e), None)])
+                        break
+                    finally:
+                        conn.execute("RELEASE reward_batch")
+                    success_count += len(rows)
+                    self.report_progress('写入数据库', total, success_count)
             
-            for _, row in df.iterrows():
-                cursor.execute('''
-                    INSERT INTO rewards_punishments 
-                    (emp_id, name, month, type, amount, reason)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    str(row['工号']),
-                    row['姓名'],
-                    month,
-                    row['类型'],
-                    float(row['金额']),
-                    row['原因']
-                ))
-                success_count += 1
+            if error_count:
+                conn.rollback()
+                return dict({
+                    'status': 'error',
+                    'message': f"第{errors[0]['row']}行: {errors[0]['message']}"
+                               + (f"（共 {error_count} 行出错）" if error_count > 1 else ""),
+                    'errors': errors
+                }, **report.summary())
                 
-            self.db.conn.commit()
-            return {'status': 'success', 'success': success_count}
+            conn.commit()
+            result = {
+                'status': 'success',
+                'total': total,
+                'success': success_count,
+                'failed': total - success_count - duplicates.get('skipped', 0),
+                'duplicates': duplicates
+            }
+            result.update(report.summary())
+            ledger.record(file_path, 'rewards', month, result, time.perf_counter() - started)
+            return result
+        except ImportCancelled:
+            # 取消时整个文件都不写入
+            conn.rollback()
+            return {'status': 'cancelled', 'total': 0, 'success': 0, 'failed': 0}
         except Exception as e:
-            self.db.conn.rollback()
-            return {'status': 'error', 'message': str(e)}
\ No newline at end of file
+            conn.rollback()
+            return {'status': 'error', 'message': str(e)}
+        finally:
+            report.close()
+    
+    # 待插入记录的字段顺序，以及判断重复的自然键
+    record_columns = ['emp_id', 'name', 'month', 'type', 'amount', 'reason']
+    key = ['emp_id', 'month', 'type', 'amount', 'reason']
+    
+    insert_sql = '''
+        INSERT INTO rewards_punishments 
+        (emp_id, name, month, type, amount, reason)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    
+    def prepare_records(self, df, month, first_row=2):
+        """整表一次完成类型转换和校验，返回待插入记录、记录对应的行号和不合格的单元格
+        
+        first_row为df第一行在Excel中的行号（表头占第1行）；
+        不合格的单元格为(行号, 列, 原因, 原始值)，按行号排序
+        """
+        row_numbers = pd.RangeIndex(first_row, first_row + len(df))
+        raw = df
+        df, invalid = self.schema.convert(df)
+        rejections = list(self.schema.rejections(raw, invalid, row_numbers))
+        
+        valid = ~invalid.any(axis=1).to_numpy()
+        records = pd.DataFrame({
+            'emp_id': df['工号'],
+            'name': df['姓名'],
+            'month': month,
+            'type': df['类型'],
+            'amount': df['金额'],
+            'reason': df['原因']
+        }, index=df.index)[valid]
+        records = records.astype(object).where(records.notna(), None)
+        return list(records.itertuples(index=False, name=None)), row_numbers[valid].tolist(), rejections
+    
+    def _locate_failed_row(self, conn, rows):
+        """二分定位批次中第一条写入失败的记录，返回其在批次中的下标
+        
+        失败行之前的记录保持已写入状态，每次试探只需一次executemany
+        """
+        conn.execute("SAVEPOINT locate_failed_row")
+        try:
+            # rows[:lo]已成功写入，失败行位于rows[lo:hi]
+            lo, hi = 0, len(rows)
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                conn.execute("SAVEPOINT probe")
+                try:
+                    conn.executemany(self.insert_sql, rows[lo:mid])
+                    conn.execute("RELEASE probe")
+                    lo = mid
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK TO probe")
+                    conn.execute("RELEASE probe")
+                    hi = mid
+            return lo
+        finally:
+            conn.execute("ROLLBACK TO locate_failed_row")
+            conn.execute("RELEASE locate_failed_row")
+
+parsed_file_cache.register_schema(RewardImporter.schema)
@@ -1,19 +1,62 @@
 from typing import Dict, List
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import logging
 import math
+from src.db.database import get_connection
+from src.modules.tax_engine import (MONTHLY_TAX_TABLES, BASIC_DEDUCTION, tax_table_for,
+                                    is_cumulative, cumulative_tax)
+from src.modules.salary_formula import FormulaError, formula_cache
+from src.modules.config_cache import config_cache
+
+# 月计薪天数((365-104)/12)、每日工作小时数和工作日加班工资倍数
+STANDARD_DAYS = 21.75
+DAILY_HOURS = 8
+OVERTIME_MULTIPLIER = 1.5
+
+# 工资记录的字段顺序
+RECORD_COLUMNS = ['emp_id', 'year', 'month', 'base_salary', 'performance', 'overtime_pay', 'rewards',
+                  'deductions', 'social_security', 'tax', 'net_salary', 'special_deduction']
+
+# 个税累计数的字段，截至上月的累计数在计算时以ytd_为前缀合并到整月数据
+YTD_COLUMNS = ['income', 'deductions', 'special_deductions', 'tax_withheld']
+
+# 按工资记录汇总累计数：收入为扣除社保前的应发合计，减除费用每月5000元加社保个人部分
+YTD_SUMS = '''
+    SUM(base_salary + performance + overtime_pay + rewards - deductions),
+    SUM(:basic_deduction + social_security),
+    SUM(IFNULL(special_deduction, 0)),
+    SUM(tax)
+'''
+
+def base_pay(base_salary, attendance_days):
+    """按出勤天数折算基本工资，不超过全额；没有考勤记录（NaN）按满勤计"""
+    days = np.asarray(attendance_days, dtype=float)
+    days = np.where(np.isnan(days), STANDARD_DAYS, days)
+    return np.asarray(base_salary, dtype=float) * np.minimum(days / STANDARD_DAYS, 1)
+
+def performance_pay(performance_base, full_score, score):
+    """绩效工资 = 绩效工资基数 × 得分 / 满分，没有绩效得分时为0"""
+    score = np.nan_to_num(np.asarray(score, dtype=float))
+    return np.asarray(performance_base, dtype=float) * score / np.asarray(full_score, dtype=float)
+
+def overtime_pay(base_salary, overtime_hours):
+    """加班工资 = 基本工资折算的小时工资 × 倍数 × 加班时长"""
+    hours = np.nan_to_num(np.asarray(overtime_hours, dtype=float))
+    return np.asarray(base_salary, dtype=float) / STANDARD_DAYS / DAILY_HOURS * OVERTIME_MULTIPLIER * hours
+
+def social_security(social_security_base, personal_rate):
+    """社保个人部分 = 缴纳基数 × 个人缴纳比例之和(%)"""
+    rate = np.nan_to_num(np.asarray(personal_rate, dtype=float))
+    return np.asarray(social_security_base, dtype=float) * rate / 100
 
 class SalaryCalculator:
     def __init__(self, db_connection):
         self.db = db_connection
-        self.tax_brackets = [
-            (0, 3000, 0.03),
-            (3000, 12000, 0.1),
-            (12000, 25000, 0.2),
-            (25000, 35000, 0.25),
-            (35000, 55000, 0.3),
-            (55000, 80000, 0.35),
-            (80000, float('inf'), 0.45)
-        ]
-    
+        # 按生效日期排列的月度税率表，历史月份按当时的税率表重算
+        self.tax_tables = MONTHLY_TAX_TABLES
+
     def calculate_salary(self, emp_id: str, year: int, month: int) -> Dict:
         """计算单个员工的薪资"""
         try:
@@ -21,20 +64,36 @@ class SalaryCalculator:
             emp_info = self.get_employee_info(emp_id)
             group_config = self.get_salary_group_config(emp_info['salary_group'])
             attendance = self.get_attendance(emp_id, year, month)
-            
+
             # 计算各项薪资
             base_salary = self.calculate_base_salary(group_config, attendance)
             performance = self.calculate_performance(group_config, attendance)
             overtime_pay = self.calculate_overtime(group_config, attendance)
             social_security = self.calculate_social_security(group_config, base_salary)
-            
+            rewards, deductions = attendance['rewards'], attendance['deductions']
+
             # 计算应纳税所得额
-            taxable_income = base_salary + performance + overtime_pay - social_security
-            tax = self.calculate_tax(taxable_income)
-            
-            # 计算实发工资
+            taxable_income = base_salary + performance + overtime_pay + rewards - deductions - social_security
+            if is_cumulative(year, month):
+                ytd = self.get_tax_ytd(emp_id, year, month)
+                special = emp_info['special_deduction'] or 0
+                tax = float(cumulative_tax(ytd['income'] + taxable_income + social_security,
+                                           ytd['deductions'] + BASIC_DEDUCTION + social_security,
+                                           ytd['special_deductions'] + special, ytd['tax_withheld']))
+            else:
+                tax = self.calculate_monthly_tax(taxable_income, year, month)
+
+            # 计算实发工资，薪资组设置了公式时按公式计算
             net_salary = taxable_income - tax
-            
+            formula = group_config['formula']
+            if isinstance(formula, str) and formula.strip():
+                values = {'基本工资': base_salary, '绩效工资': performance, '加班工资': overtime_pay,
+                          '奖励': rewards, '扣款': deductions, '社保': social_security, '个税': tax}
+                net_salary = float(self.evaluate_formula(
+                    group_config['group_id'], formula, values,
+                    self.load_salary_items(get_connection(self.db))
+                ))
+
             return {
                 'emp_id': emp_id,
                 'year': year,
@@ -42,20 +101,391 @@ class SalaryCalculator:
                 'base_salary': base_salary,
                 'performance': performance,
                 'overtime_pay': overtime_pay,
+                'rewards': rewards,
+                'deductions': deductions,
                 'social_security': social_security,
                 'tax': tax,
                 'net_salary': net_salary
             }
-            
+
         except Exception as e:
             logging.error(f"薪资计算失败: {str(e)}")
             return None
-    
+
+    def calculate_month(self, year: int, month: int, save: bool = False, force: bool = False) -> pd.DataFrame:
+        """计算整月所有在职员工的薪资
+
+        员工、薪资组、考勤、绩效和奖惩各用一条集合查询读出，按工号合并后
+        每项薪资都是整列运算，不逐个员工查询或计算。未分配薪资组的员工不计算。
+        2019年起按累计预扣法计税，截至上月的累计数直接从tax_ytd表读出，
+        每人每月只做一次增量计算；返回结果中的ytd_各列为截至本月的累计数。
+        save=True即结算该月：在一个事务内替换该月的工资记录并更新累计表。
+        之后的月份已结算过时，其个税按旧的累计数算出，重新结算本月会使其过时，
+        因此抛出ValueError，应改用recalculate_from从本月起按顺序重新结算；
+        force=True时只结算本月并记录警告，之后的月份需另行重新结算
+        """
+        conn = get_connection(self.db)
+        period = f"{year:04d}-{month:02d}"
+        start_date = f"{period}-01"
+        end_date = (datetime.strptime(start_date, '%Y-%m-%d') + pd.DateOffset(months=1)).strftime('%Y-%m-%d')
+
+        employees = pd.read_sql_query(
+            "SELECT emp_id, salary_group, special_deduction FROM employees WHERE status = 1", conn
+        )
+        groups = self.load_salary_groups(conn)
+        attendance = pd.read_sql_query('''
+            SELECT emp_id, SUM(attendance_days) AS attendance_days, SUM(overtime_hours) AS overtime_hours
+            FROM attendance WHERE date >= ? AND date < ?
+            GROUP BY emp_id
+        ''', conn, params=(start_date, end_date))
+        performance = pd.read_sql_query(
+            "SELECT emp_id, score FROM performance WHERE month = ?", conn, params=(period,)
+        )
+        rewards = pd.read_sql_query('''
+            SELECT emp_id,
+                   SUM(CASE WHEN type = '奖励' THEN amount ELSE 0 END) AS rewards,
+                   SUM(CASE WHEN type = '惩罚' THEN amount ELSE 0 END) AS deductions
+            FROM rewards_punishments WHERE month = ?
+            GROUP BY emp_id
+        ''', conn, params=(period,))
+
+        ungrouped = ~employees['salary_group'].isin(groups['group_id'])
+        if ungrouped.any():
+            logging.warning(f"{int(ungrouped.sum())} 名在职员工未分配薪资组，未计算薪资")
+        uninsured = groups.loc[groups['personal_rate'].isna() & groups['group_id'].isin(employees['salary_group']),
+                               'group_id']
+        if len(uninsured):
+            logging.warning(f"薪资组{', '.join(uninsured)}未关联社保配置组或配置组没有社保项目，社保个人部分按0计算")
+
+        df = (employees[~ungrouped]
+              .merge(groups, left_on='salary_group', right_on='group_id', how='left')
+              .merge(attendance, on='emp_id', how='left')
+              .merge(performance, on='emp_id', how='left')
+              .merge(rewards, on='emp_id', how='left'))
+        if is_cumulative(year, month):
+            df = df.merge(self.load_ytd(conn, year, month), on='emp_id', how='left')
+
+        records = self.compute(df, year, month, self.load_salary_items(conn))
+        records.insert(1, 'year', year)
+        records.insert(2, 'month', month)
+        if save:
+            later = self.saved_months_after(conn, year, month) if is_cumulative(year, month) else []
+            if later:
+                message = f"{year}年{'、'.join(map(str, later))}月已结算，重新结算{month}月后这些月份的个税将过时"
+                if not force:
+                    raise ValueError(f"{message}，请用recalculate_from从{month}月起按顺序重新结算")
+                logging.warning(message)
+            self.save_records(conn, year, month, records)
+        return records
+
+    def load_salary_groups(self, conn) -> pd.DataFrame:
+        """全部薪资组，社保个人比例取所属社保配置组各项目之和；配置表从config_cache读取"""
+        rates = config_cache.insurance_groups(conn)[['id', 'personal_rate']]
+        return config_cache.salary_groups(conn).merge(
+            rates, left_on='insurance_group_id', right_on='id', how='left'
+        ).drop(columns=['id', 'insurance_group_id'])
+
+    def load_salary_items(self, conn) -> Dict:
+        """薪酬项的名称和金额，供薪资组公式引用"""
+        return config_cache.salary_items(conn)
+
+    def evaluate_formula(self, group_id: str, formula: str, values: Dict, items: Dict = None):
+        """按薪资组公式计算实发工资，values为公式关键字对应的数组或数值
+
+        公式按(薪资组, 公式文本)缓存，只在首次使用或修改后编译一次；
+        关键字优先于同名薪酬项
+        """
+        try:
+            compiled = formula_cache.get(group_id, formula)
+            return compiled.evaluate(dict(items or {}, **values))
+        except FormulaError as e:
+            raise FormulaError(f"薪资组{group_id}的公式无效: {e}") from e
+
+    def compute(self, df: pd.DataFrame, year: int, month: int, items: Dict = None) -> pd.DataFrame:
+        """按合并后的整月数据整列计算各项薪资，金额保留两位小数
+
+        设置了公式的薪资组，实发工资按公式对组内员工整列求值，items为公式可引用的薪酬项金额
+        """
+        base_salary = df['base_salary'].fillna(0).to_numpy(dtype=float)
+        base = base_pay(base_salary, df['attendance_days'])
+        performance = performance_pay(df['performance_base'], df['full_score'], df['score'])
+        overtime = overtime_pay(base_salary, df['overtime_hours'])
+        social = social_security(df['social_security_base'].fillna(0), df['personal_rate'])
+        rewards = df['rewards'].fillna(0).to_numpy(dtype=float)
+        deductions = df['deductions'].fillna(0).to_numpy(dtype=float)
+
+        taxable_income = base + performance + overtime + rewards - deductions - social
+        if is_cumulative(year, month):
+            special = df['special_deduction'].fillna(0).to_numpy(dtype=float)
+            ytd = {column: df['ytd_' + column].fillna(0).to_numpy(dtype=float) for column in YTD_COLUMNS}
+            tax = cumulative_tax(ytd['income'] + taxable_income + social,
+                                 ytd['deductions'] + BASIC_DEDUCTION + social,
+                                 ytd['special_deductions'] + special, ytd['tax_withheld'])
+        else:
+            # 2019年之前没有专项附加扣除，按月度税率表计税
+            special = np.zeros(len(df))
+            ytd = None
+            tax = self.calculate_monthly_tax_vector(taxable_income, year, month)
+
+        net_salary = taxable_income - tax
+        if 'formula' in df.columns:
+            values = {'基本工资': base, '绩效工资': performance, '加班工资': overtime, '奖励': rewards,
+                      '扣款': deductions, '社保': social, '个税': tax}
+            formulas = df['formula'].where(df['formula'].fillna('').astype(str).str.strip() != '')
+            for (group_id, formula), positions in df.assign(formula=formulas).groupby(
+                    ['group_id', 'formula']).indices.items():
+                net_salary[positions] = self.evaluate_formula(
+                    group_id, formula, {name: array[positions] for name, array in values.items()}, items
+                )
+        records = pd.DataFrame({
+            'emp_id': df['emp_id'].to_numpy(),
+            'base_salary': base,
+            'performance': performance,
+            'overtime_pay': overtime,
+            'rewards': rewards,
+            'deductions': deductions,
+            'social_security': social,
+            'tax': tax,
+            'net_salary': net_salary,
+            'special_deduction': special
+        }).round(2)
+        if ytd is not None:
+            # 累计数按保留两位小数后的本月金额累加，与按工资记录重建的结果一致
+            records['ytd_income'] = ytd['income'] + (records['base_salary'] + records['performance']
+                                                     + records['overtime_pay'] + records['rewards']
+                                                     - records['deductions'])
+            records['ytd_deductions'] = ytd['deductions'] + BASIC_DEDUCTION + records['social_security']
+            records['ytd_special_deductions'] = ytd['special_deductions'] + records['special_deduction']
+            records['ytd_tax_withheld'] = ytd['tax_withheld'] + records['tax']
+            records = records.round(2)
+        return records
+
+    def save_records(self, conn, year: int, month: int, records: pd.DataFrame):
+        """在一个事务内替换该月的工资记录，按累计预扣法计税的月份同时更新累计表
+
+        累计表更新到本月；重新结算已结算过的月份时，累计数随之回到本月，
+        之后的月份需按顺序重新结算（见recalculate_from），或用rebuild_tax_ytd按工资记录重建
+        """
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            conn.execute("DELETE FROM salary_records WHERE year = ? AND month = ?", (year, month))
+            columns = ', '.join(RECORD_COLUMNS)
+            placeholders = ', '.join('?' * len(RECORD_COLUMNS))
+            conn.executemany(
+                f"INSERT INTO salary_records ({columns}) VALUES ({placeholders})",
+                records[RECORD_COLUMNS].astype(object).itertuples(index=False, name=None)
+            )
+            if is_cumulative(year, month):
+                self.save_ytd(conn, year, month, records)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def saved_months_after(self, conn, year: int, month: int) -> List[int]:
+        """本年度该月之后已结算的月份"""
+        return [row[0] for row in conn.execute(
+            "SELECT DISTINCT month FROM salary_records WHERE year = ? AND month > ? ORDER BY month", (year, month)
+        )]
+
+    def recalculate_from(self, year: int, month: int) -> List[int]:
+        """从该月起按顺序重新结算本年度已结算的各月，每月按上月结算后的累计数计税，返回重新结算的月份"""
+        conn = get_connection(self.db)
+        months = [month] + self.saved_months_after(conn, year, month)
+        for current in months:
+            self.save_records(conn, year, current, self.calculate_month(year, current))
+        return months
+
+    def save_ytd(self, conn, year: int, month: int, records: pd.DataFrame):
+        """在调用方的事务内把本月结算后的累计数写入累计表
+
+        累计数以本月为准写入，之后的月份已结算时由calculate_month先行拒绝或警告
+        """
+        conn.executemany('''
+            INSERT INTO tax_ytd (emp_id, tax_year, last_month, income, deductions, special_deductions, tax_withheld)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(emp_id, tax_year) DO UPDATE SET
+                last_month = excluded.last_month,
+                income = excluded.income,
+                deductions = excluded.deductions,
+                special_deductions = excluded.special_deductions,
+                tax_withheld = excluded.tax_withheld,
+                updated_at = CURRENT_TIMESTAMP
+        ''', ((emp_id, year, month, *values) for emp_id, *values in
+              records[['emp_id'] + ['ytd_' + column for column in YTD_COLUMNS]]
+              .astype(object).itertuples(index=False, name=None)))
+
+        # 已累计到本月或之后、但本月没有结算的员工（如已离职），累计数回到本月之前的工资记录
+        params = {'year': year, 'month': month, 'basic_deduction': BASIC_DEDUCTION}
+        stale = '''
+            tax_year = :year AND last_month >= :month AND emp_id NOT IN (
+                SELECT emp_id FROM salary_records WHERE year = :year AND month = :month)
+        '''
+        conn.execute(f'''
+            DELETE FROM tax_ytd WHERE {stale} AND NOT EXISTS (
+                SELECT 1 FROM salary_records r
+                WHERE r.emp_id = tax_ytd.emp_id AND r.year = :year AND r.month < :month)
+        ''', params)
+        conn.execute(f'''
+            UPDATE tax_ytd SET (last_month, income, deductions, special_deductions, tax_withheld) = (
+                SELECT MAX(month), {YTD_SUMS} FROM salary_records
+                WHERE emp_id = tax_ytd.emp_id AND year = :year AND month < :month),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE {stale}
+        ''', params)
+
+    def load_ytd(self, conn, year: int, month: int, emp_id: str = None) -> pd.DataFrame:
+        """读取截至上月的个税累计数，列名加ytd_前缀
+
+        一般直接取累计表中的一行；累计表已到本月或之后（重新结算）的员工，
+        改由本年度本月之前的工资记录汇总
+        """
+        only = " AND emp_id = :emp_id" if emp_id is not None else ""
+        columns = ', '.join(f"{column} AS ytd_{column}" for column in YTD_COLUMNS)
+        return pd.read_sql_query(f'''
+            SELECT emp_id, {columns} FROM tax_ytd
+            WHERE tax_year = :year AND last_month < :month{only}
+            UNION ALL
+            SELECT emp_id, {YTD_SUMS} FROM salary_records
+            WHERE year = :year AND month < :month{only} AND emp_id IN (
+                SELECT emp_id FROM tax_ytd WHERE tax_year = :year AND last_month >= :month)
+            GROUP BY emp_id
+        ''', conn, params={'year': year, 'month': month, 'emp_id': emp_id, 'basic_deduction': BASIC_DEDUCTION})
+
+    def get_tax_ytd(self, emp_id: str, year: int, month: int) -> Dict:
+        """单个员工截至上月的个税累计数，没有记录时均为0"""
+        ytd = self.load_ytd(get_connection(self.db), year, month, emp_id)
+        if ytd.empty:
+            return dict.fromkeys(YTD_COLUMNS, 0.0)
+        row = ytd.iloc[0]
+        return {column: float(row['ytd_' + column] or 0) for column in YTD_COLUMNS}
+
+    def rebuild_tax_ytd(self, tax_year: int) -> int:
+        """按已保存的工资记录重建该纳税年度的个税累计表，返回重建的员工数
+
+        用于直接更正工资记录或累计表与工资记录不一致之后，整年一条集合查询完成
+        """
+        if not is_cumulative(tax_year, 12):
+            raise ValueError(f"{tax_year}年按月计税，没有个税累计数")
+        conn = get_connection(self.db)
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            conn.execute("DELETE FROM tax_ytd WHERE tax_year = ?", (tax_year,))
+            count = conn.execute(f'''
+                INSERT INTO tax_ytd (emp_id, tax_year, last_month, income, deductions, special_deductions, tax_withheld)
+                SELECT emp_id, year, MAX(month), {YTD_SUMS}
+                FROM salary_records WHERE year = :year
+                GROUP BY emp_id
+            ''', {'year': tax_year, 'basic_deduction': BASIC_DEDUCTION}).rowcount
+            conn.commit()
+            return count
+        except Exception:
+            conn.rollback()
+            raise
+
+    def get_employee_info(self, emp_id: str) -> Dict:
+        """读取员工信息"""
+        row = get_connection(self.db).execute(
+            "SELECT emp_id, name, salary_group, special_deduction FROM employees WHERE emp_id = ?", (emp_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"未找到员工: {emp_id}")
+        return {'emp_id': row[0], 'name': row[1], 'salary_group': row[2], 'special_deduction': row[3]}
+
+    def get_salary_group_config(self, group_id: str) -> Dict:
+        """读取薪资组配置"""
+        groups = self.load_salary_groups(get_connection(self.db))
+        groups = groups[groups['group_id'] == group_id]
+        if groups.empty:
+            raise ValueError(f"未找到薪资组: {group_id}")
+        return groups.iloc[0].to_dict()
+
+    def get_attendance(self, emp_id: str, year: int, month: int) -> Dict:
+        """读取员工当月的考勤、绩效和奖惩汇总，没有记录的项为None"""
+        conn = get_connection(self.db)
+        period = f"{year:04d}-{month:02d}"
+        start_date = f"{period}-01"
+        end_date = (datetime.strptime(start_date, '%Y-%m-%d') + pd.DateOffset(months=1)).strftime('%Y-%m-%d')
+        days, hours = conn.execute('''
+            SELECT SUM(attendance_days), SUM(overtime_hours) FROM attendance
+            WHERE emp_id = ? AND date >= ? AND date < ?
+        ''', (emp_id, start_date, end_date)).fetchone()
+        score = conn.execute(
+            "SELECT score FROM performance WHERE emp_id = ? AND month = ?", (emp_id, period)
+        ).fetchone()
+        rewards, deductions = conn.execute('''
+            SELECT SUM(CASE WHEN type = '奖励' THEN amount ELSE 0 END),
+                   SUM(CASE WHEN type = '惩罚' THEN amount ELSE 0 END)
+            FROM rewards_punishments WHERE emp_id = ? AND month = ?
+        ''', (emp_id, period)).fetchone()
+        return {
+            'attendance_days': days,
+            'overtime_hours': hours,
+            'score': score[0] if score else None,
+            'rewards': rewards or 0,
+            'deductions': deductions or 0
+        }
+
+    def calculate_base_salary(self, group_config: Dict, attendance: Dict) -> float:
+        """按出勤折算基本工资"""
+        days = attendance['attendance_days']
+        return float(base_pay(group_config['base_salary'] or 0, math.nan if days is None else days))
+
+    def calculate_performance(self, group_config: Dict, attendance: Dict) -> float:
+        """按绩效得分计算绩效工资"""
+        score = attendance['score']
+        return float(performance_pay(group_config['performance_base'], group_config['full_score'],
+                                     math.nan if score is None else score))
+
+    def calculate_overtime(self, group_config: Dict, attendance: Dict) -> float:
+        """计算加班工资"""
+        hours = attendance['overtime_hours']
+        return float(overtime_pay(group_config['base_salary'] or 0, math.nan if hours is None else hours))
+
+    def calculate_social_security(self, group_config: Dict, base_salary: float) -> float:
+        """计算社保个人部分"""
+        if pd.isna(group_config['personal_rate']):
+            logging.warning(f"薪资组{group_config['group_id']}未关联社保配置组或配置组没有社保项目，社保个人部分按0计算")
+        return float(social_security(group_config['social_security_base'] or 0, group_config['personal_rate']))
+
     def calculate_tax(self, income: float) -> float:
-        """计算个人所得税"""
-        tax = 0
-        for lower, upper, rate in self.tax_brackets:
-            if income > lower:
-                taxable = min(income - lower, upper - lower)
-                tax += taxable * rate
-        return tax
\ No newline at end of file
+        """计算个人所得税，income为已扣除起征点的应纳税所得额，按现行月度税率表计算"""
+        return self.tax_table().tax_taxable_one(income)
+
+    def calculate_tax_vector(self, incomes: np.ndarray) -> np.ndarray:
+        """整列计算个人所得税，与calculate_tax的结果一致"""
+        return self.tax_table().tax_taxable(incomes)
+
+    def calculate_monthly_tax(self, income: float, year: int, month: int) -> float:
+        """按月计税（2019年之前）的个人所得税：income为扣除社保后的月收入，
+        按该月适用的税率表先扣除起征点再计算"""
+        return self.tax_table(year, month).tax_one(income)
+
+    def calculate_monthly_tax_vector(self, incomes: np.ndarray, year: int, month: int) -> np.ndarray:
+        """整列计算按月计税的个人所得税，与calculate_monthly_tax的结果一致"""
+        return self.tax_table(year, month).tax(incomes)
+
+    def tax_table(self, year: int = None, month: int = None):
+        """该月适用的税率表"""
+        if year is None or month is None:
+            today = datetime.now()
+            year, month = today.year, today.month
+        return tax_table_for(year, month, self.tax_tables)
+
+if __name__ == '__main__':
+    # 用法: python -m src.modules.salary_calculator rebuild-tax-ytd 年度
+    import argparse
+    from src.db.database import Database
+    parser = argparse.ArgumentParser(description='薪资计算维护命令')
+    parser.add_argument('command', choices=['rebuild-tax-ytd'])
+    parser.add_argument('year', type=int)
+    args = parser.parse_args()
+    db = Database()
+    db.connect()
+    try:
+        count = SalaryCalculator(db).rebuild_tax_ytd(args.year)
+        print(f"已重建{args.year}年 {count} 名员工的个税累计数")
+    finally:
+        db.close()
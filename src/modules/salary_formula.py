@@ -0,0 +1,154 @@
+from typing import Dict, Iterable, List
+import re
+import threading
+import numpy as np
+
+# 公式中可直接使用的薪资项，其余名称按薪酬项名称取金额
+FORMULA_KEYWORDS = ['基本工资', '绩效工资', '加班工资', '奖励', '扣款', '社保', '个税']
+
+# 全角运算符和括号统一为半角
+FULL_WIDTH = str.maketrans({'（': '(', '）': ')', '＋': '+', '－': '-', '×': '*', '＊': '*', '÷': '/', '／': '/'})
+
+# 数字 | 运算符和括号 | 名称（不以数字开头，不含空白和运算符）
+TOKEN = re.compile(r'\s*(?:(\d+(?:\.\d*)?|\.\d+)|([-+*/()])|([^\s\d.+\-*/()][^\s+\-*/()]*))')
+
+OPERATORS = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}
+
+class FormulaError(ValueError):
+    """薪资计算公式无法解析或引用了未知的项目"""
+
+class SalaryFormula:
+    """编译后的薪资计算公式
+
+    解析时只接受数字、+ - * /、括号和名称，生成语法树后组合成求值函数，
+    不经过eval；求值时名称取对应的数组或数值，整列一次算出
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self._tokens = tokenize(text)
+        self._position = 0
+        self.names = set()
+        self.tree = self._expression()
+        if self._position < len(self._tokens):
+            raise FormulaError(f"公式中多余的内容: {self._tokens[self._position][1]}")
+        del self._tokens
+        self._evaluate = _build(self.tree)
+
+    def unknown_names(self, item_names: Iterable[str] = ()) -> List[str]:
+        """公式中既不是关键字也不是已有薪酬项的名称"""
+        return sorted(self.names - set(FORMULA_KEYWORDS) - set(item_names))
+
+    def evaluate(self, values: Dict) -> np.ndarray:
+        """按名称对应的数组或数值求值，结果不是有限数（如除数为0）时抛出FormulaError"""
+        missing = self.names - values.keys()
+        if missing:
+            raise FormulaError(f"公式中的未知项目: {', '.join(sorted(missing))}")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = np.asarray(self._evaluate(values), dtype=float)
+        if not np.isfinite(result).all():
+            raise FormulaError("公式计算结果无效（除数为0）")
+        return result
+
+    # 递归下降解析：表达式由项以+ -连接，项由因子以* /连接
+    def _peek(self):
+        return self._tokens[self._position] if self._position < len(self._tokens) else (None, None)
+
+    def _take(self):
+        token = self._peek()
+        self._position += 1
+        return token
+
+    def _expression(self):
+        node = self._term()
+        while self._peek() in (('op', '+'), ('op', '-')):
+            node = (self._take()[1], node, self._term())
+        return node
+
+    def _term(self):
+        node = self._factor()
+        while self._peek() in (('op', '*'), ('op', '/')):
+            node = (self._take()[1], node, self._factor())
+        return node
+
+    def _factor(self):
+        kind, value = self._take()
+        if kind == 'number':
+            return ('number', value)
+        if kind == 'name':
+            self.names.add(value)
+            return ('name', value)
+        if (kind, value) == ('op', '-'):
+            return ('neg', self._factor())
+        if (kind, value) == ('op', '+'):
+            return self._factor()
+        if (kind, value) == ('op', '('):
+            node = self._expression()
+            if self._take() != ('op', ')'):
+                raise FormulaError("公式中的括号不匹配")
+            return node
+        raise FormulaError("公式不完整" if kind is None else f"公式中的位置不正确: {value}")
+
+def tokenize(text: str) -> List[tuple]:
+    """把公式切分为(类型, 值)序列，类型为number/op/name"""
+    text = (text or '').translate(FULL_WIDTH).strip()
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise FormulaError(f"公式中无法识别的内容: {text[position:].strip()[:10]}")
+        number, operator, name = match.groups()
+        if number is not None:
+            tokens.append(('number', float(number)))
+        elif operator is not None:
+            tokens.append(('op', operator))
+        else:
+            tokens.append(('name', name))
+        position = match.end()
+    if not tokens:
+        raise FormulaError("公式为空")
+    return tokens
+
+def _build(node):
+    """把语法树组合成求值函数"""
+    kind = node[0]
+    if kind == 'number':
+        value = node[1]
+        return lambda values: value
+    if kind == 'name':
+        name = node[1]
+        return lambda values: values[name]
+    if kind == 'neg':
+        operand = _build(node[1])
+        return lambda values: np.negative(operand(values))
+    operator, left, right = OPERATORS[kind], _build(node[1]), _build(node[2])
+    return lambda values: operator(left(values), right(values))
+
+def compile_formula(text: str) -> SalaryFormula:
+    """解析公式，语法错误时抛出FormulaError"""
+    return SalaryFormula(text)
+
+class FormulaCache:
+    """已编译公式的缓存
+
+    以薪资组为键，公式文本不变时直接复用编译结果，修改公式后下次取用时重新编译
+    """
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, group_id: str, formula: str) -> SalaryFormula:
+        with self._lock:
+            compiled = self._entries.get(group_id)
+        if compiled is not None and compiled.text == formula:
+            return compiled
+        compiled = compile_formula(formula)
+        with self._lock:
+            self._entries[group_id] = compiled
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+formula_cache = FormulaCache()
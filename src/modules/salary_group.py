@@ -1,50 +1,57 @@
-from typing import Dict, List
+from typing import Dict
 import json
+import logging
 from datetime import datetime
+from src.db.database import get_connection
+from src.modules.salary_formula import FormulaError, compile_formula
+from src.modules.config_cache import config_cache
 
 class SalaryGroup:
     def __init__(self, db_connection):
         self.db = db_connection
         
     def create_group(self, group_data: Dict) -> bool:
-        """创建新的薪资组"""
+        """创建新的薪资组，公式无效时不创建
+
+        insurance_group_id为社保配置组ID，社保个人部分按该组各项目的个人比例计算；
+        未设置时社保个人部分为0
+        """
         try:
-            cursor = self.db.cursor()
-            cursor.execute('''
+            if group_data.get('formula') and not self.validate_formula(group_data['formula']):
+                logging.error(f"创建薪资组失败: 薪资计算公式无效: {group_data['formula']}")
+                return False
+            if group_data.get('insurance_group_id') is None:
+                logging.warning(f"薪资组{group_data['group_id']}未关联社保配置组，社保个人部分将按0计算")
+            conn = get_connection(self.db)
+            conn.execute('''
                 INSERT INTO salary_groups 
                 (group_id, group_name, base_salary, performance_rule, 
-                social_security_base, formula, create_time)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                social_security_base, insurance_group_id, formula, create_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 group_data['group_id'],
                 group_data['group_name'],
                 group_data['base_salary'],
                 json.dumps(group_data['performance_rule']),
                 group_data['social_security_base'],
-                group_data['formula'],
+                group_data.get('insurance_group_id'),
+                group_data.get('formula'),
                 datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             ))
-            self.db.commit()
+            conn.commit()
+            config_cache.invalidate('salary_groups')
             return True
         except Exception as e:
             logging.error(f"创建薪资组失败: {str(e)}")
             return False
     
     def validate_formula(self, formula: str) -> bool:
-        """验证薪资计算公式"""
+        """验证薪资计算公式：能够解析，且只引用公式关键字和已有的薪酬项
+
+        薪酬项与计算薪资时一样取自config_cache，验证和计算看到的是同一组薪酬项
+        """
         try:
-            # 检查基本语法
-            allowed_operators = ['+', '-', '*', '/', '(', ')', '.']
-            allowed_keywords = ['基本工资', '绩效工资', '加班工资', '社保', '个税']
-            
-            # 简单的词法分析
-            tokens = formula.split()
-            for token in tokens:
-                if (not any(keyword in token for keyword in allowed_keywords) and
-                    not token.replace('.','').isdigit() and
-                    token not in allowed_operators):
-                    return False
-            
-            return True
-        except:
-            return False
\ No newline at end of file
+            compiled = compile_formula(formula)
+        except FormulaError:
+            return False
+        return not compiled.unknown_names(config_cache.salary_items(get_connection(self.db)))
@@ -0,0 +1,133 @@
+import pandas as pd
+from typing import Iterator, Optional
+import logging
+import threading
+import os
+from src.modules.import_ledger import ImportLedger
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # pyarrow为可选依赖，未安装时不启用暂存
+    pa = None
+
+class StagingCache:
+    """上传表格的列式暂存副本（Arrow IPC格式）
+
+    每个完整解析过的上传文件按内容哈希保存一份规范化副本：列名统一为字符串，
+    各列统一为可空字符串类型（清洗阶段再做数值转换，与原始解析结果的处理方式一致）。
+    之后的验证、预览、导入和复核直接以内存映射方式读取副本，无需再次解析xlsx。
+    目录总大小超过max_bytes时按最近使用时间淘汰。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return pa is not None and self.cache_dir is not None
+
+    def _path(self, file_path: str, sheet_name) -> str:
+        # 哈希按(路径, 大小, 修改时间)缓存（见ImportLedger.hash_file），
+        # 同一次导入中的验证、读取和台账记录只计算一次
+        file_hash = ImportLedger.hash_file(file_path)
+        return os.path.join(self.cache_dir, f"{file_hash}_{sheet_name}.arrow")
+
+    @staticmethod
+    def normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """转换为暂存副本的统一格式"""
+        return pd.DataFrame({str(column): df[column].astype('string') for column in df.columns})
+
+    def load(self, file_path: str, sheet_name=0) -> Optional[pd.DataFrame]:
+        """读取暂存副本，没有副本时返回None"""
+        if not self.enabled:
+            return None
+        path = self._path(file_path, sheet_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            # 更新访问时间，供淘汰时判断最近使用
+            os.utime(path)
+            return feather.read_table(path, memory_map=True).to_pandas()
+        except Exception as e:
+            logging.warning(f"读取暂存副本失败: {str(e)}")
+            return None
+
+    def iter_batches(self, file_path: str, batch_size: int, sheet_name=0) -> Optional[Iterator[pd.DataFrame]]:
+        """按批次读取暂存副本，没有副本时返回None"""
+        if not self.enabled:
+            return None
+        path = self._path(file_path, sheet_name)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)
+        table = feather.read_table(path, memory_map=True)
+        return (batch.to_pandas() for batch in table.to_batches(max_chunksize=batch_size))
+
+    def store(self, file_path: str, df: pd.DataFrame, sheet_name=0):
+        """保存完整解析结果的副本"""
+        if not self.enabled:
+            return
+        try:
+            path = self._path(file_path, sheet_name)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            table = pa.Table.from_pandas(self.normalize(df), preserve_index=False)
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+            self.evict()
+        except Exception as e:
+            logging.warning(f"写入暂存副本失败: {str(e)}")
+
+    def stream_store(self, file_path: str, batches: Iterator[pd.DataFrame], sheet_name=0) -> Iterator[pd.DataFrame]:
+        """流式读取时边读边写副本，批次原样传给调用方；只有完整读完文件才保留副本"""
+        if not self.enabled:
+            yield from batches
+            return
+
+        path = self._path(file_path, sheet_name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        writer = None
+        failed = False
+        try:
+            for batch in batches:
+                if not failed:
+                    try:
+                        table = pa.Table.from_pandas(self.normalize(batch), preserve_index=False)
+                        if writer is None:
+                            os.makedirs(self.cache_dir, exist_ok=True)
+                            writer = pa.ipc.new_file(tmp_path, table.schema)
+                        writer.write_table(table)
+                    except Exception as e:
+                        # 副本不完整则放弃，不影响本次读取
+                        logging.warning(f"写入暂存副本失败: {str(e)}")
+                        failed = True
+                yield batch
+            if writer is not None and not failed:
+                writer.close()
+                writer = None
+                os.replace(tmp_path, path)
+                self.evict()
+        finally:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        """目录超过容量时删除最久未使用的副本"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.arrow'):
+                    path = os.path.join(self.cache_dir, name)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
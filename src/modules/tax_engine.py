@@ -0,0 +1,84 @@
+from typing import List, Tuple
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+class TaxTable:
+    """一版超额累进税率表
+
+    构造时一次算出各级的下限、税率和速算扣除数，
+    之后税额 = 应纳税所得额 × 税率 - 速算扣除数，只需查出所在级次，不再逐级累加
+    """
+    def __init__(self, effective_date: str, threshold: float, brackets: List[Tuple[float, float]]):
+        # brackets为各级的(上限, 税率)，最后一级上限为inf
+        self.effective_date = effective_date
+        self.threshold = threshold
+        self.brackets = brackets
+        self.lowers = np.array([0.0] + [upper for upper, _ in brackets[:-1]])
+        self.rates = np.array([rate for _, rate in brackets])
+        # 速算扣除数：上一级扣除数 + 本级下限 × 税率差，按分取整消除浮点误差
+        self.quick_deductions = np.round(np.concatenate(([0.0], np.cumsum(self.lowers[1:] * np.diff(self.rates)))), 2)
+        self._lowers = self.lowers.tolist()
+        self._rates = self.rates.tolist()
+        self._quick_deductions = self.quick_deductions.tolist()
+
+    def tax(self, incomes) -> np.ndarray:
+        """整列计算税额：扣除起征点后按应纳税所得额计算"""
+        return self.tax_taxable(np.asarray(incomes, dtype=float) - self.threshold)
+
+    def tax_one(self, income: float) -> float:
+        """单个员工的税额，不经过numpy数组"""
+        return self.tax_taxable_one(income - self.threshold)
+
+    def tax_taxable(self, taxable) -> np.ndarray:
+        """按已扣除起征点的应纳税所得额整列计算税额：一次searchsorted查出级次，再一次乘减"""
+        taxable = np.maximum(np.asarray(taxable, dtype=float), 0)
+        level = np.maximum(np.searchsorted(self.lowers, taxable, side='left') - 1, 0)
+        return taxable * self.rates[level] - self.quick_deductions[level]
+
+    def tax_taxable_one(self, taxable: float) -> float:
+        """单个应纳税所得额（已扣除起征点）的税额"""
+        taxable = max(taxable, 0)
+        level = max(bisect_left(self._lowers, taxable) - 1, 0)
+        return taxable * self._rates[level] - self._quick_deductions[level]
+
+# 工资薪金所得月度税率表，按生效日期排列
+MONTHLY_TAX_TABLES = [
+    TaxTable('2011-09-01', 3500, [
+        (1500, 0.03), (4500, 0.1), (9000, 0.2), (35000, 0.25),
+        (55000, 0.3), (80000, 0.35), (float('inf'), 0.45)
+    ]),
+    TaxTable('2018-10-01', 5000, [
+        (3000, 0.03), (12000, 0.1), (25000, 0.2), (35000, 0.25),
+        (55000, 0.3), (80000, 0.35), (float('inf'), 0.45)
+    ])
+]
+
+def tax_table_for(year: int, month: int, tables: List[TaxTable] = None) -> TaxTable:
+    """该月适用的税率表：生效日期不晚于当月1日的最新一版，早于所有版本时取最早一版"""
+    tables = tables or MONTHLY_TAX_TABLES
+    period = f"{year:04d}-{month:02d}-01"
+    index = bisect_right([table.effective_date for table in tables], period) - 1
+    return tables[max(index, 0)]
+
+# 2019年1月起工资薪金按累计预扣法预扣：每月减除费用5000元按月累计，
+# 累计应纳税所得额适用年度综合所得税率表
+CUMULATIVE_SINCE = (2019, 1)
+BASIC_DEDUCTION = 5000
+ANNUAL_TAX_TABLE = TaxTable('2019-01-01', 0, [
+    (36000, 0.03), (144000, 0.1), (300000, 0.2), (420000, 0.25),
+    (660000, 0.3), (960000, 0.35), (float('inf'), 0.45)
+])
+
+def is_cumulative(year: int, month: int) -> bool:
+    """该月是否按累计预扣法计税"""
+    return (year, month) >= CUMULATIVE_SINCE
+
+def cumulative_tax(income, deductions, special_deductions, tax_withheld, table: TaxTable = None) -> np.ndarray:
+    """累计预扣法本月应预扣税额，可整列计算
+
+    income、deductions、special_deductions为截至本月的累计数，tax_withheld为截至上月的累计已预扣税额；
+    累计应纳税额减去已预扣税额为负时本月不预扣
+    """
+    table = table or ANNUAL_TAX_TABLE
+    taxable = np.asarray(income, dtype=float) - deductions - special_deductions
+    return np.maximum(table.tax(taxable) - tax_withheld, 0)
@@ -0,0 +1,62 @@
+import pandas as pd
+from typing import Iterator, List
+from openpyxl import load_workbook
+import os
+
+# 超过该大小的xlsx文件使用只读流式读取，小文件仍走DataFrame整表解析
+STREAM_THRESHOLD = 5 * 1024 * 1024
+
+def should_stream(file_path: str, threshold: int = STREAM_THRESHOLD) -> bool:
+    """判断文件是否应使用流式读取"""
+    return file_path.lower().endswith('.xlsx') and os.path.getsize(file_path) >= threshold
+
+def _open_sheet(file_path: str, sheet_name=0):
+    """以只读模式打开工作表，不加载整个工作簿DOM"""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+    return wb, ws
+
+def _make_columns(header: tuple) -> List[str]:
+    """与pandas保持一致的列名处理"""
+    return [str(c) if c is not None else f'Unnamed: {i}' for i, c in enumerate(header)]
+
+def read_xlsx_header(file_path: str, sheet_name=0) -> List[str]:
+    """只读取表头行"""
+    wb, ws = _open_sheet(file_path, sheet_name)
+    try:
+        header = next(ws.iter_rows(max_row=1, values_only=True), ())
+        return _make_columns(header)
+    finally:
+        wb.close()
+
+def iter_xlsx_batches(file_path: str, batch_size: int = 5000, sheet_name=0) -> Iterator[pd.DataFrame]:
+    """按批次流式读取xlsx数据行
+
+    基于openpyxl只读模式的iter_rows(values_only=True)，每次只在内存中保留
+    batch_size行，各批次转换为按列推断类型的DataFrame后交给清洗和保存流程。
+    """
+    wb, ws = _open_sheet(file_path, sheet_name)
+    try:
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _make_columns(header)
+        width = len(columns)
+
+        batch = []
+        for row in rows:
+            # 跳过空行
+            if all(value is None for value in row):
+                continue
+            # 只读模式下行长度可能与表头不一致，统一截断或补齐
+            if len(row) != width:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        wb.close()
@@ -0,0 +1,8 @@
+import pytest
+from src.modules.error_report import ErrorReport
+
+@pytest.fixture(autouse=True)
+def error_report_dir(tmp_path, monkeypatch):
+    """未指定error_report_dir的导入把错误报告写到本用例的临时目录"""
+    monkeypatch.setattr(ErrorReport, 'default_dir', str(tmp_path / 'import_errors'))
+    return tmp_path / 'import_errors'
@@ -1,7 +1,15 @@
 import unittest
 import pandas as pd
 import os
-from src.modules.attendance_import import AttendanceImporter
+import threading
+import tempfile
+from unittest import mock
+from src.modules.attendance_import import AttendanceImporter, parse_attendance_sheet
+from src.modules.file_cache import parsed_file_cache
+from src.modules.import_ledger import ImportLedger
+from src.modules.staging_cache import StagingCache, pa
+from src.modules.xlsx_reader import iter_xlsx_batches
+from src.db.database import Database
 
 class TestAttendanceImporter(unittest.TestCase):
     def setUp(self):
@@ -76,4 +84,329 @@ class TestAttendanceImporter(unittest.TestCase):
             '出勤天数': 'attendance_days'
         }
         result = self.importer.import_attendance(self.test_csv_path, mapping)
-        self.assertEqual(result['status'], 'success')
\ No newline at end of file
+        self.assertEqual(result['status'], 'success')
+    
+    def test_import_gbk_tab_csv(self):
+        """测试导入GBK编码、制表符分隔的考勤机导出文件"""
+        df = pd.read_csv(self.test_csv_path, dtype={'员工编号': str})
+        df.to_csv(self.test_csv_path, index=False, sep='\t', encoding='gbk')
+        
+        self.assertTrue(self.importer.validate_file(self.test_csv_path))
+        result = self.importer.import_attendance(self.test_csv_path)
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['total'], 2)
+    
+    def test_import_attendance_in_chunks(self):
+        """测试CSV分块流式导入"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db, chunk_size=1)
+        
+        result = importer.import_attendance(self.test_csv_path, month="2024-01")
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['total'], 2)
+        self.assertEqual(result['success'], 2)
+        
+        db.cursor.execute("SELECT emp_id, date, attendance_days, overtime_hours FROM attendance ORDER BY emp_id")
+        rows = db.cursor.fetchall()
+        self.assertEqual(rows, [('001', '2024-01-01', 22.0, 8.0), ('002', '2024-01-01', 21.0, 12.0)])
+        db.close()
+    
+    def test_import_attendance_files(self):
+        """测试多进程并行导入多个考勤文件"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        
+        invalid_path = "test_attendance_invalid.csv"
+        pd.DataFrame({'员工编号': ['003'], '姓名': ['王五']}).to_csv(invalid_path, index=False)
+        try:
+            result = importer.import_attendance_files(
+                [self.test_csv_path, self.test_excel_path, invalid_path], month="2024-01", max_workers=2
+            )
+        finally:
+            os.remove(invalid_path)
+        
+        self.assertEqual(result['status'], 'partial')
+        self.assertEqual([f['status'] for f in result['files']], ['success', 'success', 'error'])
+        # 两个文件的员工和日期相同，第二个文件的记录作为重复跳过
+        self.assertEqual(result['success'], 2)
+        self.assertEqual(result['files'][1]['duplicates']['existing'], 2)
+        
+        db.cursor.execute("SELECT COUNT(*) FROM attendance")
+        self.assertEqual(db.cursor.fetchone()[0], 2)
+        db.close()
+    
+    def test_import_attendance_duplicates(self):
+        """测试同一员工同一日期的重复考勤"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        pd.DataFrame({
+            '员工编号': ['001', '002', '001'],
+            '姓名': ['张三', '李四', '张三'],
+            '出勤天数': [22, 21, 20]
+        }).to_csv(self.test_csv_path, index=False)
+        
+        # 拒绝导入时先检查整个文件，不写入任何数据
+        result = importer.import_attendance(self.test_csv_path, month="2024-01", chunk_size=1, on_duplicate='reject')
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('001/2024-01-01', result['message'])
+        db.cursor.execute("SELECT COUNT(*) FROM attendance")
+        self.assertEqual(db.cursor.fetchone()[0], 0)
+        
+        # 跳过时保留文件中第一条
+        result = importer.import_attendance(self.test_csv_path, month="2024-01", chunk_size=2)
+        self.assertEqual((result['success'], result['failed']), (2, 0))
+        self.assertEqual(result['duplicates']['skipped'], 1)
+        
+        # 覆盖时以文件中最后一条为准
+        result = importer.import_attendance(self.test_csv_path, month="2024-01", force=True, on_duplicate='overwrite')
+        self.assertEqual(result['success'], 2)
+        db.cursor.execute("SELECT emp_id, attendance_days FROM attendance ORDER BY emp_id")
+        self.assertEqual(db.cursor.fetchall(), [('001', 20.0), ('002', 21.0)])
+        db.close()
+    
+    def test_dates_across_formats(self):
+        """测试同样的考勤从xlsx、CSV、流式读取和暂存副本得到相同的日期，重复检测不受文件格式影响"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        df = pd.DataFrame({
+            '员工编号': ['001', '002'],
+            '姓名': ['张三', '李四'],
+            '出勤天数': [1, 1],
+            '日期': pd.to_datetime(['2024-01-05', '2024-01-08'])
+        })
+        df.to_excel(self.test_excel_path, index=False)
+        df.assign(日期=['2024-01-05', '2024/1/8']).to_csv(self.test_csv_path, index=False)
+        
+        expected = ['2024-01-05', '2024-01-08']
+        self.assertEqual(importer.clean_data(next(iter_xlsx_batches(self.test_excel_path)))['日期'].tolist(), expected)
+        self.assertEqual(importer.clean_data(StagingCache.normalize(df))['日期'].tolist(), expected)
+        
+        self.assertEqual(importer.import_attendance(self.test_excel_path, month="2024-01")['success'], 2)
+        result = importer.import_attendance(self.test_csv_path, month="2024-01")
+        self.assertEqual((result['success'], result['duplicates']['existing']), (0, 2))
+        self.assertEqual(importer.reimport_attendance(self.test_csv_path, "2024-01")['unchanged'], 2)
+        db.cursor.execute("SELECT date FROM attendance ORDER BY date")
+        self.assertEqual([row[0] for row in db.cursor.fetchall()], expected)
+        parsed_file_cache.clear()
+        db.close()
+    
+    def test_import_attendance_error_report(self):
+        """测试不合格和重复跳过的行逐行写入错误报告"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        pd.DataFrame({
+            '员工编号': ['001', '002', '001', '003'],
+            '姓名': ['张三', None, '张三', '王五'],
+            '出勤天数': [22, 21, 20, '缺勤']
+        }).to_csv(self.test_csv_path, index=False)
+        
+        with tempfile.TemporaryDirectory() as report_dir:
+            importer.error_report_dir = report_dir
+            result = importer.import_attendance(self.test_csv_path, month="2024-01", chunk_size=2)
+            self.assertEqual((result['success'], result['rejected']), (1, 3))
+            self.assertEqual((result['total'], result['failed'], result['duplicates']['skipped']), (4, 2, 1))
+            report = pd.read_csv(result['error_report'], encoding='utf-8-sig', dtype=str, keep_default_na=False)
+        db.close()
+        
+        self.assertEqual(report['行号'].tolist(), ['3', '5', '4'])
+        self.assertEqual(report['原因'].tolist(), ['姓名为空', '出勤天数不是有效数字', '该记录已导入过，已跳过'])
+        self.assertEqual(report['原始值'].tolist()[1:], ['缺勤', '001/2024-01-01'])
+    
+    def test_import_attendance_workbook(self):
+        """测试多工作表考勤工作簿并行导入"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        
+        workbook_path = "test_attendance_workbook.xlsx"
+        with pd.ExcelWriter(workbook_path) as writer:
+            pd.DataFrame({'员工编号': ['001', '002'], '姓名': ['张三', '李四'], '出勤天数': [22, 21]}) \
+                .to_excel(writer, sheet_name='一班', index=False)
+            pd.DataFrame({'工号': ['003', '004'], '姓名': ['王五', None], '出勤天数': [20, 19]}) \
+                .to_excel(writer, sheet_name='二班', index=False)
+            pd.DataFrame({'员工编号': ['005'], '姓名': ['赵六']}) \
+                .to_excel(writer, sheet_name='三班', index=False)
+            pd.DataFrame().to_excel(writer, sheet_name='说明', index=False)
+        with tempfile.TemporaryDirectory() as report_dir:
+            importer.error_report_dir = report_dir
+            try:
+                result = importer.import_attendance_workbook(workbook_path, month="2024-01", max_workers=2)
+            finally:
+                os.remove(workbook_path)
+            report = pd.read_csv(result['error_report'], encoding='utf-8-sig', dtype=str, keep_default_na=False)
+        self.assertEqual(report['行号'].tolist(), ['二班!3'])
+        
+        self.assertEqual(result['status'], 'partial')
+        self.assertEqual(result['success'], 3)
+        self.assertEqual([s['sheet'] for s in result['sheets']], ['一班', '二班', '三班', '说明'])
+        self.assertEqual([s['status'] for s in result['sheets']], ['success', 'success', 'error', 'skipped'])
+        self.assertEqual(result['sheets'][1]['failed'], 1)
+        self.assertIn('出勤天数', result['sheets'][2]['message'])
+        
+        db.cursor.execute("SELECT emp_id FROM attendance ORDER BY emp_id")
+        self.assertEqual(db.cursor.fetchall(), [('001',), ('002',), ('003',)])
+        db.close()
+    
+    @unittest.skipIf(pa is None, "未安装pyarrow")
+    def test_worker_reuses_file_hash(self):
+        """测试工作进程用主进程传入的文件哈希读写暂存副本，不再重新计算"""
+        file_hash = 'f' * 64
+        with tempfile.TemporaryDirectory() as cache_dir:
+            parsed_file_cache.staging = StagingCache(cache_dir)
+            try:
+                with mock.patch('src.modules.import_ledger.hashlib.sha256') as sha256:
+                    rows, df, _ = parse_attendance_sheet(self.test_excel_path, 0, None,
+                                                         os.path.join(cache_dir, 'part.csv'), file_hash)
+                    sha256.assert_not_called()
+                self.assertEqual((rows, len(df)), (2, 2))
+                self.assertTrue(os.path.exists(os.path.join(cache_dir, f"{file_hash}_0.arrow")))
+            finally:
+                parsed_file_cache.staging = None
+                parsed_file_cache.clear()
+                ImportLedger._hash_cache.clear()
+    
+    def test_import_attendance_progress_and_cancel(self):
+        """测试导入进度回报和取消"""
+        progress = []
+        self.importer.progress_callback = progress.append
+        result = self.importer.import_attendance(self.test_csv_path, chunk_size=1)
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(progress[-1], {'stage': '写入数据库', 'rows_read': 2, 'rows_written': 2})
+        
+        # 处理完第一块后请求取消
+        self.importer.cancel_event = threading.Event()
+        self.importer.progress_callback = lambda p: p['rows_read'] and self.importer.cancel_event.set()
+        result = self.importer.import_attendance(self.test_csv_path, chunk_size=1)
+        self.assertEqual(result['status'], 'cancelled')
+        self.assertEqual(result['success'], 1)
+    
+    def test_resume_attendance_import(self):
+        """测试取消后再次导入同一文件从断点继续"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        pd.DataFrame({
+            '员工编号': ['001', '002', '003', '004', '005'],
+            '姓名': ['张三', '李四', None, '赵六', '孙七'],
+            '出勤天数': [22, 21, 20, 19, 18]
+        }).to_csv(self.test_csv_path, index=False)
+        
+        # 提交前两块后取消
+        importer.cancel_event = threading.Event()
+        importer.progress_callback = lambda p: p['rows_read'] >= 4 and importer.cancel_event.set()
+        result = importer.import_attendance(self.test_csv_path, month="2024-01", chunk_size=2)
+        self.assertEqual(result['status'], 'cancelled')
+        self.assertEqual(result['success'], 3)
+        
+        importer.cancel_event = None
+        importer.progress_callback = None
+        result = importer.import_attendance(self.test_csv_path, month="2024-01", chunk_size=2)
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['resumed_rows'], 4)
+        # 姓名为空的一行计入失败
+        self.assertEqual((result['total'], result['success'], result['failed']), (5, 4, 1))
+        
+        db.cursor.execute("SELECT emp_id FROM attendance ORDER BY emp_id")
+        self.assertEqual(db.cursor.fetchall(), [('001',), ('002',), ('004',), ('005',)])
+        db.cursor.execute("SELECT COUNT(*) FROM import_checkpoints")
+        self.assertEqual(db.cursor.fetchone()[0], 0)
+        db.close()
+    
+    def test_reimport_attendance(self):
+        """测试增量重新导入只写入有变化的记录"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        self.assertEqual(importer.import_attendance(self.test_csv_path, month="2024-01")['status'], 'success')
+        
+        corrected = pd.DataFrame({
+            '员工编号': ['002', '003'],
+            '姓名': ['李四', '王五'],
+            '出勤天数': [20, 23],
+            '加班时长': [12, 0]
+        })
+        corrected.to_csv(self.test_csv_path, index=False)
+        # 预览将删除的记录，不写库
+        preview = importer.reimport_attendance(self.test_csv_path, "2024-01", delete_missing=True, dry_run=True)
+        self.assertEqual(preview['status'], 'preview')
+        self.assertEqual(preview['changes']['deleted'], [{'emp_id': '001', 'date': '2024-01-01'}])
+        db.cursor.execute("SELECT COUNT(*) FROM attendance")
+        self.assertEqual(db.cursor.fetchone()[0], 2)
+        
+        result = importer.reimport_attendance(self.test_csv_path, "2024-01", delete_missing=True)
+        
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual((result['inserted'], result['updated'], result['deleted'], result['unchanged']), (1, 1, 1, 0))
+        self.assertEqual(result['changes']['deleted'], [{'emp_id': '001', 'date': '2024-01-01'}])
+        
+        db.cursor.execute("SELECT emp_id, attendance_days FROM attendance ORDER BY emp_id")
+        self.assertEqual(db.cursor.fetchall(), [('002', 20.0), ('003', 23.0)])
+        db.close()
+    
+    def test_reimport_branch_file(self):
+        """测试重新导入一个分支机构的文件不删除其他员工的考勤，文件内重复的键计入重复并写入错误报告"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        self.assertEqual(importer.import_attendance(self.test_csv_path, month="2024-01")['status'], 'success')
+        
+        pd.DataFrame({
+            '员工编号': ['002', '002'],
+            '姓名': ['李四', '李四'],
+            '出勤天数': [19, 20],
+            '加班时长': [0, 4]
+        }).to_csv(self.test_csv_path, index=False)
+        result = importer.reimport_attendance(self.test_csv_path, "2024-01")
+        
+        self.assertEqual((result['inserted'], result['updated'], result['deleted']), (0, 1, 0))
+        self.assertEqual(result['duplicates'], {'in_file': 1, 'existing': 0, 'skipped': 1})
+        self.assertEqual((result['total'], result['success'], result['failed']), (2, 1, 0))
+        self.assertEqual(pd.read_csv(result['error_report'], dtype=str)['行号'].tolist(), ['2'])
+        db.cursor.execute("SELECT emp_id, attendance_days, overtime_hours FROM attendance ORDER BY emp_id")
+        self.assertEqual(db.cursor.fetchall(), [('001', 22.0, 8.0), ('002', 20.0, 4.0)])
+        db.close()
+    
+    def test_reimport_reverts_to_previous_file(self):
+        """测试增量重新导入之前导入过的文件时恢复为该文件的内容"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = AttendanceImporter(db)
+        corrected_path = "test_attendance_corrected.csv"
+        pd.DataFrame({
+            '员工编号': ['001', '002'],
+            '姓名': ['张三', '李四'],
+            '出勤天数': [20, 19],
+            '加班时长': [0, 0]
+        }).to_csv(corrected_path, index=False)
+        try:
+            self.assertEqual(importer.import_attendance(self.test_csv_path, month="2024-01")['status'], 'success')
+            db.cursor.execute("SELECT emp_id, attendance_days, overtime_hours FROM attendance ORDER BY emp_id")
+            original = db.cursor.fetchall()
+            self.assertEqual(importer.reimport_attendance(corrected_path, "2024-01")['updated'], 2)
+            
+            result = importer.reimport_attendance(self.test_csv_path, "2024-01")
+            self.assertEqual(result['status'], 'success')
+            self.assertEqual(result['updated'], 2)
+            db.cursor.execute("SELECT emp_id, attendance_days, overtime_hours FROM attendance ORDER BY emp_id")
+            self.assertEqual(db.cursor.fetchall(), original)
+            
+            # 内容未变化时不写库
+            self.assertEqual(importer.reimport_attendance(self.test_csv_path, "2024-01")['unchanged'], 2)
+        finally:
+            os.remove(corrected_path)
+            db.close()
\ No newline at end of file
@@ -0,0 +1,100 @@
+import unittest
+import json
+from unittest import mock
+from src.db.database import Database
+from src.modules.config_cache import ConfigCache
+from src.modules.salary_calculator import SalaryCalculator
+
+class TestConfigCache(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.db = Database()
+        self.db.db_path = ':memory:'
+        self.db.connect()
+        self.conn = self.db.conn
+        self.conn.execute("INSERT INTO insurance_groups (id, name, location, base_amount) VALUES (1, '本地', '杭州', 5000)")
+        self.conn.executemany(
+            "INSERT INTO insurance_items (group_id, name, company_rate, personal_rate) VALUES (1, ?, ?, ?)",
+            [('养老保险', 16, 8), ('医疗保险', 9.5, 2)]
+        )
+        self.conn.execute('''
+            INSERT INTO salary_groups (group_id, group_name, base_salary, performance_rule,
+                                       social_security_base, insurance_group_id)
+            VALUES ('G1', '生产', 8700, ?, 5000, 1)
+        ''', (json.dumps({'base': 2000, 'full_score': 100}),))
+        self.conn.execute("INSERT INTO salary_items (name, level, amount) VALUES ('餐补', 1, 300)")
+        self.conn.commit()
+        
+        # 记录对配置表的查询次数
+        self.queries = []
+        self.conn.set_trace_callback(lambda sql: self.queries.append(sql) if 'FROM salary_groups' in sql
+                                     or 'FROM insurance_groups' in sql or 'FROM salary_items' in sql else None)
+        self.cache = ConfigCache()
+        
+    def tearDown(self):
+        """测试后清理工作"""
+        self.db.close()
+        
+    def test_load_once(self):
+        """测试各配置表只读取一次"""
+        for _ in range(3):
+            groups = self.cache.salary_groups(self.conn)
+            insurance = self.cache.insurance_groups(self.conn)
+            items = self.cache.salary_items(self.conn)
+        self.assertEqual(len(self.queries), 3)
+        self.assertEqual(groups.iloc[0]['performance_base'], 2000)
+        self.assertEqual(insurance.iloc[0]['personal_rate'], 10)
+        self.assertEqual(items, {'餐补': 300})
+        
+    def test_invalidate(self):
+        """测试清除一部分后只重新读取该部分"""
+        self.cache.salary_groups(self.conn)
+        self.cache.salary_items(self.conn)
+        self.conn.execute("UPDATE salary_items SET amount = 400")
+        self.cache.invalidate('salary_items')
+        self.queries.clear()
+        
+        self.assertEqual(self.cache.salary_items(self.conn), {'餐补': 400})
+        self.cache.salary_groups(self.conn)
+        self.assertEqual(len(self.queries), 1)
+        
+    def test_invalidate_during_load(self):
+        """测试读取期间被清除时，读到的旧结果不放入缓存"""
+        load = self.cache._load_salary_items
+        
+        def load_then_update(conn):
+            items = load(conn)
+            self.conn.execute("UPDATE salary_items SET amount = 400")
+            self.cache.invalidate('salary_items')
+            return items
+        
+        with mock.patch.object(self.cache, '_load_salary_items', load_then_update):
+            self.assertEqual(self.cache.salary_items(self.conn), {'餐补': 300})
+        self.assertEqual(self.cache.salary_items(self.conn), {'餐补': 400})
+        
+    def test_connections(self):
+        """测试不同连接分别缓存"""
+        other = Database()
+        other.db_path = ':memory:'
+        other.connect()
+        try:
+            self.assertEqual(self.cache.salary_items(self.conn), {'餐补': 300})
+            self.assertEqual(self.cache.salary_items(other.conn), {})
+        finally:
+            other.close()
+            
+    def test_calculator(self):
+        """测试逐个员工计算薪资时不再按员工查询配置"""
+        self.conn.executemany(
+            "INSERT INTO employees (emp_id, name, salary_group) VALUES (?, ?, 'G1')",
+            [(f"{i:03d}", f"员工{i}") for i in range(20)]
+        )
+        calculator = SalaryCalculator(self.db)
+        calculator.calculate_salary('000', 2024, 1)
+        self.queries.clear()
+        for i in range(1, 20):
+            self.assertIsNotNone(calculator.calculate_salary(f"{i:03d}", 2024, 1))
+        self.assertEqual(self.queries, [])
+
+if __name__ == '__main__':
+    unittest.main()
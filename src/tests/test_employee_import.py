@@ -0,0 +1,98 @@
+import unittest
+import pandas as pd
+import tempfile
+import os
+from src.modules.employee_import import EmployeeImporter, validate_id_cards
+from src.modules.file_cache import parsed_file_cache
+from src.db.database import Database
+
+def make_id_card(prefix17):
+    """按校验规则补上第18位"""
+    weights = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
+    total = sum(int(digit) * weight for digit, weight in zip(prefix17, weights))
+    return prefix17 + '10X98765432'[total % 11]
+
+class TestEmployeeImporter(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.db = Database()
+        self.db.db_path = ':memory:'
+        self.db.connect()
+        self.importer = EmployeeImporter(self.db)
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.importer.error_report_dir = self.tempdir.name
+        self.test_excel_path = "test_roster.xlsx"
+        
+    def tearDown(self):
+        """测试后清理工作"""
+        if os.path.exists(self.test_excel_path):
+            os.remove(self.test_excel_path)
+        parsed_file_cache.clear()
+        self.tempdir.cleanup()
+        self.db.close()
+        
+    def test_validate_id_cards(self):
+        """测试整列校验身份证号格式、校验码和出生日期"""
+        valid = make_id_card('11010519900307001')
+        wrong_check = valid[:17] + ('0' if valid[17] != '0' else '1')
+        reasons = validate_id_cards(pd.Series([
+            valid, '11010519491231002x', wrong_check, '1101051990030700', make_id_card('11010519901332001'), None
+        ]))
+        self.assertEqual(reasons.tolist(), [
+            None, None, '身份证号校验码不正确', '身份证号应为18位数字（末位可为X）', '身份证号中的出生日期无效', None
+        ])
+        
+    def test_import_employees(self):
+        """测试花名册按工号UPSERT，不合格的行写入错误报告"""
+        self.db.cursor.execute(
+            "INSERT INTO employees (emp_id, name, id_card, status) VALUES ('001', '张三', ?, 0)",
+            (make_id_card('11010519800101001'),)
+        )
+        self.db.conn.commit()
+        id_cards = [make_id_card(f'3301021995010100{i}') for i in range(5)]
+        pd.DataFrame({
+            '员工编号': ['001', '002', '003', '004', '005', '002'],
+            '姓名': ['张三丰', '李四', '王五', None, '孙七', '李四'],
+            '身份证号': [None, id_cards[1], '330102199501010030', id_cards[3], id_cards[1], id_cards[2]],
+            '入职日期': ['2024-03-01', '2024/3/2', '2024-03-03', '2024-03-04', '下周一', '2024-03-05']
+        }).to_excel(self.test_excel_path, index=False)
+        
+        self.assertTrue(self.importer.validate_file(self.test_excel_path))
+        result = self.importer.import_employees(self.test_excel_path)
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual((result['total'], result['success'], result['inserted'], result['updated']), (6, 2, 1, 1))
+        self.assertEqual(result['failed'], 3)
+        self.assertEqual(result['duplicates'], {'in_file': 1, 'existing': 0, 'skipped': 1})
+        
+        # 001更新姓名并恢复在职，身份证号保留原值；002以文件中最后一行为准
+        self.db.cursor.execute("SELECT emp_id, name, id_card, hire_date, status FROM employees ORDER BY emp_id")
+        self.assertEqual(self.db.cursor.fetchall(), [
+            ('001', '张三丰', make_id_card('11010519800101001'), '2024-03-01', 1),
+            ('002', '李四', id_cards[2], '2024-03-05', 1)
+        ])
+        
+        report = pd.read_csv(result['error_report'], encoding='utf-8-sig', dtype=str, keep_default_na=False)
+        self.assertEqual(sorted(report['行号'].tolist()), ['3', '4', '5', '6'])
+        self.assertEqual(dict(zip(report['行号'], report['原因'])), {
+            '3': '被文件中后面的重复行覆盖',
+            '4': '身份证号校验码不正确',
+            '5': '姓名为空',
+            '6': '入职日期不是有效日期'
+        })
+        
+        # 身份证号与库中其他工号重复的行不导入
+        pd.DataFrame({'工号': ['006'], '姓名': ['周八'], '身份证号': [id_cards[2]]}).to_excel(self.test_excel_path, index=False)
+        result = self.importer.import_employees(self.test_excel_path)
+        self.assertEqual((result['success'], result['rejected']), (0, 1))
+        self.assertEqual(result['reasons'], {'身份证号与已有员工002重复': 1})
+    
+    def test_text_columns_follow_schema(self):
+        """测试解析文件时按导入模板的文本列（含别名）读取，保留前导零"""
+        self.assertLessEqual(EmployeeImporter.schema.dtypes.items(), parsed_file_cache.dtypes.items())
+        pd.DataFrame({'工号': ['007'], '姓名': ['吴九'], '身份证': ['0330102199501010011']}).to_excel(
+            self.test_excel_path, index=False)
+        df = parsed_file_cache.read(self.test_excel_path)
+        self.assertEqual((df['工号'][0], df['身份证'][0]), ('007', '0330102199501010011'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import pandas as pd
+import tempfile
+import json
+import os
+from src.modules.error_report import ErrorReport, row_labels
+
+class TestErrorReport(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.tempdir = tempfile.TemporaryDirectory()
+        
+    def tearDown(self):
+        """测试后清理工作"""
+        self.tempdir.cleanup()
+        
+    def test_csv_report(self):
+        """测试CSV报告逐行写入，只在有拒绝行时创建文件"""
+        with ErrorReport.for_import('attendance', 'D:/考勤/一月.xlsx', self.tempdir.name) as report:
+            self.assertEqual(report.summary()['error_report'], None)
+            report.add_rows([(3, '出勤天数', '出勤天数不是有效数字', '缺勤'), (5, '姓名', '姓名为空', float('nan'))])
+        
+        summary = report.summary()
+        self.assertEqual(summary['rejected'], 2)
+        self.assertEqual(summary['reasons'], {'出勤天数不是有效数字': 1, '姓名为空': 1})
+        self.assertTrue(os.path.basename(summary['error_report']).startswith('attendance_'))
+        df = pd.read_csv(summary['error_report'], encoding='utf-8-sig', dtype=str, keep_default_na=False)
+        self.assertEqual(df.values.tolist(), [['3', '出勤天数', '出勤天数不是有效数字', '缺勤'],
+                                              ['5', '姓名', '姓名为空', '']])
+        
+    def test_rejected_rows(self):
+        """测试一行有多个不合格的单元格时按一行计数"""
+        with ErrorReport(os.path.join(self.tempdir.name, 'report.csv')) as report:
+            report.add_rows([(3, '姓名', '姓名为空', None), (3, '出勤天数', '出勤天数不是有效数字', 'abc'),
+                             (4, '姓名', '姓名为空', None)])
+        
+        summary = report.summary()
+        self.assertEqual((summary['rejected'], summary['entries']), (2, 3))
+        
+        with ErrorReport(os.path.join(self.tempdir.name, 'merged.csv')) as merged:
+            merged.absorb(summary)
+            merged.add(5, '姓名', '姓名为空')
+        self.assertEqual((merged.summary()['rejected'], merged.summary()['entries']), (3, 4))
+        
+    def test_jsonl_report_and_absorb(self):
+        """测试JSONL报告，以及并入工作进程写出的部分报告"""
+        path = os.path.join(self.tempdir.name, 'report.jsonl')
+        with ErrorReport(ErrorReport(path).part_path(0)) as part:
+            part.add('一班!4', '出勤天数', '出勤天数不是有效数字', 'abc')
+        with ErrorReport(path) as report:
+            report.absorb(part.summary())
+            report.add(7, 'emp_id/date', '该记录已导入过，已跳过', '001/2024-01-01')
+        
+        self.assertFalse(os.path.exists(part.path))
+        self.assertEqual(report.count, 2)
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['row'] for row in rows], ['一班!4', 7])
+        
+    def test_row_labels(self):
+        """测试由索引得出文件行号"""
+        self.assertEqual(row_labels(pd.RangeIndex(10, 12)).tolist(), [12, 13])
+        index = pd.MultiIndex.from_tuples([('一班', 0), ('二班', 1)])
+        self.assertEqual(row_labels(index).tolist(), ['一班!2', '二班!3'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import pandas as pd
+import os
+from src.modules.import_preview import preview_file
+from src.modules.attendance_import import AttendanceImporter
+from src.modules.performance_import import PerformanceImporter
+
+class TestImportPreview(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.test_csv_path = "test_preview.csv"
+        self.test_excel_path = "test_preview.xlsx"
+        self.df = pd.DataFrame({
+            '工号': [f"{i:04d}" for i in range(500)],
+            ' 姓名 ': ['张三'] * 500,
+            '出勤天数': ['22'] * 499 + ['缺勤'],
+            '备注': [None] * 500
+        })
+
+    def tearDown(self):
+        """测试后清理工作"""
+        for path in (self.test_csv_path, self.test_excel_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def check_preview(self, preview):
+        self.assertEqual(len(preview['head']), 20)
+        self.assertEqual(preview['head']['工号'].iloc[0], '0000')
+        self.assertEqual(preview['mapping'], {
+            '工号': '员工编号', ' 姓名 ': '姓名', '出勤天数': '出勤天数', '备注': None
+        })
+        self.assertEqual(preview['missing'], [])
+
+        # 抽样行来自开头部分之后，且是完整的行
+        sample_ids = preview['sample']['工号'].tolist()
+        self.assertTrue(sample_ids)
+        self.assertTrue(all(emp_id >= '0020' for emp_id in sample_ids))
+        self.assertTrue((preview['sample'][' 姓名 '] == '张三').all())
+
+    def test_preview_csv(self):
+        """测试CSV预览只读取开头和随机抽样行"""
+        self.df.to_csv(self.test_csv_path, index=False, sep='\t', encoding='gbk')
+        preview = preview_file(self.test_csv_path, AttendanceImporter.schema, seed=1)
+        self.check_preview(preview)
+
+    def test_preview_excel(self):
+        """测试Excel预览"""
+        self.df.to_excel(self.test_excel_path, index=False)
+        preview = preview_file(self.test_excel_path, AttendanceImporter.schema, sample=500, seed=1)
+        self.check_preview(preview)
+
+        # 抽样覆盖到最后一行的无效出勤天数
+        days = {item['column']: item for item in preview['types']}['出勤天数']
+        self.assertEqual(days['invalid'], 1)
+        self.assertEqual(days['examples'], ['缺勤'])
+
+    def test_preview_missing_fields(self):
+        """测试预览提示缺少的必要字段"""
+        self.df.to_excel(self.test_excel_path, index=False)
+        preview = preview_file(self.test_excel_path, PerformanceImporter.schema)
+        self.assertEqual(preview['missing'], ['绩效得分'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import pandas as pd
+from src.modules.import_schema import Column, ImportSchema
+
+class TestImportSchema(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.schema = ImportSchema([
+            Column('员工编号', 'str', aliases=['工号']),
+            Column('姓名', 'str'),
+            Column('金额', 'number'),
+            Column('加班时长', 'number', required=False, nullable=True, default=0),
+            Column('备注', 'str', required=False, nullable=True)
+        ])
+
+    def test_missing_columns(self):
+        """测试表头必要字段检查（别名视为已提供）"""
+        self.assertEqual(self.schema.missing_columns(['工号', '姓名', '金额']), [])
+        self.assertEqual(self.schema.missing_columns(['员工编号', '备注']), ['姓名', '金额'])
+
+        with self.assertRaises(ValueError):
+            self.schema.convert(pd.DataFrame({'员工编号': ['001']}))
+
+    def test_convert(self):
+        """测试别名、类型转换和默认值"""
+        df = pd.DataFrame({
+            '工号': ['001', '002', None],
+            '姓名': ['张三', None, '王五'],
+            '金额': ['100', 'abc', '300']
+        })
+
+        converted, invalid = self.schema.convert(df)
+
+        self.assertIn('员工编号', converted.columns)
+        self.assertTrue(pd.api.types.is_numeric_dtype(converted['金额']))
+        self.assertEqual(converted['加班时长'].tolist(), [0, 0, 0])
+        self.assertEqual(list(invalid.columns), ['员工编号', '姓名', '金额'])
+        self.assertEqual(invalid.any(axis=1).tolist(), [False, True, True])
+
+        cleaned = self.schema.clean(df)
+        self.assertEqual(cleaned['员工编号'].tolist(), ['001'])
+
+    def test_convert_dates(self):
+        """测试日期列统一为YYYY-MM-DD，有值但无法识别的日期不合格"""
+        schema = ImportSchema([Column('员工编号', 'str'), Column('日期', 'date', required=False, nullable=True)])
+        df = pd.DataFrame({
+            '员工编号': ['001', '002', '003', '004'],
+            '日期': [pd.Timestamp('2024-01-05'), '2024-01-05 00:00:00', '2024/1/5', 'abc']
+        })
+
+        converted, invalid = schema.convert(df)
+
+        self.assertEqual(converted['日期'].tolist()[:3], ['2024-01-05'] * 3)
+        self.assertEqual(invalid.any(axis=1).tolist(), [False, False, False, True])
+        self.assertEqual(schema.columns['日期'].error_message, '日期不是有效日期')
+        self.assertEqual(schema.dtypes, {'员工编号': str, '日期': str})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
+import pandas as pd
+from PyQt6.QtCore import Qt
+from src.gui import main_window
+from src.gui.import_worker import ImportWorker
+from src.modules.reward_import import RewardImporter
+from src.modules.performance_import import PerformanceImporter
+from src.modules.file_cache import parsed_file_cache
+from src.db.database import Database
+
+class TestImportWorker(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database()
+        self.db.db_path = os.path.join(self.temp_dir.name, 'test.db')
+        self.db.connect()
+        self.importer = RewardImporter(self.db, batch_size=1)
+        self.importer.error_report_dir = self.temp_dir.name
+        
+        self.file_path = os.path.join(self.temp_dir.name, 'rewards.csv')
+        pd.DataFrame({
+            '工号': ['001', '002', '003'],
+            '姓名': ['张三', '李四', '王五'],
+            '类型': ['奖励', '惩罚', '奖励'],
+            '金额': [100, 50, 200],
+            '原因': ['全勤', '迟到', '加班']
+        }).to_csv(self.file_path, index=False)
+        
+    def tearDown(self):
+        """测试后清理工作"""
+        parsed_file_cache.clear()
+        self.db.close()
+        self.temp_dir.cleanup()
+        
+    def test_cancel_with_gui_commit(self):
+        """测试导入使用独立连接：界面连接中途提交后取消，导入的数据全部回滚"""
+        worker = ImportWorker(self.importer, lambda: self.importer.import_rewards(self.file_path, '2024-01'),
+                              self.db.db_path)
+        writing = threading.Event()
+        resume = threading.Event()
+        connections = []
+        results = []
+        
+        def on_progress(progress):
+            # 在工作线程中直接调用：第一批写入后暂停，等待界面线程操作
+            if progress['stage'] == '写入数据库' and not writing.is_set():
+                connections.append(self.importer.db)
+                writing.set()
+                resume.wait(5)
+                
+        worker.progress.connect(on_progress, Qt.ConnectionType.DirectConnection)
+        worker.finished.connect(results.append, Qt.ConnectionType.DirectConnection)
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        self.assertTrue(writing.wait(5))
+        
+        # 界面线程在自己的连接上提交，不会提交导入中的事务
+        self.db.conn.commit()
+        worker.cancel()
+        resume.set()
+        thread.join(5)
+        
+        self.assertEqual(results[0]['status'], 'cancelled')
+        self.assertIsNot(connections[0], self.db)
+        self.assertIs(self.importer.db, self.db)
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM rewards_punishments").fetchone()[0], 0)
+        
+    def run_window_task(self, method, file_path, importer_name, importer):
+        """按界面的方式建立导入任务，并像ImportWorker在QThread中那样在另一线程运行"""
+        tasks = []
+        window = SimpleNamespace(
+            **{importer_name: importer},
+            ui=SimpleNamespace(duplicateMode=SimpleNamespace(currentData=lambda: 'skip')),
+            ask_month=lambda title: '2024-01',
+            confirm_preview=lambda path, schema: True,
+            run_import_task=lambda importer, task, callback: tasks.append(task),
+            show_import_result=None,
+            on_performance_checked=None
+        )
+        with mock.patch.object(main_window.QFileDialog, 'getOpenFileName', return_value=(file_path, '')):
+            method(window)
+        
+        results = []
+        worker = ImportWorker(importer, tasks[0], self.db.db_path)
+        worker.finished.connect(results.append, Qt.ConnectionType.DirectConnection)
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        thread.join(10)
+        return results[0]
+        
+    def test_main_window_tasks(self):
+        """测试界面建立的导入任务在工作线程中运行，不使用界面线程的连接"""
+        import_reward = main_window.MainWindow.import_reward
+        self.assertEqual(self.run_window_task(import_reward, self.file_path, 'reward_importer', self.importer)['status'],
+                         'success')
+        # 重复文件由导入器在工作线程的连接上查导入台账后跳过
+        self.assertEqual(self.run_window_task(import_reward, self.file_path, 'reward_importer', self.importer)['status'],
+                         'skipped')
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM rewards_punishments").fetchone()[0], 3)
+        
+        performance_path = os.path.join(self.temp_dir.name, 'performance.xlsx')
+        pd.DataFrame({'员工编号': ['001'], '姓名': ['张三'], '绩效得分': [90]}).to_excel(performance_path, index=False)
+        result = self.run_window_task(main_window.MainWindow.import_performance, performance_path,
+                                      'performance_importer', PerformanceImporter(self.db))
+        self.assertEqual(result['status'], 'checked')
+        
+    def test_backup_keeps_connection(self):
+        """测试备份不关闭当前连接"""
+        conn = self.db.conn
+        self.assertTrue(self.db.backup_database(os.path.join(self.temp_dir.name, 'backup')))
+        self.assertIs(self.db.conn, conn)
+        self.assertEqual(len(os.listdir(os.path.join(self.temp_dir.name, 'backup'))), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtWidgets import QApplication, QTableWidgetItem
+from src.gui.insurance_group_dialog import InsuranceGroupDialog
+from src.modules.config_cache import config_cache
+from src.db.database import Database
+
+class TestInsuranceGroupDialog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+        
+    def setUp(self):
+        """测试前准备工作"""
+        self.db = Database()
+        self.db.db_path = ':memory:'
+        self.db.connect()
+        
+    def tearDown(self):
+        """测试后清理工作"""
+        self.db.close()
+        
+    def fill(self, dialog, items):
+        dialog.name_edit.setText('本地')
+        dialog.location_edit.setText('杭州')
+        dialog.base_edit.setValue(5000)
+        dialog.items_table.setRowCount(0)
+        for name, company_rate, personal_rate in items:
+            row = dialog.items_table.rowCount()
+            dialog.items_table.insertRow(row)
+            dialog.items_table.setItem(row, 0, QTableWidgetItem(name))
+            dialog.items_table.setItem(row, 1, QTableWidgetItem(str(company_rate)))
+            dialog.items_table.setItem(row, 2, QTableWidgetItem(str(personal_rate)))
+        
+    def test_save_group(self):
+        """测试保存配置组写入数据库并清除社保配置缓存"""
+        dialog = InsuranceGroupDialog(self.db)
+        self.fill(dialog, [('养老保险', 16, 8), ('医疗保险', 9.5, 2)])
+        dialog.save_group()
+        self.assertEqual(dialog.result(), InsuranceGroupDialog.DialogCode.Accepted)
+        groups = config_cache.insurance_groups(self.db.conn)
+        self.assertEqual(groups['personal_rate'].tolist(), [10])
+        
+        # 修改后缓存随之更新
+        dialog = InsuranceGroupDialog(self.db, group_id=int(groups['id'][0]))
+        self.fill(dialog, [('养老保险', 16, 8)])
+        dialog.save_group()
+        self.assertEqual(config_cache.insurance_groups(self.db.conn)['personal_rate'].tolist(), [8])
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM insurance_items").fetchone()[0], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,12 @@
 import unittest
 import pandas as pd
 import os
+import tempfile
+from unittest import mock
 from src.modules.performance_import import PerformanceImporter
+from src.modules.file_cache import parsed_file_cache
+from src.modules.staging_cache import StagingCache, pa
+from src.db.database import Database
 
 class TestPerformanceImporter(unittest.TestCase):
     def setUp(self):
@@ -26,6 +31,7 @@ class TestPerformanceImporter(unittest.TestCase):
         # 删除测试文件
         if os.path.exists(self.test_excel_path):
             os.remove(self.test_excel_path)
+        parsed_file_cache.clear()
     
     def test_validate_file(self):
         """测试文件格式验证"""
@@ -75,4 +81,206 @@ class TestPerformanceImporter(unittest.TestCase):
             '绩效得分': 'score'
         }
         result = self.importer.import_performance(self.test_excel_path, "2024-01", mapping)
-        self.assertEqual(result['status'], 'success')
\ No newline at end of file
+        self.assertEqual(result['status'], 'success')
+    
+    def test_validate_and_import_share_parse(self):
+        """测试验证和导入共用同一次文件解析"""
+        with mock.patch('pandas.read_excel', wraps=pd.read_excel) as read_excel:
+            self.assertTrue(self.importer.validate_file(self.test_excel_path))
+            result = self.importer.import_performance(self.test_excel_path, "2024-01")
+            self.assertEqual(result['status'], 'success')
+            self.assertEqual(read_excel.call_count, 1)
+            
+            # 文件内容变化后缓存失效
+            pd.DataFrame({'员工编号': ['001'], '绩效得分': [60]}).to_excel(self.test_excel_path, index=False)
+            os.utime(self.test_excel_path, ns=(0, 0))
+            result = self.importer.import_performance(self.test_excel_path, "2024-01")
+            self.assertEqual(result['total'], 1)
+            self.assertEqual(read_excel.call_count, 2)
+    
+    def test_import_performance_streaming(self):
+        """测试大文件按批次流式导入"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = PerformanceImporter(db, batch_size=2)
+        
+        with mock.patch('src.modules.performance_import.should_stream', return_value=True):
+            self.assertTrue(importer.validate_file(self.test_excel_path))
+            result = importer.import_performance(self.test_excel_path, "2024-01")
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['success'], 3)
+        
+        db.cursor.execute("SELECT emp_id, month, score FROM performance ORDER BY emp_id")
+        self.assertEqual(db.cursor.fetchall(), [
+            ('001', '2024-01', 90), ('002', '2024-01', 85), ('003', '2024-01', 95)
+        ])
+        db.close()
+    
+    def test_validate_employee_info(self):
+        """测试批量核对员工编号与姓名"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        db.cursor.executemany(
+            "INSERT INTO employees (emp_id, name, status) VALUES (?, ?, ?)",
+            [('001', '张三', 1), ('002', '李四', 1), ('003', '王六', 0)]
+        )
+        db.conn.commit()
+        importer = PerformanceImporter(db)
+        
+        df = pd.DataFrame({
+            '员工编号': ['001', '002', '003', '004'],
+            '姓名': ['张三', '李五', '王五', '赵六']
+        })
+        mismatched = importer.validate_employee_info(df)
+        
+        # 离职员工和系统中不存在的员工不参与核对
+        self.assertEqual(mismatched, [
+            {'emp_id': '002', 'uploaded_name': '李五', 'db_name': '李四'}
+        ])
+        self.assertFalse(db.conn.in_transaction)
+        db.close()
+    
+    def test_check_personnel_changes(self):
+        """测试与上月绩效名单对比人员变动"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        db.cursor.executemany(
+            "INSERT INTO performance (emp_id, month, score) VALUES (?, ?, ?)",
+            [('001', '2023-12', 80), ('002', '2023-12', 80), ('005', '2023-12', 80), ('004', '2023-11', 80)]
+        )
+        db.conn.commit()
+        importer = PerformanceImporter(db)
+        
+        current = pd.DataFrame({'员工编号': ['001', '002', '003', '004', None]})
+        new_employees, removed_employees = importer.check_personnel_changes(current, "2024-01")
+        self.assertEqual(new_employees, ['003', '004'])
+        self.assertEqual(removed_employees, ['005'])
+        db.close()
+    
+    def test_resume_performance_import(self):
+        """测试中断后再次导入同一文件从断点继续"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = PerformanceImporter(db, batch_size=1)
+        
+        # 写入第二批时出错中断，第一批已与断点一起提交
+        save = importer.save_to_database
+        calls = []
+        def failing_save(df, *args):
+            calls.append(len(df))
+            if len(calls) > 1:
+                raise RuntimeError("磁盘已满")
+            return save(df, *args)
+        with mock.patch.object(importer, 'save_to_database', side_effect=failing_save):
+            result = importer.import_performance(self.test_excel_path, "2024-01")
+        self.assertEqual(result['status'], 'error')
+        
+        with mock.patch.object(importer, 'clean_data', wraps=importer.clean_data) as clean_data:
+            result = importer.import_performance(self.test_excel_path, "2024-01")
+            self.assertEqual(clean_data.call_count, 2)
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['resumed_rows'], 1)
+        self.assertEqual(result['success'], 3)
+        
+        db.cursor.execute("SELECT emp_id, score FROM performance ORDER BY emp_id")
+        self.assertEqual(db.cursor.fetchall(), [('001', 90.0), ('002', 85.0), ('003', 95.0)])
+        db.close()
+    
+    def test_reimport_performance(self):
+        """测试绩效增量重新导入"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = PerformanceImporter(db)
+        importer.import_performance(self.test_excel_path, "2024-01")
+        
+        pd.DataFrame({
+            '员工编号': ['001', '002', '003'],
+            '姓名': ['张三', '李四', '王五'],
+            '绩效得分': [90, 88, 95]
+        }).to_excel(self.test_excel_path, index=False)
+        result = importer.reimport_performance(self.test_excel_path, "2024-01")
+        
+        self.assertEqual((result['inserted'], result['updated'], result['deleted'], result['unchanged']), (0, 1, 0, 2))
+        self.assertEqual(result['changes']['updated'], [{'emp_id': '002', 'month': '2024-01'}])
+        db.cursor.execute("SELECT score FROM performance WHERE emp_id = '002'")
+        self.assertEqual(db.cursor.fetchone()[0], 88)
+        db.close()
+    
+    def test_reimport_delete_missing(self):
+        """测试只有指定delete_missing时才删除文件中没有的员工的绩效"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = PerformanceImporter(db)
+        importer.import_performance(self.test_excel_path, "2024-01")
+        
+        pd.DataFrame({'员工编号': ['001'], '姓名': ['张三'], '绩效得分': [91]}).to_excel(self.test_excel_path, index=False)
+        result = importer.reimport_performance(self.test_excel_path, "2024-01")
+        self.assertEqual((result['updated'], result['deleted']), (1, 0))
+        
+        preview = importer.reimport_performance(self.test_excel_path, "2024-01", delete_missing=True, dry_run=True)
+        self.assertEqual(preview['status'], 'preview')
+        self.assertEqual(preview['changes']['deleted'], [{'emp_id': '002', 'month': '2024-01'},
+                                                         {'emp_id': '003', 'month': '2024-01'}])
+        self.assertEqual(db.cursor.execute("SELECT COUNT(*) FROM performance").fetchone()[0], 3)
+        
+        self.assertEqual(importer.reimport_performance(self.test_excel_path, "2024-01", delete_missing=True)['deleted'], 2)
+        self.assertEqual(db.cursor.execute("SELECT emp_id, score FROM performance").fetchall(), [('001', 91.0)])
+        db.close()
+    
+    def test_reimport_reverts_to_previous_file(self):
+        """测试增量重新导入之前导入过的文件时恢复为该文件的内容"""
+        db = Database()
+        db.db_path = ':memory:'
+        db.connect()
+        importer = PerformanceImporter(db)
+        corrected_path = "test_performance_corrected.xlsx"
+        pd.DataFrame({
+            '员工编号': ['001', '002', '003'],
+            '姓名': ['张三', '李四', '王五'],
+            '绩效得分': [70, 71, 72]
+        }).to_excel(corrected_path, index=False)
+        try:
+            importer.import_performance(self.test_excel_path, "2024-01")
+            original = db.cursor.execute("SELECT emp_id, score FROM performance ORDER BY emp_id").fetchall()
+            importer.reimport_performance(corrected_path, "2024-01")
+            
+            result = importer.reimport_performance(self.test_excel_path, "2024-01")
+            self.assertEqual(result['status'], 'success')
+            self.assertEqual(result['updated'], 3)
+            self.assertEqual(db.cursor.execute("SELECT emp_id, score FROM performance ORDER BY emp_id").fetchall(),
+                             original)
+        finally:
+            os.remove(corrected_path)
+            db.close()
+    
+    @unittest.skipIf(pa is None, "未安装pyarrow")
+    def test_staging_copy_reused(self):
+        """测试解析结果写入列式暂存副本并在后续读取中复用"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            parsed_file_cache.staging = StagingCache(cache_dir)
+            try:
+                self.assertTrue(self.importer.validate_file(self.test_excel_path))
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+                
+                # 内存缓存失效后从副本读取，不再解析xlsx
+                parsed_file_cache.clear()
+                with mock.patch('pandas.read_excel') as read_excel:
+                    result = self.importer.import_performance(self.test_excel_path, "2024-01")
+                    read_excel.assert_not_called()
+                self.assertEqual(result['total'], 3)
+                
+                # 大文件流式读取同样复用副本
+                with mock.patch('src.modules.performance_import.should_stream', return_value=True), \
+                        mock.patch('src.modules.file_cache.iter_xlsx_batches') as iter_xlsx_batches:
+                    result = self.importer.import_performance(self.test_excel_path, "2024-01")
+                    iter_xlsx_batches.assert_called_once()
+                    self.assertFalse(iter_xlsx_batches.return_value.__iter__.called)
+                self.assertEqual(result['total'], 3)
+            finally:
+                parsed_file_cache.staging = None
\ No newline at end of file
@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+import pandas as pd
+import os
+from src.modules import readers
+
+class TestReaders(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.test_csv_path = "test_readers.csv"
+        self.test_excel_path = "test_readers.xlsx"
+        df = pd.DataFrame({
+            '员工编号': ['001', '002'],
+            '姓名': ['张三', None],
+            '出勤天数': [22, 21]
+        })
+        df.to_csv(self.test_csv_path, index=False)
+        df.to_excel(self.test_excel_path, index=False)
+
+    def tearDown(self):
+        """测试后清理工作"""
+        for path in (self.test_csv_path, self.test_excel_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_read_table(self):
+        """测试各格式读取结果一致，编号保留前导零"""
+        for path in (self.test_csv_path, self.test_excel_path):
+            df = readers.read_table(path, dtype={'员工编号': str})
+            self.assertEqual(df['员工编号'].tolist(), ['001', '002'])
+            self.assertTrue(pd.isna(df['姓名'].iloc[1]))
+            self.assertEqual(df['出勤天数'].tolist(), [22, 21])
+
+    def test_fallback(self):
+        """测试首选后端未安装时使用下一个后端"""
+        with mock.patch.dict(readers._available, {'python_calamine': False, 'pyarrow': False}):
+            self.assertEqual(readers.get_reader(self.test_excel_path)[0], 'openpyxl')
+            self.assertEqual(readers.get_reader(self.test_csv_path)[0], 'pandas')
+            df = readers.read_table(self.test_csv_path, dtype={'员工编号': str})
+            self.assertEqual(df['员工编号'].tolist(), ['001', '002'])
+
+            # 旧版xls没有可用后端时给出需要安装的依赖
+            with mock.patch.dict(readers._available, {'xlrd': False}):
+                with self.assertRaises(ValueError):
+                    readers.get_reader("test.xls")
+
+        with self.assertRaises(ValueError):
+            readers.get_reader("test.txt")
+
+    def test_sniff_csv(self):
+        """测试识别考勤机导出CSV的编码和分隔符"""
+        df = pd.DataFrame({'员工编号': ['001', '002'], '姓名': ['张三', '李四'], '出勤天数': [22, 21]})
+        cases = [
+            ('gb18030', ',', 'gb18030'),
+            ('gbk', '\t', 'gb18030'),
+            ('utf-8-sig', ',', 'utf-8-sig'),
+            ('utf-8', ';', 'utf-8'),
+            ('utf-16', '\t', 'utf-16'),
+            ('utf-16-le', ',', 'utf-16-le')
+        ]
+        for encoding, sep, expected in cases:
+            with self.subTest(encoding=encoding, sep=sep):
+                df.to_csv(self.test_csv_path, index=False, sep=sep, encoding=encoding)
+                self.assertEqual(readers.sniff_csv(self.test_csv_path), {'encoding': expected, 'sep': sep})
+
+                for backend in ('pyarrow', 'pandas'):
+                    with mock.patch.dict(readers._available, {'pyarrow': backend == 'pyarrow'}):
+                        result = readers.read_table(self.test_csv_path, dtype={'员工编号': str})
+                    self.assertEqual(list(result.columns), ['员工编号', '姓名', '出勤天数'])
+                    self.assertEqual(result['姓名'].tolist(), ['张三', '李四'])
+                    self.assertEqual(result['员工编号'].tolist(), ['001', '002'])
+
+    def test_sniff_truncated_sample(self):
+        """测试样本截断在多字节字符中间时仍识别为UTF-8"""
+        with open(self.test_csv_path, 'w', encoding='utf-8') as f:
+            f.write('员工编号,姓名\n' + '001,张三\n' * 100)
+        # 表头"员工编号,姓名\n"后的第一个汉字被截断
+        self.assertEqual(readers.sniff_csv(self.test_csv_path, sample_size=25)['encoding'], 'utf-8')
+
+    def test_benchmark(self):
+        """测试基准结果标出实际选用的后端"""
+        results = readers.benchmark([self.test_csv_path], repeat=1)
+        chosen = [r['backend'] for r in results if r['chosen']]
+        self.assertEqual(chosen, [readers.get_reader(self.test_csv_path)[0]])
+        self.assertTrue(all(r['rows'] == 2 for r in results))
+
+if __name__ == '__main__':
+    unittest.main()
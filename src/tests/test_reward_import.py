@@ -0,0 +1,124 @@
+import unittest
+import pandas as pd
+import os
+import tempfile
+from unittest import mock
+from src.modules.reward_import import RewardImporter
+from src.modules.file_cache import parsed_file_cache
+from src.db.database import Database
+
+class TestRewardImporter(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.db = Database()
+        self.db.db_path = ':memory:'
+        self.db.connect()
+        self.importer = RewardImporter(self.db, batch_size=2)
+        
+        # 创建测试Excel文件
+        self.test_excel_path = "test_rewards.xlsx"
+        self.test_data = {
+            '工号': ['001', '002', '003', '004', '005'],
+            '姓名': ['张三', '李四', '王五', '赵六', '孙七'],
+            '类型': ['奖励', '惩罚', '奖励', '奖励', '惩罚'],
+            '金额': [100, '50.5', 200, 300, 20],
+            '原因': ['全勤', '迟到', None, '加班', '迟到']
+        }
+        pd.DataFrame(self.test_data).to_excel(self.test_excel_path, index=False)
+        
+    def tearDown(self):
+        """测试后清理工作"""
+        if os.path.exists(self.test_excel_path):
+            os.remove(self.test_excel_path)
+        parsed_file_cache.clear()
+        self.db.close()
+        
+    def count_rows(self):
+        self.db.cursor.execute("SELECT COUNT(*) FROM rewards_punishments")
+        return self.db.cursor.fetchone()[0]
+    
+    def test_import_rewards(self):
+        """测试批量导入奖惩数据"""
+        self.assertTrue(self.importer.validate_file(self.test_excel_path))
+        result = self.importer.import_rewards(self.test_excel_path, "2024-01")
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['success'], 5)
+        
+        self.db.cursor.execute("SELECT emp_id, amount, reason FROM rewards_punishments WHERE emp_id IN ('002', '003') ORDER BY emp_id")
+        self.assertEqual(self.db.cursor.fetchall(), [('002', 50.5, '迟到'), ('003', 200, None)])
+    
+    def test_import_rewards_rejects_invalid_rows(self):
+        """测试存在无效行时整体回滚并报告行号"""
+        self.test_data['金额'][3] = '三百'
+        self.test_data['姓名'][4] = None
+        pd.DataFrame(self.test_data).to_excel(self.test_excel_path, index=False)
+        
+        with tempfile.TemporaryDirectory() as report_dir:
+            self.importer.error_report_dir = report_dir
+            result = self.importer.import_rewards(self.test_excel_path, "2024-01")
+            report = pd.read_csv(result['error_report'], encoding='utf-8-sig', dtype=str, keep_default_na=False)
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual([error['row'] for error in result['errors']], [5, 6])
+        self.assertEqual(self.count_rows(), 0)
+        self.assertEqual(report[['行号', '列', '原始值']].values.tolist(), [['5', '金额', '三百'], ['6', '姓名', '']])
+    
+    def test_import_rewards_locates_database_error(self):
+        """测试数据库写入失败时定位到具体行并回滚"""
+        self.db.cursor.execute('''
+            CREATE TRIGGER limit_amount BEFORE INSERT ON rewards_punishments
+            WHEN NEW.amount > 250
+            BEGIN
+                SELECT RAISE(ABORT, '金额超出上限');
+            END
+        ''')
+        
+        result = self.importer.import_rewards(self.test_excel_path, "2024-01")
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['errors'], [{'row': 5, 'message': '金额超出上限'}])
+        self.assertEqual(self.count_rows(), 0)
+
+    
+    def test_import_rewards_skips_duplicate_file(self):
+        """测试同一文件重复导入时直接跳过"""
+        result = self.importer.import_rewards(self.test_excel_path, "2024-01")
+        self.assertEqual(result['status'], 'success')
+        
+        parsed_file_cache.clear()
+        with mock.patch.object(parsed_file_cache, 'read') as read:
+            result = self.importer.import_rewards(self.test_excel_path, "2024-01")
+            read.assert_not_called()
+        self.assertEqual(result['status'], 'skipped')
+        self.assertEqual(result['previous']['success'], 5)
+        self.assertEqual(self.count_rows(), 5)
+        
+        # 强制导入时逐条判断重复，已导入的记录默认跳过
+        result = self.importer.import_rewards(self.test_excel_path, "2024-01", force=True)
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['success'], 0)
+        self.assertEqual(result['duplicates'], {'in_file': 0, 'existing': 5, 'skipped': 5})
+        self.assertEqual(self.count_rows(), 5)
+    
+    def test_import_rewards_duplicates(self):
+        """测试文件内和库中已有重复记录的处理方式"""
+        df = pd.read_excel(self.test_excel_path, dtype={'工号': str})
+        pd.concat([df, df.iloc[[0]]]).to_excel(self.test_excel_path, index=False)
+        
+        # 拒绝导入：文件内重复的两行都报出，整个文件不写入
+        result = self.importer.import_rewards(self.test_excel_path, "2024-01", on_duplicate='reject')
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual([e['row'] for e in result['errors']], [2, 7])
+        self.assertEqual(self.count_rows(), 0)
+        
+        result = self.importer.import_rewards(self.test_excel_path, "2024-01")
+        self.assertEqual(result['success'], 5)
+        self.assertEqual(result['duplicates']['in_file'], 1)
+        
+        # 覆盖：库中已有记录被替换，不产生重复
+        result = self.importer.import_rewards(self.test_excel_path, "2024-01", force=True, on_duplicate='overwrite')
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['success'], 5)
+        self.assertEqual(self.count_rows(), 5)
+        
+        result = self.importer.import_rewards(self.test_excel_path, "2024-01", force=True, on_duplicate='reject')
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(self.count_rows(), 5)
\ No newline at end of file
@@ -0,0 +1,211 @@
+import unittest
+import json
+from src.modules.salary_calculator import SalaryCalculator
+from src.db.database import Database
+from src.modules.tax_engine import ANNUAL_TAX_TABLE
+from src.modules.config_cache import config_cache
+from src.modules.salary_group import SalaryGroup
+from src.modules.salary_formula import FormulaError
+
+class TestSalaryCalculator(unittest.TestCase):
+    def setUp(self):
+        """测试前准备工作"""
+        self.db = Database()
+        self.db.db_path = ':memory:'
+        self.db.connect()
+        self.calculator = SalaryCalculator(self.db)
+        
+        cursor = self.db.cursor
+        cursor.execute("INSERT INTO insurance_groups (id, name, location, base_amount) VALUES (1, '本地', '杭州', 5000)")
+        cursor.executemany(
+            "INSERT INTO insurance_items (group_id, name, company_rate, personal_rate) VALUES (1, ?, ?, ?)",
+            [('养老保险', 16, 8), ('医疗保险', 9.5, 2)]
+        )
+        cursor.execute('''
+            INSERT INTO salary_groups (group_id, group_name, base_salary, performance_rule,
+                                       social_security_base, insurance_group_id)
+            VALUES ('G1', '生产', 8700, ?, 5000, 1)
+        ''', (json.dumps({'base': 2000, 'full_score': 100}),))
+        cursor.executemany(
+            "INSERT INTO employees (emp_id, name, salary_group, status) VALUES (?, ?, ?, ?)",
+            [('001', '张三', 'G1', 1), ('002', '李四', 'G1', 1), ('003', '王五', None, 1), ('004', '赵六', 'G1', 0)]
+        )
+        cursor.execute("INSERT INTO attendance (emp_id, date, attendance_days, overtime_hours) "
+                       "VALUES ('001', '2024-01-01', 21.75, 10)")
+        cursor.execute("INSERT INTO attendance (emp_id, date, attendance_days, overtime_hours) "
+                       "VALUES ('002', '2024-01-01', 10.875, 0)")
+        cursor.execute("INSERT INTO performance (emp_id, month, score) VALUES ('001', '2024-01', 90)")
+        cursor.executemany(
+            "INSERT INTO rewards_punishments (emp_id, name, month, type, amount) VALUES (?, ?, '2024-01', ?, ?)",
+            [('001', '张三', '奖励', 500), ('002', '李四', '惩罚', 100)]
+        )
+        self.db.conn.commit()
+        
+    def tearDown(self):
+        """测试后清理工作"""
+        self.db.close()
+        
+    def test_calculate_month(self):
+        """测试整月薪资按列计算，与逐个员工计算结果一致"""
+        records = self.calculator.calculate_month(2024, 1)
+        self.assertEqual(records['emp_id'].tolist(), ['001', '002'])
+        
+        first = records.iloc[0]
+        self.assertEqual(first['base_salary'], 8700)
+        self.assertEqual(first['performance'], 1800)
+        self.assertEqual(first['overtime_pay'], 750)
+        self.assertEqual(first['social_security'], 500)
+        self.assertEqual(records.iloc[1]['base_salary'], 4350)
+        
+        for record in records.to_dict('records'):
+            single = self.calculator.calculate_salary(record['emp_id'], 2024, 1)
+            for column in ('base_salary', 'performance', 'overtime_pay', 'social_security', 'tax', 'net_salary'):
+                self.assertAlmostEqual(single[column], record[column], places=2)
+                
+    def test_save_month(self):
+        """测试整月工资记录在一个事务内替换"""
+        self.calculator.calculate_month(2024, 1, save=True)
+        self.db.cursor.execute("UPDATE employees SET status = 0 WHERE emp_id = '002'")
+        self.calculator.calculate_month(2024, 1, save=True)
+        
+        self.db.cursor.execute("SELECT emp_id, net_salary FROM salary_records WHERE year = 2024 AND month = 1")
+        rows = self.db.cursor.fetchall()
+        self.assertEqual([row[0] for row in rows], ['001'])
+        self.assertAlmostEqual(rows[0][1], self.calculator.calculate_salary('001', 2024, 1)['net_salary'], places=2)
+        
+    def test_create_group(self):
+        """测试通过SalaryGroup创建的薪资组按所关联的社保配置组扣社保"""
+        self.calculator.calculate_month(2024, 1)
+        groups = SalaryGroup(self.db)
+        for group_id, insurance_group_id in (('G2', 1), ('G3', None)):
+            self.assertTrue(groups.create_group({
+                'group_id': group_id, 'group_name': group_id, 'base_salary': 6000,
+                'performance_rule': {'base': 0}, 'social_security_base': 5000,
+                'insurance_group_id': insurance_group_id, 'formula': None
+            }))
+        self.db.cursor.execute("UPDATE employees SET salary_group = 'G2' WHERE emp_id = '001'")
+        self.db.cursor.execute("UPDATE employees SET salary_group = 'G3' WHERE emp_id = '002'")
+        
+        with self.assertLogs(level='WARNING') as logs:
+            records = self.calculator.calculate_month(2024, 1)
+        self.assertEqual(records['social_security'].tolist(), [500, 0])
+        self.assertTrue(any('G3' in message for message in logs.output))
+        
+    def test_group_formula(self):
+        """测试薪资组公式按组整列计算实发工资"""
+        self.db.cursor.execute("INSERT INTO salary_items (name, level, amount) VALUES ('餐补', 1, 300)")
+        default = self.calculator.calculate_month(2024, 1)
+        self.db.cursor.execute("UPDATE salary_groups SET formula = "
+                               "'基本工资 + 绩效工资 + 加班工资 + 奖励 - 扣款 - 社保 - 个税 + 餐补'")
+        config_cache.invalidate('salary_groups')
+        records = self.calculator.calculate_month(2024, 1)
+        
+        # 与默认算法相比只多了餐补，奖励照发、扣款照扣
+        self.assertEqual(records['tax'].tolist(), default['tax'].tolist())
+        self.assertEqual(records['net_salary'].tolist(), (default['net_salary'] + 300).round(2).tolist())
+        self.assertAlmostEqual(self.calculator.calculate_salary('001', 2024, 1)['net_salary'],
+                               records.iloc[0]['net_salary'], places=2)
+        
+        # 验证公式与计算取同一份缓存的薪酬项
+        groups = SalaryGroup(self.db)
+        self.assertTrue(groups.validate_formula('基本工资 + 餐补'))
+        self.db.cursor.execute("INSERT INTO salary_items (name, level, amount) VALUES ('房补', 1, 500)")
+        self.assertFalse(groups.validate_formula('基本工资 + 房补'))
+        config_cache.invalidate('salary_items')
+        self.assertTrue(groups.validate_formula('基本工资 + 房补'))
+        
+        # 结果不是有限数时不计算，也不保存
+        self.db.cursor.execute("UPDATE salary_groups SET formula = '基本工资 / (社保 - 社保)'")
+        config_cache.invalidate('salary_groups')
+        with self.assertRaises(FormulaError):
+            self.calculator.calculate_month(2024, 1, save=True)
+        self.assertIsNone(self.calculator.calculate_salary('001', 2024, 1))
+        self.assertEqual(self.db.cursor.execute("SELECT COUNT(*) FROM salary_records").fetchone()[0], 0)
+        
+    def test_cumulative_withholding(self):
+        """测试累计预扣法按累计表逐月增量计税，与从1月起整体重算一致"""
+        self.db.cursor.execute("UPDATE employees SET special_deduction = 1000 WHERE emp_id = '001'")
+        for month in (1, 2, 3):
+            self.calculator.calculate_month(2024, month, save=True)
+        
+        self.db.cursor.execute("SELECT tax, base_salary + performance + overtime_pay + rewards - deductions, "
+                               "social_security FROM salary_records WHERE emp_id = '001' ORDER BY month")
+        rows = self.db.cursor.fetchall()
+        withheld = 0
+        for month, (tax, income, social) in enumerate(rows, 1):
+            # 本月税额 = 截至本月累计应纳税额 - 截至上月已预扣税额
+            cumulative = sum(row[1] - 5000 - row[2] - 1000 for row in rows[:month])
+            self.assertAlmostEqual(tax, ANNUAL_TAX_TABLE.tax_one(cumulative) - withheld, places=2)
+            withheld += tax
+        
+        ytd = self.db.cursor.execute(
+            "SELECT last_month, income, deductions, special_deductions, tax_withheld FROM tax_ytd "
+            "WHERE emp_id = '001' AND tax_year = 2024"
+        ).fetchone()
+        self.assertEqual(ytd[0], 3)
+        self.assertAlmostEqual(ytd[2], sum(5000 + row[2] for row in rows), places=2)
+        self.assertAlmostEqual(ytd[3], 3000, places=2)
+        self.assertAlmostEqual(ytd[4], withheld, places=2)
+        
+        # 单个员工计算读取同一累计表
+        self.assertAlmostEqual(self.calculator.calculate_salary('001', 2024, 3)['tax'], rows[2][0], places=2)
+        
+        # 重建结果与逐月累加一致
+        self.assertEqual(self.calculator.rebuild_tax_ytd(2024), 2)
+        rebuilt = self.db.cursor.execute(
+            "SELECT last_month, income, deductions, special_deductions, tax_withheld FROM tax_ytd "
+            "WHERE emp_id = '001' AND tax_year = 2024"
+        ).fetchone()
+        for expected, actual in zip(ytd, rebuilt):
+            self.assertAlmostEqual(expected, actual, places=2)
+        
+    def test_refinalize_month(self):
+        """测试之后的月份已结算时不允许直接重新结算，强制结算时累计数回到该月"""
+        for month in (1, 2):
+            self.calculator.calculate_month(2024, month, save=True)
+        self.db.cursor.execute("UPDATE employees SET status = 0 WHERE emp_id = '002'")
+        with self.assertRaises(ValueError):
+            self.calculator.calculate_month(2024, 1, save=True)
+        with self.assertLogs(level='WARNING'):
+            self.calculator.calculate_month(2024, 1, save=True, force=True)
+        
+        rows = dict(self.db.cursor.execute(
+            "SELECT emp_id, last_month FROM tax_ytd WHERE tax_year = 2024"
+        ).fetchall())
+        self.assertEqual(rows, {'001': 1})
+        
+        # 第2个月按第1个月结算后的累计数重新计算
+        records = self.calculator.calculate_month(2024, 2)
+        first = records.iloc[0]
+        self.assertAlmostEqual(first['ytd_tax_withheld'] - first['tax'],
+                               self.db.cursor.execute("SELECT tax FROM salary_records WHERE emp_id = '001' "
+                                                      "AND year = 2024 AND month = 1").fetchone()[0], places=2)
+
+    def test_recalculate_from(self):
+        """测试从某月起按顺序重新结算之后已结算的各月"""
+        for month in (1, 2, 3):
+            self.calculator.calculate_month(2024, month, save=True)
+        self.db.cursor.execute("UPDATE salary_groups SET base_salary = 10000")
+        config_cache.invalidate('salary_groups')
+        
+        self.assertEqual(self.calculator.recalculate_from(2024, 2), [2, 3])
+        ytd = self.db.cursor.execute(
+            "SELECT last_month, tax_withheld FROM tax_ytd WHERE emp_id = '001' AND tax_year = 2024"
+        ).fetchone()
+        taxes = [row[0] for row in self.db.cursor.execute(
+            "SELECT tax FROM salary_records WHERE emp_id = '001' ORDER BY month")]
+        self.assertEqual(ytd[0], 3)
+        self.assertAlmostEqual(ytd[1], sum(taxes), places=2)
+        # 重新结算的3月按重新结算后的2月累计数计税，与重建的累计表一致
+        self.calculator.rebuild_tax_ytd(2024)
+        self.assertAlmostEqual(self.calculator.calculate_month(2024, 3)['tax'].iloc[0], taxes[2], places=2)
+        
+    def test_calculate_tax(self):
+        """测试calculate_tax按已扣除起征点的应纳税所得额计税，按月计税时扣除当月的起征点"""
+        self.assertEqual(self.calculator.calculate_tax(5000), 290)
+        self.assertEqual(self.calculator.calculate_tax_vector([5000, -100]).tolist(), [290, 0])
+        self.assertEqual(self.calculator.calculate_monthly_tax(10000, 2018, 12), 290)
+        self.assertEqual(self.calculator.calculate_monthly_tax(10000, 2018, 9), 745)
+
+if __name__ == '__main__':
+    unittest.main()
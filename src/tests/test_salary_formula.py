@@ -0,0 +1,55 @@
+import unittest
+import sqlite3
+import numpy as np
+from src.modules.salary_formula import FormulaError, FormulaCache, compile_formula
+from src.modules.salary_group import SalaryGroup
+
+class TestSalaryFormula(unittest.TestCase):
+    def test_evaluate(self):
+        """测试运算优先级、括号、负号和全角符号，按数组整列求值"""
+        values = {'基本工资': np.array([8000.0, 6000.0]), '绩效工资': np.array([1000.0, 0.0]),
+                  '加班工资': np.array([0.0, 300.0]), '社保': np.array([800.0, 600.0]),
+                  '个税': np.array([100.0, 50.0]), '餐补': 300}
+        formula = compile_formula('基本工资 + 绩效工资*0.8 + 加班工资 - 社保 - 个税 + 餐补')
+        self.assertEqual(formula.evaluate(values).tolist(), [8200, 5950])
+        self.assertEqual(compile_formula('（基本工资＋餐补）×2').evaluate(values).tolist(), [16600, 12600])
+        self.assertEqual(compile_formula('-(1+2)*3 - -1').evaluate({}).tolist(), -8)
+        self.assertEqual(compile_formula('基本工资/2').names, {'基本工资'})
+        
+    def test_invalid(self):
+        """测试无法解析的公式和未知项目"""
+        for text in ('', '基本工资 +', '(基本工资', '基本工资)', '3基本工资', '基本工资 ** 2',
+                     '__import__("os")', '基本工资; 1', '1..2'):
+            with self.subTest(text=text):
+                with self.assertRaises(FormulaError):
+                    compile_formula(text)
+        
+        formula = compile_formula('基本工资 + 交通补贴')
+        self.assertEqual(formula.unknown_names(), ['交通补贴'])
+        self.assertEqual(formula.unknown_names(['交通补贴']), [])
+        with self.assertRaises(FormulaError):
+            formula.evaluate({'基本工资': 1})
+        with self.assertRaises(FormulaError):
+            compile_formula('基本工资 / 社保').evaluate({'基本工资': np.array([1.0, 2.0]), '社保': np.array([1.0, 0.0])})
+            
+    def test_cache(self):
+        """测试同一薪资组的公式只编译一次，修改后重新编译"""
+        cache = FormulaCache()
+        first = cache.get('G1', '基本工资 - 社保')
+        self.assertIs(cache.get('G1', '基本工资 - 社保'), first)
+        self.assertIsNot(cache.get('G2', '基本工资 - 社保'), first)
+        self.assertEqual(cache.get('G1', '基本工资').text, '基本工资')
+        
+    def test_validate_formula(self):
+        """测试薪资组公式校验引用已有的薪酬项"""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE salary_items (name TEXT, amount REAL)")
+        conn.execute("INSERT INTO salary_items VALUES ('餐补', 300)")
+        group = SalaryGroup(conn)
+        self.assertTrue(group.validate_formula('基本工资+绩效工资+奖励-扣款-社保-个税+餐补'))
+        self.assertFalse(group.validate_formula('基本工资 + 交通补贴'))
+        self.assertFalse(group.validate_formula('基本工资 +'))
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from src.modules.tax_engine import (MONTHLY_TAX_TABLES, ANNUAL_TAX_TABLE, TaxTable, tax_table_for,
+                                    cumulative_tax)
+
+def bracket_tax(table, income):
+    """逐级累加计算税额，作为对照"""
+    taxable = max(income - table.threshold, 0)
+    tax = 0
+    lower = 0
+    for upper, rate in table.brackets:
+        if taxable > lower:
+            tax += (min(taxable, upper) - lower) * rate
+        lower = upper
+    return tax
+
+class TestTaxEngine(unittest.TestCase):
+    def test_quick_deductions(self):
+        """测试预先算出的速算扣除数与公布的数值一致"""
+        self.assertEqual(MONTHLY_TAX_TABLES[0].quick_deductions.tolist(), [0, 105, 555, 1005, 2755, 5505, 13505])
+        self.assertEqual(MONTHLY_TAX_TABLES[1].quick_deductions.tolist(), [0, 210, 1410, 2660, 4410, 7160, 15160])
+        self.assertEqual(ANNUAL_TAX_TABLE.quick_deductions.tolist(),
+                         [0, 2520, 16920, 31920, 52920, 85920, 181920])
+        
+    def test_cumulative_tax(self):
+        """测试累计预扣：税额为累计应纳税额减已预扣税额，不为负"""
+        # 截至2月累计收入60000，减除费用10000、社保2000、专项附加扣除2000，累计应纳税所得额46000
+        self.assertAlmostEqual(float(cumulative_tax(60000, 12000, 2000, 900)), 46000 * 0.1 - 2520 - 900)
+        self.assertEqual(cumulative_tax([3000], [5000], [0], [0]).tolist(), [0])
+        self.assertEqual(cumulative_tax([10000], [10000], [0], [150]).tolist(), [0])
+        
+    def test_tax(self):
+        """测试整列计算、单个计算与逐级累加的结果一致（含各级边界）"""
+        for table in MONTHLY_TAX_TABLES:
+            incomes = np.concatenate((
+                np.random.default_rng(0).uniform(-1000, 150000, 1000),
+                table.threshold + table.lowers,
+                [0, table.threshold]
+            ))
+            expected = [bracket_tax(table, income) for income in incomes]
+            np.testing.assert_allclose(table.tax(incomes), expected, atol=1e-6)
+            np.testing.assert_allclose([table.tax_one(income) for income in incomes], expected, atol=1e-6)
+            
+    def test_tax_table_for(self):
+        """测试按月份选用税率表"""
+        self.assertEqual(tax_table_for(2018, 9).threshold, 3500)
+        self.assertEqual(tax_table_for(2018, 10).threshold, 5000)
+        self.assertEqual(tax_table_for(2024, 1).threshold, 5000)
+        self.assertEqual(tax_table_for(2010, 1).threshold, 3500)
+        self.assertEqual(MONTHLY_TAX_TABLES[1].tax_one(10000), 290)
+        custom = TaxTable('2000-01-01', 800, [(500, 0.05), (float('inf'), 0.1)])
+        self.assertEqual(custom.tax_one(2300), 125)
+
+if __name__ == '__main__':
+    unittest.main()